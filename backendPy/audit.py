@@ -0,0 +1,173 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+from flask import has_request_context, request
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import Session
+
+log = logging.getLogger('ate.audit')
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_QUEUE = 10000
+
+
+class AuditWriter:
+    """Escribe los eventos en lotes desde un hilo propio.
+
+    El request sólo encola los eventos al confirmar la transacción; el hilo
+    los inserta de a batch_size (o cada flush_interval segundos) con un único
+    INSERT ejecutado como executemany. Si la cola se llena, los eventos se
+    descartan con un aviso en el log en lugar de frenar los requests.
+    """
+
+    def __init__(self, engine_factory, table, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, max_queue=DEFAULT_MAX_QUEUE):
+        self.engine_factory = engine_factory
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._engine = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def _running(self):
+        return self._pid == os.getpid() and self._thread is not None and self._thread.is_alive()
+
+    def _ensure_started(self):
+        # Con gunicorn el hilo no sobrevive al fork: cada worker arranca el suyo
+        if self._running():
+            return
+        with self._lock:
+            if self._running():
+                return
+            if self._engine is None:
+                self._engine = self.engine_factory()
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def put(self, records):
+        if not records:
+            return
+        self._ensure_started()
+        for record in records:
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                log.warning('Cola de auditoría llena, evento descartado: %s', record)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+                    while len(batch) < self.batch_size:
+                        item = self._queue.get_nowait()
+                        if item is None:
+                            stopping = True
+                            break
+                        batch.append(item)
+            except queue.Empty:
+                pass
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        try:
+            with self._engine.begin() as conn:
+                conn.execute(insert(self.table), batch)
+        except Exception:
+            log.exception('No se pudieron guardar %d eventos de auditoría', len(batch))
+
+    def stop(self, timeout=5):
+        """Escribe lo pendiente y detiene el hilo (se llama también al salir)."""
+        if not self._running():
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+def _current_user():
+    if has_request_context():
+        return request.headers.get('X-User', 'Administrador')
+    return 'sistema'
+
+
+class Auditor:
+    """Arma eventos de alta, modificación y baja a partir de las sesiones.
+
+    tracked asocia cada modelo a (categoría, ruta del frontend, función que
+    describe la fila). Los eventos se juntan en cada flush y se entregan al
+    writer recién después del commit; un rollback los descarta. Las
+    sentencias masivas (descuentos de stock, importaciones) no pasan por el
+    unit of work y registran un evento resumen con record().
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.tracked = {}
+
+    def track(self, model, category, path, describe):
+        self.tracked[model] = (category, path, describe)
+
+    def _event(self, event_type, category, description, entity_id=None, path=None):
+        return {
+            'event_type': event_type,
+            'category': category,
+            'description': description,
+            'date': datetime.now(timezone.utc),
+            'user': _current_user(),
+            'entity_id': entity_id,
+            'path': path
+        }
+
+    def _pending(self, session):
+        return session.info.setdefault('audit_pending', [])
+
+    def record(self, session, event_type, category, description, entity_id=None, path=None):
+        self._pending(session).append(self._event(event_type, category, description, entity_id, path))
+
+    def _after_flush(self, session, flush_context):
+        pending = self._pending(session)
+        for event_type, objects in (('create', session.new), ('update', session.dirty),
+                                    ('delete', session.deleted)):
+            for obj in objects:
+                spec = self.tracked.get(type(obj))
+                if spec is None:
+                    continue
+                if event_type == 'update' and not session.is_modified(obj, include_collections=False):
+                    continue
+                category, path, describe = spec
+                entity_id = inspect(obj).mapper.primary_key_from_instance(obj)[0]
+                pending.append(self._event(event_type, category, describe(obj, event_type),
+                                           entity_id, path))
+
+    def _after_commit(self, session):
+        pending = session.info.pop('audit_pending', None)
+        if pending:
+            self.writer.put(pending)
+
+    def _after_rollback(self, session):
+        session.info.pop('audit_pending', None)
+
+    def watch(self, session_target=Session):
+        event.listen(session_target, 'after_flush', self._after_flush)
+        event.listen(session_target, 'after_commit', self._after_commit)
+        event.listen(session_target, 'after_rollback', self._after_rollback)
@@ -0,0 +1,213 @@
+from collections import defaultdict
+
+from sqlalchemy import (bindparam, delete, func, insert, literal, select, text, tuple_, union_all,
+                        update)
+from sqlalchemy.dialects import postgresql, sqlite
+
+from stock import InsufficientStock
+
+# Diferencias informadas como máximo en el resultado de la conciliación
+MAX_DRIFT_REPORTED = 100
+
+
+class InsufficientBalance(InsufficientStock):
+    """El delegado no tiene asignadas suficientes unidades sin entregar."""
+
+    message = 'Saldo insuficiente del delegado'
+
+    def __init__(self, delegate_id, benefit_id, requested, available):
+        super().__init__(benefit_id, requested, available)
+        self.delegate_id = delegate_id
+
+
+class DelegateBalances:
+    """Saldo de cada delegado por beneficio: unidades asignadas y entregadas.
+
+    La tabla delegate_balances se actualiza en la misma transacción que la
+    asignación o la entrega, así que el saldo de un delegado se lee de una
+    fila por beneficio sin sumar la historia. debit() descuenta con un UPDATE
+    condicional (assigned - delivered >= cantidad): una entrega que supera el
+    saldo no toca la fila y la transacción completa se descarta. reconcile()
+    recalcula los saldos desde las asignaciones y entregas e informa las
+    diferencias que encontró.
+    """
+
+    def __init__(self, balances, assignments, deliveries, benefits, archived=None):
+        self.balances = balances
+        self.assignments = assignments
+        self.deliveries = deliveries
+        self.benefits = benefits
+        # Entregado por delegado en los meses ya archivados (ver partitions.py)
+        self.archived = archived
+
+    def _insert(self, session):
+        dialect = postgresql if session.get_bind().dialect.name == 'postgresql' else sqlite
+        return dialect.insert(self.balances)
+
+    def credit(self, session, delegate_id, benefit_id, quantity):
+        """Suma unidades asignadas (crea la fila la primera vez)."""
+        balances = self.balances.c
+        statement = self._insert(session).values(
+            delegate_id=delegate_id, benefit_id=benefit_id, assigned=quantity, delivered=0,
+            updated_at=func.now()
+        )
+        session.execute(statement.on_conflict_do_update(
+            index_elements=['delegate_id', 'benefit_id'],
+            set_={'assigned': balances.assigned + statement.excluded.assigned,
+                  'updated_at': func.now()}
+        ))
+
+    def debit(self, session, delegate_id, benefit_id, quantity):
+        """Registra una entrega; InsufficientBalance si supera el saldo."""
+        balances = self.balances.c
+        balance = session.execute(
+            update(self.balances)
+            .where(balances.delegate_id == delegate_id, balances.benefit_id == benefit_id,
+                   balances.assigned - balances.delivered >= quantity)
+            .values(delivered=balances.delivered + quantity, updated_at=func.now())
+            .returning(balances.assigned - balances.delivered)
+        ).scalar_one_or_none()
+        if balance is None:
+            raise InsufficientBalance(delegate_id, benefit_id, quantity,
+                                      self.available(session, delegate_id, benefit_id))
+        return balance
+
+    def refund(self, session, delegate_id, benefit_id, quantity):
+        """Devuelve al saldo una entrega anulada."""
+        balances = self.balances.c
+        session.execute(
+            update(self.balances)
+            .where(balances.delegate_id == delegate_id, balances.benefit_id == benefit_id)
+            .values(delivered=balances.delivered - quantity, updated_at=func.now())
+        )
+
+    def available(self, session, delegate_id, benefit_id):
+        balances = self.balances.c
+        return session.execute(
+            select(balances.assigned - balances.delivered)
+            .where(balances.delegate_id == delegate_id, balances.benefit_id == benefit_id)
+        ).scalar() or 0
+
+    def allocate(self, session, requests):
+        """Verifica el saldo de varias entregas en bloque, sin descontarlo.
+
+        requests es una lista ordenada de (clave, delegate_id, benefit_id,
+        cantidad). Las filas de saldo involucradas se bloquean hasta el commit
+        (en orden, para no generar deadlocks entre lotes concurrentes) y se
+        asigna saldo a cada pedido en el orden recibido. Devuelve las claves
+        aceptadas y clave -> error para las rechazadas; las aceptadas se
+        descuentan después con debit_many().
+        """
+        pairs = sorted({(delegate_id, benefit_id) for _, delegate_id, benefit_id, _ in requests})
+        if not pairs:
+            return [], {}
+        balances = self.balances.c
+        rows = session.execute(
+            select(balances.delegate_id, balances.benefit_id, balances.assigned - balances.delivered)
+            .where(tuple_(balances.delegate_id, balances.benefit_id).in_(pairs))
+            .order_by(balances.delegate_id, balances.benefit_id)
+            .with_for_update()
+        )
+        available = {(delegate_id, benefit_id): balance for delegate_id, benefit_id, balance in rows}
+
+        accepted, rejected, taken = [], {}, defaultdict(int)
+        for key, delegate_id, benefit_id, quantity in requests:
+            pair = (delegate_id, benefit_id)
+            remaining = available.get(pair, 0) - taken[pair]
+            if quantity > remaining:
+                rejected[key] = InsufficientBalance(delegate_id, benefit_id, quantity, remaining)
+                continue
+            taken[pair] += quantity
+            accepted.append(key)
+        return accepted, rejected
+
+    def debit_many(self, session, items):
+        """Descuenta (delegate_id, benefit_id, cantidad) ya verificados con allocate()."""
+        totals = defaultdict(int)
+        for delegate_id, benefit_id, quantity in items:
+            totals[(delegate_id, benefit_id)] += quantity
+        if not totals:
+            return
+        balances = self.balances.c
+        session.execute(
+            update(self.balances)
+            .where(balances.delegate_id == bindparam('b_delegate_id'),
+                   balances.benefit_id == bindparam('b_benefit_id'))
+            .values(delivered=balances.delivered + bindparam('b_quantity'), updated_at=func.now()),
+            [{'b_delegate_id': delegate_id, 'b_benefit_id': benefit_id, 'b_quantity': quantity}
+             for (delegate_id, benefit_id), quantity in totals.items()]
+        )
+
+    def for_delegate(self, session, delegate_id):
+        balances, benefits = self.balances.c, self.benefits.c
+        rows = session.execute(
+            select(balances.benefit_id, benefits.name.label('benefit_name'), balances.assigned,
+                   balances.delivered, (balances.assigned - balances.delivered).label('balance'),
+                   balances.updated_at)
+            .outerjoin(self.benefits, benefits.id == balances.benefit_id)
+            .where(balances.delegate_id == delegate_id)
+            .order_by(balances.benefit_id)
+        )
+        return [row._asdict() for row in rows]
+
+    def _history(self):
+        """Asignado y entregado por (delegado, beneficio) según la historia."""
+        assignments, deliveries = self.assignments.c, self.deliveries.c
+        sources = [
+            select(assignments.delegate_id, assignments.benefit_id,
+                   assignments.quantity.label('assigned'), literal(0).label('delivered'))
+            .where(assignments.delegate_id.is_not(None), assignments.benefit_id.is_not(None)),
+            select(deliveries.delegate_id, deliveries.benefit_id,
+                   literal(0).label('assigned'), deliveries.quantity.label('delivered'))
+            .where(deliveries.delegate_id.is_not(None), deliveries.benefit_id.is_not(None)),
+        ]
+        if self.archived is not None:
+            archived = self.archived.c
+            sources.append(select(archived.delegate_id, archived.benefit_id,
+                                  literal(0).label('assigned'), archived.delivered))
+        movements = union_all(*sources).subquery()
+        return (
+            select(movements.c.delegate_id, movements.c.benefit_id,
+                   func.sum(movements.c.assigned).label('assigned'),
+                   func.sum(movements.c.delivered).label('delivered'))
+            .group_by(movements.c.delegate_id, movements.c.benefit_id)
+        )
+
+    def reconcile(self, session, dry_run=False):
+        """Compara los saldos con la historia y, salvo dry_run, los reescribe."""
+        if not dry_run and session.get_bind().dialect.name == 'postgresql':
+            # Las asignaciones y entregas concurrentes esperan a este commit
+            session.execute(text('LOCK TABLE delegate_balances IN EXCLUSIVE MODE'))
+        expected = {(row.delegate_id, row.benefit_id): (row.assigned, row.delivered)
+                    for row in session.execute(self._history())}
+        balances = self.balances.c
+        recorded = {(row.delegate_id, row.benefit_id): (row.assigned, row.delivered)
+                    for row in session.execute(
+                        select(balances.delegate_id, balances.benefit_id,
+                               balances.assigned, balances.delivered))}
+
+        drift = []
+        for pair in sorted(expected.keys() | recorded.keys()):
+            want = expected.get(pair, (0, 0))
+            have = recorded.get(pair, (0, 0))
+            if want != have:
+                drift.append({
+                    'delegate_id': pair[0], 'benefit_id': pair[1],
+                    'assigned': have[0], 'delivered': have[1],
+                    'expected_assigned': want[0], 'expected_delivered': want[1],
+                })
+        overdrawn = sum(1 for assigned, delivered in expected.values() if delivered > assigned)
+
+        if not dry_run and drift:
+            session.execute(delete(self.balances))
+            session.execute(insert(self.balances).from_select(
+                ['delegate_id', 'benefit_id', 'assigned', 'delivered'], self._history()
+            ))
+        return {
+            'checked': len(expected.keys() | recorded.keys()),
+            'drift_count': len(drift),
+            'drift': drift[:MAX_DRIFT_REPORTED],
+            # Delegados que según la historia entregaron más de lo asignado
+            'overdrawn': overdrawn,
+            'rebuilt': not dry_run and bool(drift),
+        }
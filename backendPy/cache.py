@@ -0,0 +1,179 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+DEFAULT_TTL = 60
+DEFAULT_MAXSIZE = 256
+
+
+class LocalBackend:
+    """LRU en memoria del proceso con vencimiento por TTL."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    """Backend compartido entre workers; requiere el paquete redis."""
+
+    def __init__(self, url, ttl=DEFAULT_TTL, prefix='ate:cache:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class ResponseCache:
+    """Cache de respuestas JSON ya serializadas, invalidado por commits.
+
+    Cada clave declara de qué tablas depende; al confirmar una sesión que
+    escribió en alguna de ellas (por el unit of work o por un UPDATE/INSERT
+    ejecutado con session.execute) la clave se borra. Con LocalBackend cada
+    worker tiene su copia y los demás la ven vencer por TTL; con un backend
+    compartido la invalidación llega a todos.
+    """
+
+    def __init__(self, backend=None, on_lookup=None):
+        self.backend = backend or LocalBackend()
+        self.on_lookup = on_lookup
+        self.dependencies = {}
+        self.hits = {}
+        self.misses = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Toma el backend de la configuración (CACHE_URL, CACHE_TTL, CACHE_MAXSIZE)."""
+        self.backend = backend_from_config(app.config)
+
+    def register(self, key, tables):
+        for table in tables:
+            self.dependencies.setdefault(table, set()).add(key)
+
+    def _count(self, counter, key, hit):
+        with self._lock:
+            counter[key] = counter.get(key, 0) + 1
+        if self.on_lookup:
+            self.on_lookup(key, hit)
+
+    def get_or_set(self, key, produce, version=None):
+        """Valor de key o, si falta, el que devuelve produce().
+
+        Con version el valor se guarda junto a la versión de los datos con
+        que se generó y sólo se usa si es al menos esa: una copia anterior
+        cuenta como fallo y se reemplaza.
+        """
+        value = self.backend.get(key)
+        if value is not None and version is not None:
+            stored, _, body = value.partition(b'\n')
+            value = body if int(stored) >= version else None
+        if value is not None:
+            self._count(self.hits, key, True)
+            return value
+        self._count(self.misses, key, False)
+        value = produce()
+        self.backend.set(key, value if version is None else b'%d\n%s' % (version, value))
+        return value
+
+    def json_response(self, app, key, produce, version=None):
+        body = self.get_or_set(key, lambda: app.json.dumps_bytes(produce()), version)
+        return Response(body, mimetype='application/json')
+
+    def invalidate_tables(self, tables):
+        keys = set()
+        for table in tables:
+            keys |= self.dependencies.get(table, set())
+        if keys:
+            self.backend.delete(*keys)
+
+    def stats(self):
+        with self._lock:
+            return {
+                key: {'hits': self.hits.get(key, 0), 'misses': self.misses.get(key, 0)}
+                for key in set(self.hits) | set(self.misses)
+            }
+
+    # Seguimiento de escrituras en las sesiones
+
+    def _after_flush(self, session, flush_context):
+        tables = session.info.setdefault('cache_dirty_tables', set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            table = getattr(obj, '__table__', None)
+            if table is not None:
+                tables.add(table.name)
+
+    def _do_orm_execute(self, orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            table = getattr(orm_execute_state.statement, 'table', None)
+            if table is not None:
+                orm_execute_state.session.info.setdefault('cache_dirty_tables', set()).add(table.name)
+
+    def _after_commit(self, session):
+        tables = session.info.pop('cache_dirty_tables', None)
+        if tables:
+            self.invalidate_tables(tables)
+
+    def _after_rollback(self, session):
+        session.info.pop('cache_dirty_tables', None)
+
+    def watch(self, session_target=Session):
+        event.listen(session_target, 'after_flush', self._after_flush)
+        event.listen(session_target, 'do_orm_execute', self._do_orm_execute)
+        event.listen(session_target, 'after_commit', self._after_commit)
+        event.listen(session_target, 'after_rollback', self._after_rollback)
+
+
+def backend_from_config(config):
+    ttl = int(config.get('CACHE_TTL', DEFAULT_TTL))
+    url = config.get('CACHE_URL')
+    if url:
+        return RedisBackend(url, ttl=ttl)
+    return LocalBackend(maxsize=int(config.get('CACHE_MAXSIZE', DEFAULT_MAXSIZE)), ttl=ttl)
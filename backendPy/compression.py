@@ -0,0 +1,115 @@
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+DEFAULT_MIN_SIZE = 500
+DEFAULT_GZIP_LEVEL = 6
+# Calidad 4-5 de brotli comprime mejor que gzip 6 a una velocidad parecida;
+# las calidades altas son para contenido estático
+DEFAULT_BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'text/',
+    'application/javascript',
+)
+
+
+def _accepted(accept_encodings):
+    # Se elige la de mayor q entre las que sabemos producir; brotli gana los empates
+    options = [('br', accept_encodings['br'])] if brotli is not None else []
+    options.append(('gzip', accept_encodings['gzip']))
+    encoding, quality = max(options, key=lambda option: option[1])
+    return encoding if quality > 0 else None
+
+
+class _Compressor:
+    def __init__(self, encoding, gzip_level, brotli_quality):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31: formato gzip (cabecera y CRC) en lugar de zlib crudo
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        if self.encoding == 'br':
+            return self._brotli.process(data)
+        return self._zlib.compress(data)
+
+    def flush(self):
+        # Vacía lo pendiente sin cerrar el stream, para que el cliente reciba cada lote
+        if self.encoding == 'br':
+            return self._brotli.flush()
+        return self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def _compress_stream(chunks, compressor):
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class Compression:
+    """Comprime las respuestas con gzip o brotli según Accept-Encoding.
+
+    Sólo se comprimen tipos de texto (JSON, NDJSON, CSV) a partir de
+    COMPRESS_MIN_SIZE bytes; las respuestas en streaming (exportaciones) se
+    comprimen por lote a medida que se generan, sin juntarlas en memoria.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.min_size = int(app.config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE))
+        self.gzip_level = int(app.config.get('COMPRESS_LEVEL', DEFAULT_GZIP_LEVEL))
+        self.brotli_quality = int(app.config.get('COMPRESS_BR_QUALITY', DEFAULT_BROTLI_QUALITY))
+        app.after_request(self.after_request)
+
+    def _compressible(self, response):
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if response.direct_passthrough or 'Content-Encoding' in response.headers:
+            return False
+        mimetype = response.mimetype or ''
+        return mimetype.startswith(COMPRESSIBLE_TYPES)
+
+    def after_request(self, response):
+        if not self._compressible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = _accepted(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+        if response.is_streamed:
+            response.response = _compress_stream(response.iter_encoded(), compressor)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(compressor.compress(data) + compressor.finish())
+
+        response.headers['Content-Encoding'] = encoding
+        # El cuerpo ya no es el mismo byte a byte: el ETag pasa a ser débil
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,168 @@
+import calendar
+import re
+import unicodedata
+from datetime import date, datetime
+from typing import NamedTuple, Optional
+
+from sqlalchemy import and_, exists, literal, select
+
+
+class EligibilityError(ValueError):
+    pass
+
+
+def _add_months(day, months):
+    year, month = divmod(day.year * 12 + day.month - 1 + months, 12)
+    # 31/03 menos un mes -> último día de febrero
+    last_day = calendar.monthrange(year, month + 1)[1]
+    return date(year, month + 1, min(day.day, last_day))
+
+
+class AgeBounds(NamedTuple):
+    """Edad en meses cumplidos: min_months <= edad < max_months (None: sin tope)."""
+    min_months: int
+    max_months: Optional[int]
+
+    def birth_window(self, as_of):
+        """(nacidos después de, nacidos hasta) para tener esa edad el día as_of."""
+        until = _add_months(as_of, -self.min_months)
+        after = _add_months(as_of, -self.max_months) if self.max_months is not None else None
+        return after, until
+
+    def to_dict(self):
+        return {'min_months': self.min_months, 'max_months': self.max_months}
+
+
+_MONTHS = ('mes', 'meses', 'm')
+_RANGE = re.compile(r'(\d+)\s*(meses|mes|anos|ano|m)?\s*(?:-|a|al|hasta)\s*(\d+)\s*(meses|mes|anos|ano)?')
+_UP_TO = re.compile(r'(hasta|menores de|menos de)\s*(\d+)\s*(meses|mes|anos|ano)?')
+_FROM = re.compile(r'(mayores de|desde|mas de|\+)\s*(\d+)\s*(meses|mes|anos|ano)?|(\d+)\s*(meses|mes|anos|ano)?\s*\+')
+_SINGLE = re.compile(r'(\d+)\s*(meses|mes|anos|ano)?')
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in text if not unicodedata.combining(char)).strip()
+
+
+def _in_months(value, unit):
+    return int(value) if unit in _MONTHS else int(value) * 12
+
+
+def parse_age_range(age_range):
+    """Convierte el age_range libre de un beneficio en AgeBounds.
+
+    Acepta '0-5', '6 a 12 años', '6 meses a 2 años', 'hasta 3 años',
+    'menores de 18', 'mayores de 18', '18+' o una edad suelta ('5 años').
+    Los topes son inclusivos en la unidad indicada: '6-12' incluye a quien
+    tiene 12 años y 11 meses. Devuelve None si no hay ninguna edad.
+    """
+    text = _normalize(age_range or '')
+    if not text:
+        return None
+
+    match = _RANGE.search(text)
+    if match:
+        low, low_unit, high, high_unit = match.groups()
+        low_unit = low_unit or high_unit
+        low_months = _in_months(low, low_unit)
+        high_months = _in_months(int(high) + 1, high_unit)
+        if high_months <= low_months:
+            raise EligibilityError(f'Rango de edad inválido: {age_range}')
+        return AgeBounds(low_months, high_months)
+
+    match = _UP_TO.search(text)
+    if match:
+        kind, value, unit = match.groups()
+        # 'hasta 5' incluye los 5 años; 'menores de 5' no
+        limit = int(value) + 1 if kind == 'hasta' else int(value)
+        return AgeBounds(0, _in_months(limit, unit))
+
+    match = _FROM.search(text)
+    if match:
+        value = match.group(2) or match.group(4)
+        unit = match.group(3) or match.group(5)
+        return AgeBounds(_in_months(value, unit), None)
+
+    match = _SINGLE.search(text)
+    if match:
+        value, unit = match.groups()
+        return AgeBounds(_in_months(value, unit), _in_months(int(value) + 1, unit))
+    return None
+
+
+def parse_as_of(value):
+    if not value:
+        return date.today()
+    try:
+        return datetime.strptime(value.strip(), '%Y-%m-%d').date()
+    except ValueError:
+        raise EligibilityError(f'Fecha inválida (se espera AAAA-MM-DD): {value}')
+
+
+class EligibilityEngine:
+    """Destinatarios elegibles para un beneficio, resueltos en una sola consulta.
+
+    Con rango de edad se buscan hijos cuyo birth_date cae en la ventana que
+    corresponde a esa edad (un rango sobre ix_children_birth_date); sin rango
+    el beneficio es para afiliados. En ambos casos se excluye, con NOT EXISTS
+    sobre el índice (benefit_id, child_id/affiliate_id), a quien ya lo recibió,
+    también en los meses archivados (archived, ver partitions.py).
+    """
+
+    def __init__(self, children, affiliates, deliveries, archived=None):
+        self.children = children
+        self.affiliates = affiliates
+        self.deliveries = deliveries
+        self.archived = archived
+
+    def _not_delivered(self, benefit_id, condition):
+        """condition(tabla) relaciona una fila de entregas con el destinatario."""
+        sources = [self.deliveries] if self.archived is None else [self.deliveries, self.archived]
+        return and_(*(
+            ~exists(select(literal(1)).where(source.benefit_id == benefit_id, condition(source)))
+            for source in sources
+        ))
+
+    def children_query(self, session, benefit_id, bounds, as_of, sector_id=None, gender=None,
+                       has_disability=None, include_delivered=False):
+        children, affiliates = self.children, self.affiliates
+        after, until = bounds.birth_window(as_of)
+        query = (
+            session.query(children.child_id, children.first_name, children.last_name,
+                          children.birth_date, children.gender, children.has_disability,
+                          affiliates.id_associate.label('affiliate_id'), affiliates.affiliate_name,
+                          affiliates.sector_id)
+            .join(affiliates, affiliates.id_associate == children.affiliate_id)
+            .filter(children.birth_date <= until)
+        )
+        if after is not None:
+            query = query.filter(children.birth_date > after)
+        if sector_id is not None:
+            query = query.filter(affiliates.sector_id == sector_id)
+        if gender:
+            query = query.filter(children.gender == gender)
+        if has_disability is not None:
+            query = query.filter(children.has_disability.is_(has_disability))
+        if not include_delivered:
+            query = query.filter(self._not_delivered(
+                benefit_id, lambda source: source.child_id == children.child_id))
+        return query, children.child_id
+
+    def affiliates_query(self, session, benefit_id, sector_id=None, gender=None,
+                         has_disability=None, include_delivered=False):
+        affiliates = self.affiliates
+        query = session.query(affiliates.id_associate, affiliates.affiliate_code,
+                              affiliates.affiliate_name, affiliates.dni, affiliates.gender,
+                              affiliates.sector_id, affiliates.has_disability)
+        if sector_id is not None:
+            query = query.filter(affiliates.sector_id == sector_id)
+        if gender:
+            query = query.filter(affiliates.gender == gender)
+        if has_disability is not None:
+            query = query.filter(affiliates.has_disability.is_(has_disability))
+        if not include_delivered:
+            query = query.filter(self._not_delivered(benefit_id, lambda source: and_(
+                source.affiliate_id == affiliates.id_associate, source.child_id.is_(None)
+            )))
+        return query, affiliates.id_associate
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _csv_batches(columns, partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([[_jsonable(value) for value in row] for row in rows])
+        yield buffer.getvalue()
+
+
+def _ndjson_batches(columns, partitions):
+    for rows in partitions:
+        yield ''.join(
+            json.dumps(dict(zip(columns, map(_jsonable, row))), ensure_ascii=False) + '\n'
+            for row in rows
+        )
+
+
+def export_rows(conn, statement, fmt, batch_size=BATCH_SIZE):
+    """Como stream_export, pero sobre una conexión ya abierta (y su transacción)."""
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f'Formato inválido: {fmt}')
+    columns = [column.name for column in statement.selected_columns]
+    # Las opciones van en este execute: execution_options() cambiaría la conexión del llamador
+    result = conn.execute(statement,
+                          execution_options={'stream_results': True, 'yield_per': batch_size})
+    if fmt == 'csv':
+        return _csv_batches(columns, result.partitions())
+    return _ndjson_batches(columns, result.partitions())
+
+
+def stream_export(engine, statement, fmt, batch_size=BATCH_SIZE):
+    """Generador que recorre la consulta con un cursor del lado del servidor.
+
+    Las filas se leen de a batch_size (stream_results + yield_per), así que la
+    memoria no depende del tamaño de la tabla. En CSV el encabezado se emite
+    antes de ejecutar la consulta para que el primer byte salga enseguida.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f'Formato inválido: {fmt}')
+    columns = [column.name for column in statement.selected_columns]
+
+    def partitions():
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(statement)
+            for rows in result.partitions():
+                yield rows
+
+    if fmt == 'csv':
+        return _csv_batches(columns, partitions())
+    return _ndjson_batches(columns, partitions())
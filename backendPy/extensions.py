@@ -0,0 +1,94 @@
+from audit import Auditor, AuditWriter
+from balances import DelegateBalances
+from cache import ResponseCache
+from compression import Compression
+from eligibility import EligibilityEngine
+from jobs import JobQueue
+from live import LiveFeed
+import metrics
+from models import (Afiliado, AssignmentStat, Benefit, BenefitDelivery, Child, ChildAgeStat,
+                    CollectionChange, CollectionChangeFloor, Delegate, DelegateAssignment, DelegateBalance,
+                    DeliveryArchive, DeliveryArchiveRecipient, DeliveryArchiveTotal, DeliveryStat,
+                    Event, Job, Sector, db)
+from partitions import DeliveryPartitions
+from profiles import ProfileLoader
+from replicas import ReplicaRouter
+from stats import Statistics
+from sync import ChangeLog
+
+# Componentes compartidos por los blueprints. No dependen de una app en
+# particular: create_app() configura los que leen app.config con init_app()
+
+# Reparte los GET entre las réplicas de DATABASE_REPLICA_URLS
+replica_router = ReplicaRouter(db)
+
+# Cache de sectores y beneficios; se invalida al confirmar escrituras en sus tablas.
+# Las asignaciones descuentan stock_rest, por eso también invalidan beneficios.
+response_cache = ResponseCache(on_lookup=metrics.record_cache_lookup)
+response_cache.register('sectors', ['sectors'])
+response_cache.register('benefits', ['benefits', 'delegate_assignments'])
+response_cache.watch()
+
+# gzip/brotli según Accept-Encoding para listados y exportaciones
+compression = Compression()
+
+# Historial de cambios: los eventos salen de las sesiones y se escriben en
+# la tabla events desde un hilo aparte, en lotes
+AUDIT_VERBS = {'create': 'Se creó', 'update': 'Se actualizó', 'delete': 'Se eliminó'}
+
+auditor = Auditor(AuditWriter(lambda: db.engine, Event.__table__))
+auditor.track(Afiliado, 'affiliate', '/afiliados',
+              lambda obj, op: f'{AUDIT_VERBS[op]} el afiliado: {obj.affiliate_name}')
+auditor.track(Child, 'child', '/hijos',
+              lambda obj, op: f'{AUDIT_VERBS[op]} el hijo: {obj.first_name} {obj.last_name}')
+auditor.track(Delegate, 'delegate', '/delegados',
+              lambda obj, op: f'{AUDIT_VERBS[op]} el delegado: {obj.first_name} {obj.last_name}')
+auditor.track(Benefit, 'benefit', '/beneficios',
+              lambda obj, op: f'{AUDIT_VERBS[op]} el beneficio: {obj.name}')
+auditor.track(DelegateAssignment, 'assignment', '/delegados',
+              lambda obj, op: f'{AUDIT_VERBS[op]} la asignación de {obj.quantity} unidades del '
+                              f'beneficio {obj.benefit_id} al delegado {obj.delegate_id}')
+auditor.track(BenefitDelivery, 'delivery', '/afiliados',
+              lambda obj, op: f'{AUDIT_VERBS[op]} la entrega de {obj.quantity} unidades del '
+                              f'beneficio {obj.benefit_id}')
+auditor.watch()
+
+# Versiones por colección para ETag y ?since= (columna clave de cada tabla)
+change_log = ChangeLog(CollectionChange, {
+    'affiliates': 'id_associate',
+    'children': 'child_id',
+    'delegates': 'id',
+    'sectors': 'sector_id',
+    'benefits': 'id',
+}, floors=CollectionChangeFloor)
+
+statistics = Statistics(
+    DeliveryStat.__table__, AssignmentStat.__table__, ChildAgeStat.__table__,
+    BenefitDelivery.__table__, DelegateAssignment.__table__, Afiliado.__table__,
+    Child.__table__, Benefit.__table__, Sector.__table__, archives=DeliveryArchive.__table__
+)
+
+# Saldo de cada delegado por beneficio, al día con cada asignación y entrega
+delegate_balances = DelegateBalances(DelegateBalance.__table__, DelegateAssignment.__table__,
+                                     BenefitDelivery.__table__, Benefit.__table__,
+                                     archived=DeliveryArchiveTotal.__table__)
+
+# Particiones mensuales de benefit_deliveries y archivado de meses cerrados
+delivery_partitions = DeliveryPartitions(BenefitDelivery.__table__, DeliveryArchive.__table__,
+                                         DeliveryArchiveTotal.__table__,
+                                         DeliveryArchiveRecipient.__table__)
+
+# Lo ya recibido sale de las entregas y de los destinatarios de meses archivados
+eligibility = EligibilityEngine(Child, Afiliado, BenefitDelivery, archived=DeliveryArchiveRecipient)
+
+# Fichas de afiliados (GET /afiliados/<id>/profile y /afiliados/profiles)
+profiles = ProfileLoader(Afiliado, Child, BenefitDelivery, Benefit, Delegate, Sector,
+                         archived=DeliveryArchiveRecipient)
+
+# Stock y entregas en vivo: las rutas que escriben avisan por NOTIFY y
+# `flask live-server` lo reparte por SSE
+live_feed = LiveFeed(Benefit.__table__, BenefitDelivery.__table__, CollectionChange.__table__)
+
+# Los workers (`flask jobs-worker`) corren dentro del contexto de la app.
+# Después de cada trabajo se descarta la sesión (y su transacción, si falló)
+job_queue = JobQueue(Job.__table__, lambda: db.engine, after_handler=lambda: db.session.remove())
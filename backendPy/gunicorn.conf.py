@@ -0,0 +1,40 @@
+# Configuración de gunicorn para producción:
+#   gunicorn -c gunicorn.conf.py wsgi:app
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+
+# Procesos y hilos por proceso. Con gthread cada hilo atiende un request y
+# usa como máximo una conexión del pool (DB_POOL_SIZE sigue a GUNICORN_THREADS).
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Reciclar workers de a poco evita crecimiento de memoria a largo plazo
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '0') == '1'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    # Con preload_app el engine se creó en el maestro: cada worker necesita su pool
+    if server.cfg.preload_app:
+        from app import dispose_engine
+        from wsgi import app
+        dispose_engine(app)
+
+
+def child_exit(server, worker):
+    # Limpia los archivos de métricas del worker que terminó (PROMETHEUS_MULTIPROC_DIR)
+    from metrics import mark_process_dead
+    mark_process_dead(worker.pid)
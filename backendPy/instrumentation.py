@@ -0,0 +1,116 @@
+import json
+import logging
+import os
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from serialization import FastJSONProvider
+
+request_log = logging.getLogger('ate.requests')
+slow_query_log = logging.getLogger('ate.slow_queries')
+
+DEFAULT_SLOW_QUERY_MS = 200
+
+_slow_query_ms = DEFAULT_SLOW_QUERY_MS
+
+
+class TimedJSONProvider(FastJSONProvider):
+    """Proveedor JSON que suma el tiempo de serialización de cada request."""
+
+    def dumps_bytes(self, obj, **kwargs):
+        if not has_request_context():
+            return super().dumps_bytes(obj, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().dumps_bytes(obj, **kwargs)
+        finally:
+            g.serialize_time = g.get('serialize_time', 0.0) + time.perf_counter() - start
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+        g.db_time = g.get('db_time', 0.0) + elapsed
+
+    if elapsed * 1000 >= _slow_query_ms:
+        slow_query_log.warning(json.dumps({
+            'duration_ms': round(elapsed * 1000, 2),
+            'statement': statement,
+            'parameters': repr(parameters)[:2000],
+            'executemany': executemany,
+            'path': request.path if has_request_context() else None
+        }, ensure_ascii=False))
+
+
+def _before_request():
+    g.request_start = time.perf_counter()
+    g.query_count = 0
+    g.db_time = 0.0
+    g.serialize_time = 0.0
+
+
+def _after_request(response):
+    start = g.get('request_start')
+    if start is None:
+        return response
+    total = time.perf_counter() - start
+    db_time = g.get('db_time', 0.0)
+    serialize_time = g.get('serialize_time', 0.0)
+    query_count = g.get('query_count', 0)
+    size = None if response.is_streamed else response.calculate_content_length()
+
+    response.headers.add('Server-Timing', ', '.join([
+        f'db;dur={db_time * 1000:.2f};desc="{query_count} queries"',
+        f'serialize;dur={serialize_time * 1000:.2f}',
+        f'total;dur={total * 1000:.2f}'
+    ]))
+    request_log.info(json.dumps({
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'duration_ms': round(total * 1000, 2),
+        'query_count': query_count,
+        'db_ms': round(db_time * 1000, 2),
+        'serialize_ms': round(serialize_time * 1000, 2),
+        'response_bytes': size
+    }))
+    return response
+
+
+def init_instrumentation(app):
+    """Registra los hooks de Flask y los eventos de SQLAlchemy.
+
+    SLOW_QUERY_MS fija el umbral del log de consultas lentas y SLOW_QUERY_LOG,
+    si está definido, el archivo donde se escriben.
+    """
+    global _slow_query_ms
+    _slow_query_ms = float(app.config.get('SLOW_QUERY_MS',
+                                          os.environ.get('SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS)))
+
+    log_path = app.config.get('SLOW_QUERY_LOG', os.environ.get('SLOW_QUERY_LOG'))
+    if log_path and not slow_query_log.handlers:
+        handler = logging.FileHandler(log_path, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_query_log.addHandler(handler)
+    for logger in (request_log, slow_query_log):
+        if logger.level == logging.NOTSET:
+            logger.setLevel(logging.INFO)
+        if not logger.handlers and not logging.getLogger().handlers:
+            logger.addHandler(logging.StreamHandler())
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    app.json = TimedJSONProvider(app)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
@@ -0,0 +1,250 @@
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_, select, update
+
+log = logging.getLogger('ate.jobs')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 10
+# Un trabajo en curso sin heartbeat en este tiempo se da por perdido (worker caído)
+STALE_SECONDS = 300
+# Mientras el handler corre, un hilo renueva el heartbeat con este intervalo
+HEARTBEAT_SECONDS = 60
+POLL_INTERVAL = 1.0
+
+
+class JobError(ValueError):
+    pass
+
+
+class JobFailed(Exception):
+    """Error definitivo: el trabajo falla sin reintentos (archivo inválido, etc.)."""
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+class JobContext:
+    def __init__(self, queue, job):
+        self.queue = queue
+        self.job = job
+        self.id = job['id']
+        self.payload = job['payload'] or {}
+        self.attempt = job['attempts']
+
+    def progress(self, percent=None, message=None):
+        """Informa el avance; también renueva el heartbeat del trabajo."""
+        self.queue.report_progress(self.id, percent, message)
+
+
+class JobQueue:
+    """Cola de trabajos durable sobre una tabla de la misma base.
+
+    Los workers toman trabajos con SELECT ... FOR UPDATE SKIP LOCKED (en
+    SQLite, que serializa las escrituras, alcanza con el UPDATE condicional),
+    así que varios procesos pueden consumir la cola sin pisarse y sin un
+    broker aparte. Cada intento fallido vuelve a la cola con espera
+    exponencial hasta max_attempts; JobFailed corta los reintentos.
+    after_handler se llama al terminar cada handler, antes de registrar el
+    resultado (por ejemplo para descartar la sesión que usó).
+    """
+
+    def __init__(self, table, engine_factory, after_handler=None):
+        self.table = table
+        self.engine_factory = engine_factory
+        self.after_handler = after_handler
+        self.handlers = {}
+
+    @property
+    def engine(self):
+        return self.engine_factory()
+
+    def handler(self, kind):
+        def decorator(fn):
+            self.handlers[kind] = fn
+            return fn
+        return decorator
+
+    def enqueue(self, kind, payload=None, max_attempts=DEFAULT_MAX_ATTEMPTS, run_after=None):
+        if kind not in self.handlers:
+            raise JobError(f'Tipo de trabajo inválido: {kind}')
+        now = _now()
+        with self.engine.begin() as conn:
+            return conn.execute(self.table.insert().values(
+                kind=kind,
+                status=QUEUED,
+                payload=payload or {},
+                attempts=0,
+                max_attempts=max_attempts,
+                run_after=run_after or now,
+                created_at=now
+            )).inserted_primary_key[0]
+
+    def pending(self, kind):
+        """Id de un trabajo de ese tipo que todavía espera en la cola, o None."""
+        jobs = self.table.c
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(jobs.id).where(jobs.kind == kind, jobs.status == QUEUED).limit(1)
+            ).scalar()
+
+    def schedule(self, kind, payload=None, run_after=None):
+        """Encola un trabajo de ese tipo salvo que ya haya uno esperando; devuelve su id."""
+        return self.pending(kind) or self.enqueue(kind, payload, run_after=run_after)
+
+    def get(self, job_id):
+        with self.engine.connect() as conn:
+            row = conn.execute(select(self.table).where(self.table.c.id == job_id)).mappings().first()
+        return dict(row) if row else None
+
+    def report_progress(self, job_id, percent=None, message=None):
+        values = {'heartbeat_at': _now()}
+        if percent is not None:
+            values['progress'] = max(0, min(100, int(percent)))
+        if message is not None:
+            values['progress_message'] = message
+        with self.engine.begin() as conn:
+            conn.execute(update(self.table).where(self.table.c.id == job_id).values(**values))
+
+    def _requeue_stale(self, conn):
+        jobs = self.table.c
+        cutoff = _now() - timedelta(seconds=STALE_SECONDS)
+        stale = (jobs.status == RUNNING) & (jobs.heartbeat_at < cutoff)
+        conn.execute(update(self.table).where(stale, jobs.attempts >= jobs.max_attempts)
+                     .values(status=FAILED, error='El worker dejó de responder', finished_at=_now()))
+        conn.execute(update(self.table).where(stale)
+                     .values(status=QUEUED, error='El worker dejó de responder; se reintenta'))
+
+    def claim(self, worker_id):
+        """Toma el próximo trabajo listo y lo marca en curso; None si no hay."""
+        jobs = self.table.c
+        with self.engine.begin() as conn:
+            self._requeue_stale(conn)
+            now = _now()
+            job_id = conn.execute(
+                select(jobs.id)
+                .where(jobs.status == QUEUED, or_(jobs.run_after.is_(None), jobs.run_after <= now))
+                .order_by(jobs.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).scalar()
+            if job_id is None:
+                return None
+            row = conn.execute(
+                update(self.table)
+                .where(jobs.id == job_id, jobs.status == QUEUED)
+                .values(status=RUNNING, attempts=jobs.attempts + 1, locked_by=worker_id,
+                        started_at=now, heartbeat_at=now, error=None)
+                .returning(*self.table.c)
+            ).mappings().first()
+        return dict(row) if row else None
+
+    def _owned(self, job):
+        """Condición de que el trabajo siga tomado por el worker que lo corre.
+
+        Si se dio por perdido y otro worker lo volvió a tomar, el primero no
+        debe pisar su estado al terminar.
+        """
+        jobs = self.table.c
+        return (jobs.id == job['id']) & (jobs.status == RUNNING) & (jobs.locked_by == job['locked_by'])
+
+    def _heartbeat(self, engine, job, stop):
+        while not stop.wait(HEARTBEAT_SECONDS):
+            try:
+                with engine.begin() as conn:
+                    conn.execute(update(self.table).where(self._owned(job)).values(heartbeat_at=_now()))
+            except Exception as e:
+                log.warning('No se pudo renovar el heartbeat del trabajo %s: %s', job['id'], e)
+
+    def _finish(self, job, **values):
+        with self.engine.begin() as conn:
+            finished = conn.execute(update(self.table).where(self._owned(job))
+                                    .values(finished_at=_now(), locked_by=None, **values)).rowcount
+        if not finished:
+            log.warning('Trabajo %s (%s): otro worker lo tomó; no se registra este resultado',
+                        job['id'], job['kind'])
+
+    def run(self, job):
+        handler = self.handlers.get(job['kind'])
+        # El heartbeat no depende de que el handler llame a progress(): un
+        # trabajo largo sin avances no se da por perdido mientras corre
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(self.engine, job, stop),
+                                     name=f"job-heartbeat-{job['id']}", daemon=True)
+        heartbeat.start()
+        try:
+            if handler is None:
+                raise JobFailed(f"No hay handler para el trabajo {job['kind']}")
+            try:
+                result = handler(JobContext(self, job))
+            finally:
+                stop.set()
+                heartbeat.join()
+                if self.after_handler:
+                    self.after_handler()
+        except Exception as e:
+            final = isinstance(e, JobFailed) or job['attempts'] >= job['max_attempts']
+            log.warning('Trabajo %s (%s) falló en el intento %s: %s',
+                        job['id'], job['kind'], job['attempts'], e)
+            if final:
+                self._finish(job, status=FAILED, error=str(e) or traceback.format_exc())
+            else:
+                delay = RETRY_BASE_SECONDS * 2 ** (job['attempts'] - 1)
+                with self.engine.begin() as conn:
+                    conn.execute(update(self.table).where(self._owned(job)).values(
+                        status=QUEUED, locked_by=None, error=str(e),
+                        run_after=_now() + timedelta(seconds=delay)
+                    ))
+            return False
+        self._finish(job, status=SUCCEEDED, progress=100, result=result)
+        return True
+
+    def work(self, worker_id=None, poll_interval=POLL_INTERVAL, wrap=None, stop_when_idle=False):
+        """Bucle de un worker: toma trabajos y espera poll_interval si no hay."""
+        worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        while True:
+            job = self.claim(worker_id)
+            if job is None:
+                if stop_when_idle:
+                    return
+                time.sleep(poll_interval)
+                continue
+            if wrap is not None:
+                with wrap():
+                    self.run(job)
+            else:
+                self.run(job)
+
+
+def run_pool(queue, processes, on_start=None, **options):
+    """Levanta processes workers; cada uno abre sus propias conexiones."""
+    def target():
+        if on_start:
+            on_start()
+        queue.work(**options)
+
+    if processes <= 1:
+        return target()
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=target, daemon=True) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
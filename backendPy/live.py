@@ -0,0 +1,396 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import deque
+from datetime import date, datetime
+from urllib.parse import parse_qs, urlsplit
+
+from sqlalchemy import func, select, text
+
+log = logging.getLogger('ate.live')
+
+CHANNEL = 'ate_live'
+
+DEFAULT_HISTORY = 1000
+DEFAULT_HEARTBEAT_SECONDS = 15
+DEFAULT_POLL_SECONDS = 1
+# Un cliente que no lee (pestaña congelada, red caída) acumula en el buffer
+# del socket; pasado este límite se lo desconecta y al volver pide resync
+DEFAULT_MAX_BUFFER = 256 * 1024
+
+NOTIFY_SQL = text(
+    "SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"
+)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Valor no serializable: {value!r}')
+
+
+def encode(kind, row):
+    return json.dumps({'type': kind, **row}, default=_json_default, separators=(',', ':'))
+
+
+class LiveFeed:
+    """Novedades de stock y entregas para los clientes conectados por SSE.
+
+    Las rutas que escriben llaman a stock_changed() y delivered() antes del
+    commit. En Postgres se emite un NOTIFY por fila en la misma transacción:
+    se entrega sólo si la transacción confirma y en el orden de los commits.
+    Con otros motores no hace nada y el servidor de eventos (`flask
+    live-server`) consulta los cambios cada LIVE_POLL_SECONDS.
+    """
+
+    def __init__(self, benefits, deliveries, changes):
+        self.benefits = benefits
+        self.deliveries = deliveries
+        self.changes = changes
+
+    def stock_rows(self, conn, benefit_ids):
+        benefits = self.benefits
+        rows = conn.execute(
+            select(benefits.c.id.label('benefit_id'), benefits.c.stock, benefits.c.stock_rest,
+                   benefits.c.is_available)
+            .where(benefits.c.id.in_(benefit_ids))
+        )
+        return [row._asdict() for row in rows]
+
+    def delivery_rows(self, conn, where):
+        deliveries = self.deliveries
+        rows = conn.execute(
+            select(deliveries.c.delivery_id, deliveries.c.delegate_id, deliveries.c.affiliate_id,
+                   deliveries.c.child_id, deliveries.c.benefit_id, deliveries.c.quantity,
+                   deliveries.c.recipient_type, deliveries.c.delivery_date)
+            .where(where)
+            .order_by(deliveries.c.delivery_id)
+        )
+        return [row._asdict() for row in rows]
+
+    def _notify(self, session, payloads):
+        if payloads:
+            session.execute(NOTIFY_SQL, {'channel': CHANNEL, 'payloads': payloads})
+
+    def _enabled(self, session):
+        return session.get_bind().dialect.name == 'postgresql'
+
+    def stock_changed(self, session, benefit_ids):
+        """Avisa el stock actual de los beneficios (leído dentro de la transacción)."""
+        benefit_ids = list(set(benefit_ids))
+        if not benefit_ids or not self._enabled(session):
+            return
+        session.flush()
+        self._notify(session, [encode('stock', row)
+                               for row in self.stock_rows(session, benefit_ids)])
+
+    def delivered(self, session, delivery_ids):
+        """Avisa las entregas nuevas."""
+        delivery_ids = list(delivery_ids)
+        if not delivery_ids or not self._enabled(session):
+            return
+        session.flush()
+        rows = self.delivery_rows(session, self.deliveries.c.delivery_id.in_(delivery_ids))
+        self._notify(session, [encode('delivery', row) for row in rows])
+
+
+class LiveHub:
+    """Reparte cada evento a todos los clientes desde un único event loop.
+
+    Cada evento se arma una sola vez y se copia al buffer de escritura de cada
+    conexión sin esperar (no hay un hilo ni una tarea de envío por cliente).
+    Los últimos eventos quedan en memoria para reenviarlos a quien reconecta
+    con Last-Event-ID; si ese id ya no está (o es de otra ejecución del
+    servidor) el cliente recibe 'resync' y recarga el listado completo.
+    """
+
+    def __init__(self, history=DEFAULT_HISTORY, max_buffer=DEFAULT_MAX_BUFFER):
+        self.clients = set()
+        self.history = deque(maxlen=history)
+        self.max_buffer = max_buffer
+        self.boot = uuid.uuid4().hex[:8]
+        self.sequence = 0
+
+    def _send(self, writer, frame):
+        if writer.is_closing():
+            self.clients.discard(writer)
+            return
+        writer.write(frame)
+        if writer.transport.get_write_buffer_size() > self.max_buffer:
+            log.warning('Cliente de eventos demorado (%s bytes sin enviar): se desconecta',
+                        writer.transport.get_write_buffer_size())
+            self.clients.discard(writer)
+            writer.transport.abort()
+
+    def broadcast(self, frame):
+        for writer in list(self.clients):
+            self._send(writer, frame)
+
+    def publish(self, payload):
+        """payload es el JSON de LiveFeed ({"type": ..., ...})."""
+        try:
+            kind = json.loads(payload)['type']
+        except (ValueError, KeyError, TypeError):
+            log.warning('Evento inválido descartado: %r', payload)
+            return
+        self.sequence += 1
+        event_id = f'{self.boot}-{self.sequence}'
+        frame = f'id: {event_id}\nevent: {kind}\ndata: {payload}\n\n'.encode()
+        self.history.append((self.sequence, frame))
+        self.broadcast(frame)
+
+    def resync(self):
+        """Se pudieron perder eventos (reconexión a la base): todos recargan."""
+        self.broadcast(b'event: resync\ndata: {}\n\n')
+
+    def missed(self, last_event_id):
+        """Eventos posteriores a last_event_id, o None si no se pueden reponer."""
+        boot, _, sequence = (last_event_id or '').partition('-')
+        if boot != self.boot or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        if sequence >= self.sequence:
+            return []
+        if not self.history or self.history[0][0] > sequence + 1:
+            return None
+        return [frame for number, frame in self.history if number > sequence]
+
+    def attach(self, writer, last_event_id=None):
+        writer.write(b'retry: 3000\n\n')
+        if last_event_id:
+            frames = self.missed(last_event_id)
+            if frames is None:
+                writer.write(b'event: resync\ndata: {}\n\n')
+            else:
+                for frame in frames:
+                    writer.write(frame)
+        self.clients.add(writer)
+
+    def detach(self, writer):
+        self.clients.discard(writer)
+
+
+class PostgresSource:
+    """LISTEN ate_live en una conexión propia, leída desde el event loop."""
+
+    def __init__(self, engine, hub, retry_seconds=2):
+        self.engine = engine
+        self.hub = hub
+        self.retry_seconds = retry_seconds
+        self.conn = None
+
+    def _connect(self):
+        conn = self.engine.raw_connection()
+        dbapi = conn.driver_connection
+        conn.detach()  # no vuelve al pool: queda escuchando mientras viva el servidor
+        dbapi.rollback()
+        dbapi.autocommit = True
+        with dbapi.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        return dbapi
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        reconnecting = False
+        while True:
+            lost = loop.create_future()
+            try:
+                self.conn = await loop.run_in_executor(None, self._connect)
+            except Exception as e:
+                log.warning('No se pudo escuchar la base: %s', e)
+                await asyncio.sleep(self.retry_seconds)
+                reconnecting = True
+                continue
+            if reconnecting:
+                self.hub.resync()
+            fd = self.conn.fileno()
+            loop.add_reader(fd, self._on_readable, lost)
+            error = await lost
+            loop.remove_reader(fd)
+            log.warning('Conexión de eventos perdida: %s', error)
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            reconnecting = True
+            await asyncio.sleep(self.retry_seconds)
+
+    def _on_readable(self, lost):
+        try:
+            self.conn.poll()
+        except Exception as e:
+            if not lost.done():
+                lost.set_result(e)
+            return
+        while self.conn.notifies:
+            self.hub.publish(self.conn.notifies.pop(0).payload)
+
+
+class PollingSource:
+    """Para SQLite y desarrollo: consulta cambios de stock y entregas nuevas.
+
+    El stock sale de collection_changes (los triggers registran también los
+    descuentos hechos por UPDATE masivo o por trigger) y las entregas de los
+    delivery_id mayores al último visto.
+    """
+
+    def __init__(self, engine, hub, feed, interval=DEFAULT_POLL_SECONDS, prepare=None):
+        self.engine = engine
+        self.hub = hub
+        self.feed = feed
+        self.interval = interval
+        self.prepare = prepare
+        self.last_change = None
+        self.last_delivery = None
+
+    def fetch(self):
+        changes, deliveries = self.feed.changes, self.feed.deliveries
+        with self.engine.connect() as conn:
+            if self.last_change is None:
+                self.last_change = conn.execute(
+                    select(func.max(changes.c.id)).where(changes.c.collection == 'benefits')
+                ).scalar() or 0
+                self.last_delivery = conn.execute(
+                    select(func.max(deliveries.c.delivery_id))
+                ).scalar() or 0
+                return []
+            payloads = []
+            changed = conn.execute(
+                select(changes.c.id, changes.c.entity_id)
+                .where(changes.c.collection == 'benefits', changes.c.id > self.last_change)
+                .order_by(changes.c.id)
+            ).all()
+            if changed:
+                self.last_change = changed[-1].id
+                payloads += [encode('stock', row) for row in
+                             self.feed.stock_rows(conn, {row.entity_id for row in changed})]
+            for row in self.feed.delivery_rows(conn, deliveries.c.delivery_id > self.last_delivery):
+                self.last_delivery = row['delivery_id']
+                payloads.append(encode('delivery', row))
+            return payloads
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while self.prepare:
+            try:
+                await loop.run_in_executor(None, self.prepare)
+                break
+            except Exception as e:
+                log.warning('Error al preparar la base: %s', e)
+                await asyncio.sleep(self.interval)
+        while True:
+            try:
+                for payload in await loop.run_in_executor(None, self.fetch):
+                    self.hub.publish(payload)
+            except Exception as e:
+                log.warning('Error al consultar cambios: %s', e)
+            await asyncio.sleep(self.interval)
+
+
+def _response_head(status, headers):
+    lines = [f'HTTP/1.1 {status}'] + [f'{name}: {value}' for name, value in headers.items()]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode()
+
+
+class LiveServer:
+    """Servidor HTTP mínimo de GET /stream (text/event-stream) sobre asyncio."""
+
+    def __init__(self, hub, source, allowed_origins=(), heartbeat=DEFAULT_HEARTBEAT_SECONDS):
+        self.hub = hub
+        self.source = source
+        self.allowed_origins = set(allowed_origins)
+        self.heartbeat = heartbeat
+
+    def _cors(self, headers):
+        origin = headers.get('origin')
+        if origin and origin in self.allowed_origins:
+            return {'Access-Control-Allow-Origin': origin, 'Vary': 'Origin'}
+        return {}
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        except (ValueError, ConnectionError):
+            writer.close()
+            return
+
+        url = urlsplit(target)
+        cors = self._cors(headers)
+        if method == 'OPTIONS':
+            writer.write(_response_head('204 No Content', {
+                **cors, 'Access-Control-Allow-Headers': 'Last-Event-ID',
+                'Access-Control-Allow-Methods': 'GET', 'Content-Length': '0',
+                'Connection': 'close'}))
+            await writer.drain()
+            writer.close()
+            return
+        if method != 'GET' or url.path != '/stream':
+            body = json.dumps({'error': 'Recurso no encontrado'}).encode()
+            writer.write(_response_head('404 Not Found', {
+                **cors, 'Content-Type': 'application/json', 'Content-Length': str(len(body)),
+                'Connection': 'close'}) + body)
+            await writer.drain()
+            writer.close()
+            return
+
+        # EventSource no deja mandar encabezados propios: también se acepta ?last_event_id=
+        last_event_id = headers.get('last-event-id') or \
+            parse_qs(url.query).get('last_event_id', [None])[0]
+        writer.write(_response_head('200 OK', {
+            **cors,
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'X-Accel-Buffering': 'no',
+        }))
+        self.hub.attach(writer, last_event_id)
+        try:
+            # El cliente no manda nada más: esperar a que cierre
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.hub.detach(writer)
+            writer.close()
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            # Mantiene abiertas las conexiones detrás de proxies y detecta las muertas
+            self.hub.broadcast(b': ping\n\n')
+
+    async def serve(self, host, port, ready=None):
+        server = await asyncio.start_server(self.handle, host, port)
+        tasks = [asyncio.create_task(self.source.run()), asyncio.create_task(self._heartbeat())]
+        if ready:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def build_server(feed, engine, config, prepare=None):
+    """LiveServer con la fuente que corresponde al motor de la base."""
+    hub = LiveHub(history=config.get('LIVE_HISTORY', DEFAULT_HISTORY),
+                  max_buffer=config.get('LIVE_MAX_BUFFER', DEFAULT_MAX_BUFFER))
+    if engine.dialect.name == 'postgresql':
+        source = PostgresSource(engine, hub)
+    else:
+        source = PollingSource(engine, hub, feed,
+                               interval=config.get('LIVE_POLL_SECONDS', DEFAULT_POLL_SECONDS),
+                               prepare=prepare)
+    return LiveServer(hub, source, allowed_origins=config.get('LIVE_ALLOWED_ORIGINS', ()),
+                      heartbeat=config.get('LIVE_HEARTBEAT_SECONDS', DEFAULT_HEARTBEAT_SECONDS))
@@ -0,0 +1,121 @@
+import os
+import time
+
+from flask import Response, g, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.pool import Pool, QueuePool
+
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter,
+                                   Gauge, Histogram, generate_latest, multiprocess)
+except ImportError:  # pragma: no cover - dependencia opcional
+    multiprocess = None
+    Counter = None
+
+# Buckets pensados para una API JSON: de 5 ms a 10 s
+LATENCY_BUCKETS = (.005, .01, .025, .05, .075, .1, .25, .5, .75, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (.0005, .001, .005, .01, .025, .05, .1, .25, .5, 1.0, 5.0, 30.0)
+
+if Counter is not None:
+    REQUESTS = Counter(
+        'ate_http_requests_total', 'Requests HTTP atendidos',
+        ['method', 'route', 'status']
+    )
+    LATENCY = Histogram(
+        'ate_http_request_duration_seconds', 'Latencia de los requests HTTP',
+        ['method', 'route'], buckets=LATENCY_BUCKETS
+    )
+    POOL_WAIT = Histogram(
+        'ate_db_pool_checkout_wait_seconds', 'Espera para obtener una conexión del pool',
+        buckets=POOL_WAIT_BUCKETS
+    )
+    POOL_CHECKED_OUT = Gauge(
+        'ate_db_pool_checked_out', 'Conexiones del pool en uso',
+        multiprocess_mode='livesum'
+    )
+    CACHE_LOOKUPS = Counter(
+        'ate_cache_lookups_total', 'Consultas al cache de respuestas',
+        ['key', 'result']
+    )
+    POOL_SIZE = Gauge(
+        'ate_db_pool_size', 'Tamaño máximo del pool (pool_size + max_overflow)',
+        multiprocess_mode='livesum'
+    )
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout por una conexión libre."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - start)
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    POOL_CHECKED_OUT.inc()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    POOL_CHECKED_OUT.dec()
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+
+
+def _after_request(response):
+    start = g.get('metrics_start')
+    if start is None:
+        return response
+    route = request.url_rule.rule if request.url_rule else '<unmatched>'
+    REQUESTS.labels(request.method, route, str(response.status_code)).inc()
+    LATENCY.labels(request.method, route).observe(time.perf_counter() - start)
+    return response
+
+
+def metrics_view():
+    if Counter is None:
+        return jsonify({'error': 'prometheus_client no está instalado'}), 503
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        # Con varios workers de gunicorn cada proceso escribe su archivo y
+        # el request agrega todos los del directorio
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def engine_options():
+    """Opciones de engine que agregan la medición de espera del pool."""
+    return {'poolclass': TimedQueuePool} if Counter is not None else {}
+
+
+def set_pool_size(size):
+    if Counter is not None:
+        POOL_SIZE.set(size)
+
+
+def record_cache_lookup(key, hit):
+    if Counter is not None:
+        CACHE_LOOKUPS.labels(key, 'hit' if hit else 'miss').inc()
+
+
+def mark_process_dead(pid):
+    """Para el hook child_exit de gunicorn en modo multiproceso."""
+    if multiprocess is not None and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
+
+
+def init_metrics(app):
+    app.add_url_rule('/metrics', 'metrics', metrics_view, methods=['GET'])
+    if Counter is None:
+        return
+    if not event.contains(Pool, 'checkout', _on_checkout):
+        event.listen(Pool, 'checkout', _on_checkout)
+        event.listen(Pool, 'checkin', _on_checkin)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
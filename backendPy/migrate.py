@@ -0,0 +1,199 @@
+import importlib
+import pkgutil
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import Column, MetaData, String, Table, delete, insert, select, text
+
+import migrations
+from models import db
+
+# Misma tabla que usa Alembic: si más adelante se adopta Alembic, la base ya
+# queda en la revisión correcta sin tener que marcarla a mano
+version_table = Table('alembic_version', MetaData(),
+                      Column('version_num', String(32), primary_key=True))
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Operations:
+    """Lo que reciben upgrade(op) y downgrade(op) de cada revisión.
+
+    Los índices se crean con IF NOT EXISTS y las tablas con checkfirst, así
+    que aplicar una revisión sobre una base que ya tenía los cambios (por
+    ejemplo, porque se cargaron a mano) no falla.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.dialect = conn.dialect.name
+
+    @property
+    def is_postgres(self):
+        return self.dialect == 'postgresql'
+
+    def execute(self, sql, **params):
+        self.conn.execute(text(sql), params)
+
+    def create_table(self, table):
+        table.create(self.conn, checkfirst=True)
+
+    def drop_table(self, name):
+        self.execute(f'DROP TABLE IF EXISTS {name}')
+
+    def create_index(self, name, table, columns, unique=False, where=None, concurrently=False):
+        """CONCURRENTLY sólo se usa en PostgreSQL y exige una revisión no transaccional."""
+        concurrently = ' CONCURRENTLY' if concurrently and self.is_postgres else ''
+        sql = (f"CREATE {'UNIQUE ' if unique else ''}INDEX{concurrently} IF NOT EXISTS {name} "
+               f"ON {table} ({', '.join(columns)})")
+        if where:
+            sql += f' WHERE {where}'
+        self.execute(sql)
+
+    def drop_index(self, name, concurrently=False):
+        concurrently = ' CONCURRENTLY' if concurrently and self.is_postgres else ''
+        self.execute(f'DROP INDEX{concurrently} IF EXISTS {name}')
+
+
+def load_revisions():
+    """Revisiones de migrations/ en orden, siguiendo la cadena de down_revision."""
+    modules = [
+        importlib.import_module(f'migrations.{name}')
+        for _, name, _ in pkgutil.iter_modules(migrations.__path__)
+    ]
+    by_parent = {}
+    for module in modules:
+        if module.down_revision in by_parent:
+            raise MigrationError(f'Dos revisiones parten de {module.down_revision}: '
+                                 f'{by_parent[module.down_revision].revision} y {module.revision}')
+        by_parent[module.down_revision] = module
+
+    chain = []
+    parent = None
+    while parent in by_parent:
+        chain.append(by_parent[parent])
+        parent = chain[-1].revision
+    if len(chain) != len(modules):
+        raise MigrationError('Las revisiones de migrations/ no forman una única cadena')
+    return chain
+
+
+def current_revision(engine):
+    with engine.begin() as conn:
+        version_table.create(conn, checkfirst=True)
+        return conn.execute(select(version_table.c.version_num)).scalar()
+
+
+def _set_revision(engine, revision):
+    with engine.begin() as conn:
+        conn.execute(delete(version_table))
+        if revision is not None:
+            conn.execute(insert(version_table).values(version_num=revision))
+
+
+def _position(chain, revision):
+    if revision in (None, 'base'):
+        return 0
+    if revision == 'head':
+        return len(chain)
+    for index, module in enumerate(chain):
+        if module.revision == revision:
+            return index + 1
+    raise MigrationError(f'Revisión desconocida: {revision}')
+
+
+def _run(engine, module, step):
+    # Las revisiones con CREATE INDEX CONCURRENTLY no pueden ir en una transacción
+    if getattr(module, 'transactional', True):
+        with engine.begin() as conn:
+            step(Operations(conn))
+    else:
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            step(Operations(conn))
+
+
+def upgrade(engine, target='head', echo=print):
+    chain = load_revisions()
+    start = _position(chain, current_revision(engine))
+    end = _position(chain, target)
+    if end < start:
+        raise MigrationError(f'La base ya está en una revisión posterior a {target}')
+    for module in chain[start:end]:
+        echo(f'Aplicando {module.revision}: {(module.__doc__ or "").strip().splitlines()[0]}')
+        _run(engine, module, module.upgrade)
+        _set_revision(engine, module.revision)
+    return chain[end - 1].revision if end else None
+
+
+def downgrade(engine, target, echo=print):
+    chain = load_revisions()
+    start = _position(chain, current_revision(engine))
+    end = _position(chain, target)
+    if end > start:
+        raise MigrationError(f'La base está en una revisión anterior a {target}')
+    for module in reversed(chain[end:start]):
+        echo(f'Revirtiendo {module.revision}')
+        _run(engine, module, module.downgrade)
+        _set_revision(engine, module.down_revision)
+
+
+def stamp(engine, target):
+    """Marca la revisión sin ejecutar nada (bases creadas con los antiguos sql/)."""
+    chain = load_revisions()
+    end = _position(chain, target)
+    _set_revision(engine, chain[end - 1].revision if end else None)
+
+
+db_cli = AppGroup('db', help='Migraciones del esquema (ver migrations/).')
+
+
+@db_cli.command('upgrade')
+@click.argument('target', default='head')
+def upgrade_command(target):
+    """Aplica las revisiones pendientes hasta TARGET (por defecto la última)."""
+    try:
+        revision = upgrade(db.engine, target, echo=click.echo)
+    except MigrationError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'Base en la revisión {revision or "base"}')
+
+
+@db_cli.command('downgrade')
+@click.argument('target')
+def downgrade_command(target):
+    """Revierte revisiones hasta dejar la base en TARGET ('base' para todas)."""
+    try:
+        downgrade(db.engine, target, echo=click.echo)
+    except MigrationError as e:
+        raise click.ClickException(str(e))
+
+
+@db_cli.command('stamp')
+@click.argument('target')
+def stamp_command(target):
+    """Registra TARGET como revisión actual sin ejecutar migraciones."""
+    try:
+        stamp(db.engine, target)
+    except MigrationError as e:
+        raise click.ClickException(str(e))
+
+
+@db_cli.command('current')
+def current_command():
+    """Muestra la revisión aplicada."""
+    click.echo(current_revision(db.engine) or 'base')
+
+
+@db_cli.command('history')
+def history_command():
+    """Lista las revisiones en orden."""
+    current = current_revision(db.engine)
+    for module in load_revisions():
+        marker = ' (actual)' if module.revision == current else ''
+        click.echo(f'{module.revision}  {(module.__doc__ or "").strip().splitlines()[0]}{marker}')
+
+
+def init_app(app):
+    app.cli.add_command(db_cli)
@@ -0,0 +1,136 @@
+"""Esquema base: sectores, afiliados, hijos, delegados, beneficios y entregas
+
+Sobre una base existente sólo crea lo que falte. Reemplaza al DROP TABLE
+affiliate_history que se ejecutaba en cada arranque. El trigger que descontaba
+stock_rest al insertar en delegate_assignments era anterior a este
+repositorio: lo elimina 0013 y el descuento lo hace stock.reserve.
+"""
+from sqlalchemy import (Boolean, Column, Date, DateTime, ForeignKey, Integer, MetaData, String,
+                        Table, Text, func)
+
+revision = '0001'
+down_revision = None
+
+metadata = MetaData()
+
+sectors = Table(
+    'sectors', metadata,
+    Column('sector_id', Integer, primary_key=True),
+    Column('sector_name', String(100), nullable=False),
+)
+
+affiliates = Table(
+    'affiliates', metadata,
+    Column('id_associate', Integer, primary_key=True),
+    Column('affiliate_code', Integer, unique=True, nullable=False),
+    Column('affiliate_name', String(200), nullable=False),
+    Column('dni', String(20), unique=True, nullable=False),
+    Column('gender', String(1), nullable=False),
+    Column('contact', String(100)),
+    Column('sector_id', Integer, ForeignKey('sectors.sector_id')),
+    Column('has_children', Boolean),
+    Column('has_disability', Boolean),
+    Column('created_at', DateTime(timezone=True), server_default=func.now()),
+)
+
+children = Table(
+    'children', metadata,
+    Column('child_id', Integer, primary_key=True),
+    Column('affiliate_id', Integer, ForeignKey('affiliates.id_associate'), nullable=False),
+    Column('first_name', String(100), nullable=False),
+    Column('last_name', String(100), nullable=False),
+    Column('birth_date', Date, nullable=False),
+    Column('dni', String(20)),
+    Column('gender', String(1)),
+    Column('has_disability', Boolean),
+    Column('notes', Text),
+    Column('created_at', DateTime),
+)
+
+delegates = Table(
+    'delegates', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('first_name', String(100), nullable=False),
+    Column('last_name', String(100), nullable=False),
+    Column('dni', String(20), nullable=False, unique=True),
+    Column('sector_id', Integer, ForeignKey('sectors.sector_id'), nullable=False),
+    Column('is_active', Boolean),
+    Column('status', String(50)),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime(timezone=True), server_default=func.now()),
+)
+
+users = Table(
+    'users', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('username', String(50), unique=True, nullable=False),
+    Column('password_hash', String(255), nullable=False),
+    Column('role', String(20), nullable=False),
+    Column('is_active', Boolean),
+    Column('created_at', DateTime(timezone=True)),
+    Column('last_login', DateTime(timezone=True)),
+)
+
+benefits = Table(
+    'benefits', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('type', String(50), nullable=False),
+    Column('age_range', String(50)),
+    Column('stock', Integer),
+    Column('stock_rest', Integer),
+    Column('status', String(50)),
+    Column('is_available', Boolean),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+)
+
+events = Table(
+    'events', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('event_type', String(50), nullable=False),
+    Column('category', String(50)),
+    Column('description', Text),
+    Column('date', DateTime(timezone=True)),
+    Column('user', String(50)),
+    Column('entity_id', Integer),
+    Column('path', String(255)),
+)
+
+delegate_assignments = Table(
+    'delegate_assignments', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('benefit_id', Integer, ForeignKey('benefits.id')),
+    Column('delegate_id', Integer, ForeignKey('delegates.id')),
+    Column('quantity', Integer, nullable=False),
+    Column('assignment_date', DateTime, server_default=func.current_timestamp()),
+)
+
+benefit_deliveries = Table(
+    'benefit_deliveries', metadata,
+    Column('delivery_id', Integer, primary_key=True),
+    Column('delegate_id', Integer, ForeignKey('delegates.id')),
+    Column('affiliate_id', Integer, ForeignKey('affiliates.id_associate')),
+    Column('benefit_id', Integer, ForeignKey('benefits.id')),
+    Column('child_id', Integer, ForeignKey('children.child_id')),
+    Column('quantity', Integer, nullable=False, server_default='1'),
+    Column('delivery_date', DateTime(timezone=True), server_default=func.now()),
+    Column('notes', Text),
+    Column('status', String(50), server_default='Entregado'),
+    Column('recipient_type', String(50)),
+)
+
+
+def upgrade(op):
+    # Tabla del antiguo historial de afiliados, reemplazado por events
+    if op.is_postgres:
+        op.execute('DROP TABLE IF EXISTS affiliate_history CASCADE')
+    else:
+        op.drop_table('affiliate_history')
+    for table in metadata.sorted_tables:
+        op.create_table(table)
+
+
+def downgrade(op):
+    for table in reversed(metadata.sorted_tables):
+        op.drop_table(table.name)
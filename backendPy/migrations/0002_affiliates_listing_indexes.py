@@ -0,0 +1,22 @@
+"""Índices para el listado paginado de /afiliados (keyset sobre id_associate)"""
+
+revision = '0002'
+down_revision = '0001'
+
+transactional = False
+
+INDEXES = (
+    ('ix_affiliates_sector_id_id', ('sector_id', 'id_associate')),
+    ('ix_affiliates_created_at_id', ('created_at', 'id_associate')),
+    ('ix_affiliates_name_id', ('affiliate_name', 'id_associate')),
+)
+
+
+def upgrade(op):
+    for name, columns in INDEXES:
+        op.create_index(name, 'affiliates', columns, concurrently=True)
+
+
+def downgrade(op):
+    for name, _ in INDEXES:
+        op.drop_index(name, concurrently=True)
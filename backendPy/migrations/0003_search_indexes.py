@@ -0,0 +1,109 @@
+"""Búsqueda por nombre, DNI y código (/search) con pg_trgm y unaccent
+
+En SQLite (pruebas locales) crea en su lugar la tabla FTS5 search_fts, los
+triggers que la mantienen y la carga con las filas existentes.
+"""
+from sqlalchemy import text
+
+revision = '0003'
+down_revision = '0002'
+
+transactional = False
+
+# unaccent() no es IMMUTABLE; este contenedor permite usarla en índices
+UNACCENT_FUNCTION = """
+    CREATE OR REPLACE FUNCTION ate_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+"""
+
+INDEXES = (
+    ('ix_affiliates_name_trgm', 'affiliates',
+     'USING gin (ate_unaccent(lower(affiliate_name)) gin_trgm_ops)'),
+    ('ix_affiliates_dni_prefix', 'affiliates', '(dni text_pattern_ops)'),
+    ('ix_affiliates_code_prefix', 'affiliates', '((CAST(affiliate_code AS TEXT)) text_pattern_ops)'),
+    ('ix_delegates_name_trgm', 'delegates',
+     "USING gin (ate_unaccent(lower(first_name || ' ' || last_name)) gin_trgm_ops)"),
+    ('ix_delegates_dni_prefix', 'delegates', '(dni text_pattern_ops)'),
+    ('ix_children_name_trgm', 'children',
+     "USING gin (ate_unaccent(lower(first_name || ' ' || last_name)) gin_trgm_ops)"),
+    ('ix_children_dni_prefix', 'children', '(dni text_pattern_ops)'),
+)
+
+SQLITE_FTS_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+        type UNINDEXED, entity_id UNINDEXED, label, dni, code,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+"""
+
+# (tabla, clave, etiqueta, dni, código); {row} se reemplaza por "NEW." en los triggers
+SQLITE_SOURCES = {
+    'affiliate': ('affiliates', 'id_associate', '{row}affiliate_name', '{row}dni', '{row}affiliate_code'),
+    'delegate': ('delegates', 'id', "{row}first_name || ' ' || {row}last_name", '{row}dni', 'NULL'),
+    'child': ('children', 'child_id', "{row}first_name || ' ' || {row}last_name", '{row}dni', 'NULL'),
+}
+
+
+def _sqlite_columns(entity, row=''):
+    table, pk, label, dni, code = SQLITE_SOURCES[entity]
+    values = ', '.join(column.format(row=row) for column in (label, dni, code))
+    return f"'{entity}', {row}{pk}, {values}"
+
+
+def _sqlite_triggers():
+    statements = []
+    for entity, (table, pk, *_) in SQLITE_SOURCES.items():
+        insert_new = (f"INSERT INTO search_fts (type, entity_id, label, dni, code) "
+                      f"VALUES ({_sqlite_columns(entity, 'NEW.')});")
+        delete_old = f"DELETE FROM search_fts WHERE type = '{entity}' AND entity_id = OLD.{pk};"
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} "
+            f"BEGIN {insert_new} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE ON {table} "
+            f"BEGIN {delete_old} {insert_new} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} "
+            f"BEGIN {delete_old} END",
+        ]
+    return statements
+
+
+def upgrade_sqlite(op):
+    """Tabla FTS5 y triggers; la carga inicial sólo si la tabla no existía."""
+    exists = op.conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_fts'"
+    )).first()
+    op.execute(SQLITE_FTS_TABLE)
+    for statement in _sqlite_triggers():
+        op.execute(statement)
+    if not exists:
+        for entity, (table, *_) in SQLITE_SOURCES.items():
+            op.execute(f"INSERT INTO search_fts (type, entity_id, label, dni, code) "
+                       f"SELECT {_sqlite_columns(entity)} FROM {table}")
+
+
+def downgrade_sqlite(op):
+    for table, *_ in SQLITE_SOURCES.values():
+        for suffix in ('ai', 'au', 'ad'):
+            op.execute(f'DROP TRIGGER IF EXISTS {table}_search_{suffix}')
+    op.drop_table('search_fts')
+
+
+def upgrade(op):
+    if not op.is_postgres:
+        upgrade_sqlite(op)
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+    op.execute(UNACCENT_FUNCTION)
+    for name, table, definition in INDEXES:
+        op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}')
+
+
+def downgrade(op):
+    if not op.is_postgres:
+        downgrade_sqlite(op)
+        return
+    for name, _, _ in INDEXES:
+        op.drop_index(name, concurrently=True)
+    op.execute('DROP FUNCTION IF EXISTS ate_unaccent(text)')
@@ -0,0 +1,19 @@
+"""Clave natural de hijos para la importación del padrón (ON CONFLICT)
+
+Si hay duplicados previos la creación falla: depurarlos antes de aplicar.
+"""
+
+revision = '0004'
+down_revision = '0003'
+
+transactional = False
+
+
+def upgrade(op):
+    op.create_index('ux_children_affiliate_name_birth', 'children',
+                    ('affiliate_id', 'first_name', 'last_name', 'birth_date'),
+                    unique=True, concurrently=True)
+
+
+def downgrade(op):
+    op.drop_index('ux_children_affiliate_name_birth', concurrently=True)
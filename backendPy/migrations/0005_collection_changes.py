@@ -0,0 +1,70 @@
+"""Registro de cambios por colección para ETag y deltas (?since=)
+
+Los triggers de PostgreSQL escriben una fila por alta, modificación o baja;
+en SQLite los instala sync.py.
+"""
+from sqlalchemy import BigInteger, Column, DateTime, Integer, MetaData, String, Table, func
+
+revision = '0005'
+down_revision = '0004'
+
+metadata = MetaData()
+
+collection_changes = Table(
+    'collection_changes', metadata,
+    Column('id', BigInteger().with_variant(Integer, 'sqlite'), primary_key=True),
+    Column('collection', String(50), nullable=False),
+    Column('entity_id', Integer, nullable=False),
+    Column('op', String(10), nullable=False),
+    Column('changed_at', DateTime(timezone=True), server_default=func.now(), nullable=False),
+)
+
+# TG_ARGV[0] es el nombre de la columna clave de la tabla
+LOG_CHANGE_FUNCTION = """
+    CREATE OR REPLACE FUNCTION ate_log_change() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+    DECLARE
+        row_id integer;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            EXECUTE format('SELECT ($1).%I', TG_ARGV[0]) INTO row_id USING OLD;
+            INSERT INTO collection_changes (collection, entity_id, op) VALUES (TG_TABLE_NAME, row_id, 'delete');
+            RETURN OLD;
+        END IF;
+        EXECUTE format('SELECT ($1).%I', TG_ARGV[0]) INTO row_id USING NEW;
+        INSERT INTO collection_changes (collection, entity_id, op) VALUES (TG_TABLE_NAME, row_id, 'upsert');
+        RETURN NEW;
+    END $$
+"""
+
+COLLECTIONS = {
+    'affiliates': 'id_associate',
+    'children': 'child_id',
+    'delegates': 'id',
+    'sectors': 'sector_id',
+    'benefits': 'id',
+}
+
+
+def upgrade(op):
+    op.create_table(collection_changes)
+    op.create_index('ix_collection_changes_collection_id', 'collection_changes', ('collection', 'id'))
+    if not op.is_postgres:
+        return
+    op.execute(LOG_CHANGE_FUNCTION)
+    for table, key in COLLECTIONS.items():
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_log_change ON {table}')
+        op.execute(f'CREATE TRIGGER {table}_log_change AFTER INSERT OR UPDATE OR DELETE ON {table} '
+                   f"FOR EACH ROW EXECUTE FUNCTION ate_log_change('{key}')")
+
+
+def downgrade(op):
+    if op.is_postgres:
+        for table in COLLECTIONS:
+            op.execute(f'DROP TRIGGER IF EXISTS {table}_log_change ON {table}')
+        op.execute('DROP FUNCTION IF EXISTS ate_log_change()')
+    else:
+        for table in COLLECTIONS:
+            for event in ('insert', 'update', 'delete'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_log_{event}')
+    op.drop_table('collection_changes')
@@ -0,0 +1,20 @@
+"""Índices para GET /events: categoría y entidad con orden por id, y fechas"""
+
+revision = '0006'
+down_revision = '0005'
+
+INDEXES = (
+    ('ix_events_category_id', ('category', 'id')),
+    ('ix_events_category_entity_id', ('category', 'entity_id', 'id')),
+    ('ix_events_date', ('date',)),
+)
+
+
+def upgrade(op):
+    for name, columns in INDEXES:
+        op.create_index(name, 'events', columns)
+
+
+def downgrade(op):
+    for name, _ in INDEXES:
+        op.drop_index(name)
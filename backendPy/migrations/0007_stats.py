@@ -0,0 +1,124 @@
+"""Tablas resumen de /stats, mantenidas por triggers en entregas y asignaciones
+
+Carga inicial y conciliación: flask refresh-stats. En SQLite los triggers
+los instala stats.py.
+"""
+from sqlalchemy import Column, Date, DateTime, Integer, MetaData, String, Table
+
+revision = '0007'
+down_revision = '0006'
+
+metadata = MetaData()
+
+# sector_id y benefit_id valen 0 cuando la entrega no tiene sector o beneficio
+delivery_stats = Table(
+    'delivery_stats', metadata,
+    Column('month', Date, primary_key=True),
+    Column('sector_id', Integer, primary_key=True, autoincrement=False),
+    Column('benefit_id', Integer, primary_key=True, autoincrement=False),
+    Column('deliveries', Integer, nullable=False, server_default='0'),
+    Column('quantity', Integer, nullable=False, server_default='0'),
+)
+
+assignment_stats = Table(
+    'assignment_stats', metadata,
+    Column('benefit_id', Integer, primary_key=True, autoincrement=False),
+    Column('assignments', Integer, nullable=False, server_default='0'),
+    Column('quantity', Integer, nullable=False, server_default='0'),
+)
+
+child_age_stats = Table(
+    'child_age_stats', metadata,
+    Column('age_range', String(50), primary_key=True),
+    Column('children', Integer, nullable=False, server_default='0'),
+    Column('refreshed_at', DateTime(timezone=True), nullable=False),
+)
+
+FUNCTIONS = (
+    """
+    CREATE OR REPLACE FUNCTION ate_bump_delivery_stats(
+        delivered_at timestamptz, affiliate integer, child integer, benefit integer,
+        delta_deliveries integer, delta_quantity integer
+    ) RETURNS void LANGUAGE sql AS $$
+        INSERT INTO delivery_stats (month, sector_id, benefit_id, deliveries, quantity)
+        SELECT date_trunc('month', coalesce(delivered_at, now()))::date,
+               coalesce((SELECT a.sector_id FROM affiliates a
+                         WHERE a.id_associate = coalesce(
+                             affiliate, (SELECT c.affiliate_id FROM children c WHERE c.child_id = child))), 0),
+               coalesce(benefit, 0), delta_deliveries, delta_quantity
+        ON CONFLICT (month, sector_id, benefit_id) DO UPDATE
+        SET deliveries = delivery_stats.deliveries + EXCLUDED.deliveries,
+            quantity = delivery_stats.quantity + EXCLUDED.quantity;
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION ate_delivery_stats() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM ate_bump_delivery_stats(OLD.delivery_date, OLD.affiliate_id, OLD.child_id,
+                                            OLD.benefit_id, -1, -OLD.quantity);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM ate_bump_delivery_stats(NEW.delivery_date, NEW.affiliate_id, NEW.child_id,
+                                            NEW.benefit_id, 1, NEW.quantity);
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION ate_assignment_stats() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO assignment_stats (benefit_id, assignments, quantity)
+            VALUES (coalesce(OLD.benefit_id, 0), -1, -OLD.quantity)
+            ON CONFLICT (benefit_id) DO UPDATE
+            SET assignments = assignment_stats.assignments + EXCLUDED.assignments,
+                quantity = assignment_stats.quantity + EXCLUDED.quantity;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO assignment_stats (benefit_id, assignments, quantity)
+            VALUES (coalesce(NEW.benefit_id, 0), 1, NEW.quantity)
+            ON CONFLICT (benefit_id) DO UPDATE
+            SET assignments = assignment_stats.assignments + EXCLUDED.assignments,
+                quantity = assignment_stats.quantity + EXCLUDED.quantity;
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+)
+
+TRIGGERS = (
+    ('benefit_deliveries_stats', 'benefit_deliveries', 'ate_delivery_stats'),
+    ('delegate_assignments_stats', 'delegate_assignments', 'ate_assignment_stats'),
+)
+
+
+def upgrade(op):
+    for table in metadata.sorted_tables:
+        op.create_table(table)
+    op.create_index('ix_children_birth_date', 'children', ('birth_date',))
+    if not op.is_postgres:
+        return
+    for function in FUNCTIONS:
+        op.execute(function)
+    for name, table, function in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {name} ON {table}')
+        op.execute(f'CREATE TRIGGER {name} AFTER INSERT OR UPDATE OR DELETE ON {table} '
+                   f'FOR EACH ROW EXECUTE FUNCTION {function}()')
+
+
+def downgrade(op):
+    if op.is_postgres:
+        for name, table, _ in TRIGGERS:
+            op.execute(f'DROP TRIGGER IF EXISTS {name} ON {table}')
+        op.execute('DROP FUNCTION IF EXISTS ate_delivery_stats()')
+        op.execute('DROP FUNCTION IF EXISTS ate_assignment_stats()')
+        op.execute('DROP FUNCTION IF EXISTS ate_bump_delivery_stats('
+                   'timestamptz, integer, integer, integer, integer, integer)')
+    else:
+        for _, table, _ in TRIGGERS:
+            for event in ('insert', 'update', 'delete'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_stats_{event}')
+    op.drop_index('ix_children_birth_date')
+    for table in reversed(metadata.sorted_tables):
+        op.drop_table(table.name)
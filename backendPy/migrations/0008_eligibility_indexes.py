@@ -0,0 +1,24 @@
+"""Índices para GET /benefits/<id>/eligible (NOT EXISTS por beneficio y destinatario)
+
+El rango de fechas de nacimiento usa ix_children_birth_date (0007).
+"""
+
+revision = '0008'
+down_revision = '0007'
+
+transactional = False
+
+INDEXES = (
+    ('ix_benefit_deliveries_benefit_child', ('benefit_id', 'child_id')),
+    ('ix_benefit_deliveries_benefit_affiliate', ('benefit_id', 'affiliate_id')),
+)
+
+
+def upgrade(op):
+    for name, columns in INDEXES:
+        op.create_index(name, 'benefit_deliveries', columns, concurrently=True)
+
+
+def downgrade(op):
+    for name, _ in INDEXES:
+        op.drop_index(name, concurrently=True)
@@ -0,0 +1,42 @@
+"""Cola de trabajos en segundo plano (jobs.py)
+
+Los workers toman trabajos con SELECT ... FOR UPDATE SKIP LOCKED sobre el
+índice parcial de pendientes.
+"""
+from sqlalchemy import (JSON, BigInteger, Column, DateTime, Integer, MetaData, String, Table, Text,
+                        func)
+
+revision = '0009'
+down_revision = '0008'
+
+metadata = MetaData()
+
+jobs = Table(
+    'jobs', metadata,
+    Column('id', BigInteger().with_variant(Integer, 'sqlite'), primary_key=True),
+    Column('kind', String(50), nullable=False),
+    Column('status', String(20), nullable=False, server_default='queued'),
+    Column('payload', JSON),
+    Column('result', JSON),
+    Column('error', Text),
+    Column('progress', Integer),
+    Column('progress_message', String(255)),
+    Column('attempts', Integer, nullable=False, server_default='0'),
+    Column('max_attempts', Integer, nullable=False, server_default='3'),
+    Column('run_after', DateTime(timezone=True)),
+    Column('locked_by', String(100)),
+    Column('heartbeat_at', DateTime(timezone=True)),
+    Column('created_at', DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column('started_at', DateTime(timezone=True)),
+    Column('finished_at', DateTime(timezone=True)),
+)
+
+
+def upgrade(op):
+    op.create_table(jobs)
+    op.create_index('ix_jobs_status_run_after', 'jobs', ('status', 'run_after', 'id'))
+    op.create_index('ix_jobs_queued', 'jobs', ('run_after', 'id'), where="status = 'queued'")
+
+
+def downgrade(op):
+    op.drop_table('jobs')
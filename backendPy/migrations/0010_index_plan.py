@@ -0,0 +1,56 @@
+"""Índices de claves foráneas, índices parciales y controles de cantidad
+
+Los filtros por delegado, afiliado o hijo de entregas y asignaciones (y los
+chequeos de FK al borrar un delegado, beneficio o hijo) dejan de recorrer la
+tabla completa. Ya estaban cubiertos y no se duplican: children.affiliate_id
+por ux_children_affiliate_name_birth (0004), benefit_deliveries.benefit_id por
+ix_benefit_deliveries_benefit_child (0008) y delegates.dni por su UNIQUE.
+scripts/explain_check.py verifica con EXPLAIN que cada consulta los use.
+
+Los CHECK se agregan NOT VALID y se validan aparte, así no bloquean
+escrituras mientras se revisan las filas existentes. SQLite no admite
+agregar restricciones a una tabla existente: ahí sólo se crean los índices.
+"""
+
+revision = '0010'
+down_revision = '0009'
+
+transactional = False
+
+INDEXES = (
+    ('ix_benefit_deliveries_delegate_id', 'benefit_deliveries', ('delegate_id', 'delivery_id'), None),
+    ('ix_benefit_deliveries_affiliate_id', 'benefit_deliveries', ('affiliate_id', 'delivery_id'), None),
+    ('ix_benefit_deliveries_child_id', 'benefit_deliveries', ('child_id',), None),
+    ('ix_delegate_assignments_delegate_id', 'delegate_assignments', ('delegate_id', 'id'), None),
+    ('ix_delegate_assignments_benefit_id', 'delegate_assignments', ('benefit_id', 'id'), None),
+    # Parciales sobre una columna booleana: GET /delegates?sector_id=&is_active=true
+    # y GET /benefits?is_available=true
+    ('ix_delegates_active_sector', 'delegates', ('sector_id', 'id'), 'is_active'),
+    ('ix_benefits_available', 'benefits', ('id',), 'is_available'),
+)
+
+CHECKS = (
+    ('ck_benefit_deliveries_quantity_positive', 'benefit_deliveries', 'quantity > 0'),
+    ('ck_delegate_assignments_quantity_positive', 'delegate_assignments', 'quantity > 0'),
+)
+
+
+def upgrade(op):
+    for name, table, columns, flag in INDEXES:
+        # SQLAlchemy escribe el filtro como `is_active` en PostgreSQL y como
+        # `is_active = 1` en SQLite; el predicado tiene que coincidir tal cual
+        where = None if flag is None else flag if op.is_postgres else f'{flag} = 1'
+        op.create_index(name, table, columns, where=where, concurrently=True)
+    if op.is_postgres:
+        for name, table, condition in CHECKS:
+            op.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}')
+            op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} CHECK ({condition}) NOT VALID')
+            op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {name}')
+
+
+def downgrade(op):
+    if op.is_postgres:
+        for name, table, _ in CHECKS:
+            op.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}')
+    for name, _, _, _ in INDEXES:
+        op.drop_index(name, concurrently=True)
@@ -0,0 +1,45 @@
+"""Saldo de cada delegado por beneficio (balances.py)
+
+Se actualiza en la misma transacción que las asignaciones y entregas; la
+carga inicial sale de la historia. Conciliación: trabajo reconcile_balances.
+"""
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, func
+
+revision = '0011'
+down_revision = '0010'
+
+metadata = MetaData()
+
+delegate_balances = Table(
+    'delegate_balances', metadata,
+    Column('delegate_id', Integer, primary_key=True, autoincrement=False),
+    Column('benefit_id', Integer, primary_key=True, autoincrement=False),
+    Column('assigned', Integer, nullable=False, server_default='0'),
+    Column('delivered', Integer, nullable=False, server_default='0'),
+    Column('updated_at', DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+
+BACKFILL = """
+    INSERT INTO delegate_balances (delegate_id, benefit_id, assigned, delivered)
+    SELECT delegate_id, benefit_id, sum(assigned), sum(delivered)
+    FROM (
+        SELECT delegate_id, benefit_id, quantity AS assigned, 0 AS delivered
+        FROM delegate_assignments
+        WHERE delegate_id IS NOT NULL AND benefit_id IS NOT NULL
+        UNION ALL
+        SELECT delegate_id, benefit_id, 0, quantity
+        FROM benefit_deliveries
+        WHERE delegate_id IS NOT NULL AND benefit_id IS NOT NULL
+    ) AS movements
+    GROUP BY delegate_id, benefit_id
+"""
+
+
+def upgrade(op):
+    op.create_table(delegate_balances)
+    op.create_index('ix_delegate_balances_benefit_id', 'delegate_balances', ('benefit_id',))
+    op.execute(BACKFILL)
+
+
+def downgrade(op):
+    op.drop_table('delegate_balances')
@@ -0,0 +1,131 @@
+"""Particiones mensuales de benefit_deliveries y registro de archivado (partitions.py)
+
+En PostgreSQL la tabla se reemplaza por una particionada por rango de
+delivery_date: se crea la nueva (clave primaria delivery_id + delivery_date,
+como exige el particionado), una partición por mes desde la primera entrega
+hasta DEFAULT_MONTHS_AHEAD meses adelante y una default para fechas fuera
+de rango; se copian las filas y se recrean índices y el trigger de
+delivery_stats. La secuencia de delivery_id pasa a la tabla nueva. Toma un
+lock exclusivo durante la copia: conviene correrla en una ventana sin uso.
+
+SQLite no tiene particiones: sólo se crean las tablas de archivado.
+"""
+from datetime import date
+
+from sqlalchemy import Column, Date, DateTime, Integer, MetaData, String, Table, func
+
+revision = '0012'
+down_revision = '0011'
+
+DEFAULT_MONTHS_AHEAD = 3
+
+metadata = MetaData()
+
+delivery_archives = Table(
+    'delivery_archives', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('month', Date, nullable=False, unique=True),
+    Column('partition_name', String(63), nullable=False),
+    Column('row_count', Integer, nullable=False),
+    Column('quantity', Integer, nullable=False),
+    Column('file', String(255), nullable=False),
+    Column('archived_at', DateTime(timezone=True), nullable=False, server_default=func.now()),
+)
+
+delivery_archive_totals = Table(
+    'delivery_archive_totals', metadata,
+    Column('delegate_id', Integer, primary_key=True, autoincrement=False),
+    Column('benefit_id', Integer, primary_key=True, autoincrement=False),
+    Column('delivered', Integer, nullable=False, server_default='0'),
+)
+
+COLUMNS = """
+    delivery_id integer NOT NULL DEFAULT nextval('benefit_deliveries_delivery_id_seq'),
+    delegate_id integer REFERENCES delegates (id),
+    affiliate_id integer REFERENCES affiliates (id_associate),
+    benefit_id integer REFERENCES benefits (id),
+    child_id integer REFERENCES children (child_id),
+    quantity integer NOT NULL DEFAULT 1,
+    delivery_date timestamptz NOT NULL DEFAULT now(),
+    notes text,
+    status varchar(50) DEFAULT 'Entregado',
+    recipient_type varchar(50),
+    CONSTRAINT ck_benefit_deliveries_quantity_positive CHECK (quantity > 0)
+"""
+
+COLUMN_NAMES = ('delivery_id, delegate_id, affiliate_id, benefit_id, child_id, quantity, '
+                'delivery_date, notes, status, recipient_type')
+
+# Índices de 0008 y 0010; sobre la tabla particionada se crean en cada partición
+INDEXES = (
+    ('ix_benefit_deliveries_benefit_child', ('benefit_id', 'child_id')),
+    ('ix_benefit_deliveries_benefit_affiliate', ('benefit_id', 'affiliate_id')),
+    ('ix_benefit_deliveries_delegate_id', ('delegate_id', 'delivery_id')),
+    ('ix_benefit_deliveries_affiliate_id', ('affiliate_id', 'delivery_id')),
+    ('ix_benefit_deliveries_child_id', ('child_id',)),
+)
+
+STATS_TRIGGER = ('CREATE TRIGGER benefit_deliveries_stats AFTER INSERT OR UPDATE OR DELETE '
+                 'ON benefit_deliveries FOR EACH ROW EXECUTE FUNCTION ate_delivery_stats()')
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _swap(op, create):
+    """Reemplaza benefit_deliveries por la tabla que arma create(op), con las mismas filas."""
+    op.execute('LOCK TABLE benefit_deliveries IN ACCESS EXCLUSIVE MODE')
+    op.execute('ALTER TABLE benefit_deliveries RENAME TO benefit_deliveries_old')
+    op.execute('ALTER TABLE benefit_deliveries_old RENAME CONSTRAINT benefit_deliveries_pkey '
+               'TO benefit_deliveries_old_pkey')
+    for name, _ in INDEXES:
+        op.drop_index(name)
+    create(op)
+    op.execute('ALTER SEQUENCE benefit_deliveries_delivery_id_seq OWNED BY benefit_deliveries.delivery_id')
+    op.execute(f'INSERT INTO benefit_deliveries ({COLUMN_NAMES}) '
+               f'SELECT delivery_id, delegate_id, affiliate_id, benefit_id, child_id, quantity, '
+               f'coalesce(delivery_date, now()), notes, status, recipient_type '
+               f'FROM benefit_deliveries_old')
+    # El trigger de delivery_stats de la tabla vieja se va con ella: las filas
+    # copiadas no se vuelven a contar porque el trigger nuevo se crea después
+    op.execute('DROP TABLE benefit_deliveries_old')
+    for name, columns in INDEXES:
+        op.create_index(name, 'benefit_deliveries', columns)
+    op.execute(STATS_TRIGGER)
+
+
+def _create_partitioned(op):
+    op.execute(f'CREATE TABLE benefit_deliveries ({COLUMNS}, PRIMARY KEY (delivery_id, delivery_date)) '
+               f'PARTITION BY RANGE (delivery_date)')
+    op.execute('CREATE TABLE benefit_deliveries_default PARTITION OF benefit_deliveries DEFAULT')
+    first = op.conn.exec_driver_sql(
+        "SELECT date_trunc('month', min(delivery_date))::date FROM benefit_deliveries_old"
+    ).scalar()
+    current = date.today().replace(day=1)
+    month = min(first or current, current)
+    while month <= _add_months(current, DEFAULT_MONTHS_AHEAD):
+        upper = _add_months(month, 1)
+        op.execute(f"CREATE TABLE benefit_deliveries_{month:%Y_%m} PARTITION OF benefit_deliveries "
+                   f"FOR VALUES FROM ('{month}') TO ('{upper}')")
+        month = upper
+
+
+def _create_plain(op):
+    op.execute(f'CREATE TABLE benefit_deliveries ({COLUMNS}, PRIMARY KEY (delivery_id))')
+
+
+def upgrade(op):
+    for table in metadata.sorted_tables:
+        op.create_table(table)
+    if op.is_postgres:
+        _swap(op, _create_partitioned)
+
+
+def downgrade(op):
+    # Las particiones ya archivadas no vuelven: sus filas están en los archivos
+    if op.is_postgres:
+        _swap(op, _create_plain)
+    for table in reversed(metadata.sorted_tables):
+        op.drop_table(table.name)
@@ -0,0 +1,55 @@
+"""El descuento de stock_rest por asignación pasa al código (stock.reserve)
+
+Las bases de producción traían, de antes de este repositorio, un trigger en
+delegate_assignments que descontaba benefits.stock_rest; las creadas con
+estas migraciones no lo tenían, así que el stock se comportaba distinto
+según la base. Ahora la ruta de asignaciones descuenta con un UPDATE
+condicional y este trigger se elimina donde exista. Como su nombre no se
+conoce, se buscan los triggers de delegate_assignments cuya función toca
+stock_rest. El downgrade vuelve a crear uno equivalente.
+"""
+
+revision = '0013'
+down_revision = '0012'
+
+# Triggers heredados: los de usuario sobre delegate_assignments que tocan stock_rest
+LEGACY_TRIGGERS_PG = """
+    SELECT t.tgname FROM pg_trigger t JOIN pg_proc p ON p.oid = t.tgfoid
+    WHERE t.tgrelid = to_regclass('delegate_assignments') AND NOT t.tgisinternal
+      AND p.prosrc ILIKE '%stock_rest%'
+"""
+LEGACY_TRIGGERS_SQLITE = """
+    SELECT name FROM sqlite_master
+    WHERE type = 'trigger' AND tbl_name = 'delegate_assignments' AND sql LIKE '%stock_rest%'
+"""
+
+ASSIGNMENT_STOCK_FUNCTION = """
+    CREATE OR REPLACE FUNCTION ate_assignment_stock() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        UPDATE benefits SET stock_rest = stock_rest - NEW.quantity WHERE id = NEW.benefit_id;
+        RETURN NULL;
+    END $$
+"""
+
+
+def upgrade(op):
+    query = LEGACY_TRIGGERS_PG if op.is_postgres else LEGACY_TRIGGERS_SQLITE
+    names = [row[0] for row in op.conn.exec_driver_sql(query)]
+    for name in names:
+        if op.is_postgres:
+            op.execute(f'DROP TRIGGER IF EXISTS "{name}" ON delegate_assignments')
+        else:
+            op.execute(f'DROP TRIGGER IF EXISTS "{name}"')
+
+
+def downgrade(op):
+    if op.is_postgres:
+        op.execute(ASSIGNMENT_STOCK_FUNCTION)
+        op.execute('DROP TRIGGER IF EXISTS delegate_assignments_stock ON delegate_assignments')
+        op.execute('CREATE TRIGGER delegate_assignments_stock AFTER INSERT ON delegate_assignments '
+                   'FOR EACH ROW EXECUTE FUNCTION ate_assignment_stock()')
+    else:
+        op.execute('CREATE TRIGGER IF NOT EXISTS delegate_assignments_stock '
+                   'AFTER INSERT ON delegate_assignments BEGIN '
+                   'UPDATE benefits SET stock_rest = stock_rest - NEW.quantity '
+                   'WHERE id = NEW.benefit_id; END')
@@ -0,0 +1,42 @@
+"""Destinatarios de las entregas archivadas (partitions.py)
+
+Al archivar un mes se borran sus entregas y delivery_archive_totals sólo
+guarda lo entregado por delegado. Acá queda quién recibió cada beneficio
+(benefit_id, affiliate_id, child_id) para que la elegibilidad y las fichas
+no vuelvan a ofrecerlo. Los meses archivados antes de esta revisión no
+figuran: sus entregas sólo están en los archivos de ARCHIVE_DIR.
+"""
+from sqlalchemy import BigInteger, Column, Date, Integer, MetaData, Table
+
+revision = '0014'
+down_revision = '0013'
+
+metadata = MetaData()
+
+delivery_archive_recipients = Table(
+    'delivery_archive_recipients', metadata,
+    Column('id', BigInteger().with_variant(Integer, 'sqlite'), primary_key=True),
+    Column('month', Date, nullable=False),
+    Column('benefit_id', Integer, nullable=False),
+    Column('affiliate_id', Integer),
+    Column('child_id', Integer),
+)
+
+# Los mismos accesos que las entregas: NOT EXISTS por beneficio y
+# destinatario (0008) y fichas por afiliado o hijo
+INDEXES = (
+    ('ix_delivery_archive_recipients_benefit_child', ('benefit_id', 'child_id')),
+    ('ix_delivery_archive_recipients_benefit_affiliate', ('benefit_id', 'affiliate_id')),
+    ('ix_delivery_archive_recipients_affiliate_id', ('affiliate_id',)),
+    ('ix_delivery_archive_recipients_child_id', ('child_id',)),
+)
+
+
+def upgrade(op):
+    op.create_table(delivery_archive_recipients)
+    for name, columns in INDEXES:
+        op.create_index(name, 'delivery_archive_recipients', columns)
+
+
+def downgrade(op):
+    op.drop_table('delivery_archive_recipients')
@@ -0,0 +1,27 @@
+"""Versión mínima de cada colección tras podar collection_changes (sync.py)
+
+ChangeLog.prune() borra los cambios viejos y deja acá hasta qué versión y
+fecha se borraron: un ?since= anterior ya no se puede responder como delta
+y recibe 410 (el cliente recarga la colección completa).
+"""
+from sqlalchemy import BigInteger, Column, DateTime, Integer, MetaData, String, Table
+
+revision = '0015'
+down_revision = '0014'
+
+metadata = MetaData()
+
+collection_change_floors = Table(
+    'collection_change_floors', metadata,
+    Column('collection', String(50), primary_key=True),
+    Column('version', BigInteger().with_variant(Integer, 'sqlite'), nullable=False),
+    Column('pruned_before', DateTime(timezone=True), nullable=False),
+)
+
+
+def upgrade(op):
+    op.create_table(collection_change_floors)
+
+
+def downgrade(op):
+    op.drop_table('collection_change_floors')
@@ -0,0 +1,23 @@
+"""Tabla FTS5 de búsqueda en bases SQLite migradas antes de que 0003 la creara
+
+Antes search.py la creaba en la primera búsqueda; ahora la crea la
+migración 0003. Las bases SQLite que ya habían pasado esa revisión la
+reciben acá (si ya existía sólo se completan los triggers). En PostgreSQL
+no hace nada.
+"""
+import importlib
+
+revision = '0016'
+down_revision = '0015'
+
+search_indexes = importlib.import_module('migrations.0003_search_indexes')
+
+
+def upgrade(op):
+    if not op.is_postgres:
+        search_indexes.upgrade_sqlite(op)
+
+
+def downgrade(op):
+    # La tabla es de 0003: su downgrade la elimina
+    pass
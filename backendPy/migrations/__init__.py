@@ -0,0 +1,11 @@
+"""Revisiones del esquema, aplicadas con `flask db upgrade` (ver migrate.py).
+
+Cada módulo NNNN_nombre.py define revision, down_revision, upgrade(op) y
+downgrade(op), con el mismo formato que Alembic. Las tablas se describen
+dentro de la revisión (no se importan de models.py) para que una revisión
+vieja siga creando lo mismo aunque el modelo cambie después. transactional =
+False corre la revisión fuera de una transacción (CREATE INDEX CONCURRENTLY).
+
+Los triggers de PostgreSQL viven acá; en SQLite (desarrollo) sync.py,
+stats.py y search.py instalan sus equivalentes la primera vez que se usan.
+"""
@@ -1,35 +1,51 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import relationship
 from datetime import datetime
 
-db = SQLAlchemy()
+from replicas import RoutingSession
 
+# Única metadata de la aplicación: create_app() la asocia con db.init_app()
+# y las migraciones (migrations/) crean el esquema que describe. Las lecturas
+# de los GET pueden ir a una réplica (ver replicas.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# Definición del modelo Sector
 class Sector(db.Model):
     __tablename__ = 'sectors'
+
     sector_id = db.Column(db.Integer, primary_key=True)
-    sector_name = db.Column(db.String(50), nullable=False, unique=True)
-    sector_code = db.Column(db.String(12), nullable=False, unique=True)
-    created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
-    
+    sector_name = db.Column(db.String(100), nullable=False)
+
     def to_dict(self):
         return {
-            'id': self.sector_id,
-            'name': self.sector_name,
-            'code': self.sector_code
+            'sector_id': self.sector_id,
+            'sector_name': self.sector_name
         }
 
-class Affiliate(db.Model):
+# Definición del modelo Afiliado
+class Afiliado(db.Model):
     __tablename__ = 'affiliates'
-    
+
     id_associate = db.Column(db.Integer, primary_key=True)
-    affiliate_code = db.Column(db.Integer, unique=True)
+    affiliate_code = db.Column(db.Integer, unique=True, nullable=False)
     affiliate_name = db.Column(db.String(200), nullable=False)
-    dni = db.Column(db.String(20), nullable=False, unique=True)
+    dni = db.Column(db.String(20), unique=True, nullable=False)
     gender = db.Column(db.String(1), nullable=False)
     contact = db.Column(db.String(100))
     sector_id = db.Column(db.Integer, db.ForeignKey('sectors.sector_id'))
     has_children = db.Column(db.Boolean, default=False)
     has_disability = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow)
+    created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
+
+    # Índices para el listado paginado: filtro/orden + id_associate como desempate
+    __table_args__ = (
+        db.Index('ix_affiliates_sector_id_id', 'sector_id', 'id_associate'),
+        db.Index('ix_affiliates_created_at_id', 'created_at', 'id_associate'),
+        db.Index('ix_affiliates_name_id', 'affiliate_name', 'id_associate'),
+    )
+
+    def __repr__(self):
+        return f'<Afiliado {self.affiliate_code}>'
 
     def to_dict(self):
         return {
@@ -45,39 +61,65 @@ class Affiliate(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+# Definición del modelo Child
 class Child(db.Model):
     __tablename__ = 'children'
-    
+
     child_id = db.Column(db.Integer, primary_key=True)
-    first_name = db.Column(db.String(50), nullable=False)
-    last_name = db.Column(db.String(50), nullable=False)
-    birth_date = db.Column(db.Date)
+    affiliate_id = db.Column(db.Integer, db.ForeignKey('affiliates.id_associate'), nullable=False)
+    first_name = db.Column(db.String(100), nullable=False)
+    last_name = db.Column(db.String(100), nullable=False)
+    birth_date = db.Column(db.Date, nullable=False)
     dni = db.Column(db.String(20))
-    affiliate_id = db.Column(db.Integer, db.ForeignKey('affiliates.id_associate'))
+    gender = db.Column(db.String(1))
+    has_disability = db.Column(db.Boolean, default=False)
+    notes = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    affiliate = relationship("Afiliado", backref="children")
+
+    # Clave natural usada por la importación del padrón; birth_date para los
+    # conteos por rango de edad
+    __table_args__ = (
+        db.Index('ux_children_affiliate_name_birth', 'affiliate_id', 'first_name', 'last_name',
+                 'birth_date', unique=True),
+        db.Index('ix_children_birth_date', 'birth_date'),
+    )
 
     def to_dict(self):
         return {
             'child_id': self.child_id,
+            'affiliate_id': self.affiliate_id,
             'first_name': self.first_name,
             'last_name': self.last_name,
             'birth_date': self.birth_date.isoformat() if self.birth_date else None,
             'dni': self.dni,
-            'affiliate_id': self.affiliate_id
+            'gender': self.gender,
+            'has_disability': self.has_disability,
+            'notes': self.notes,
+            'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+# Definición del modelo Delegate
 class Delegate(db.Model):
     __tablename__ = 'delegates'
-    
+
     id = db.Column(db.Integer, primary_key=True)
-    first_name = db.Column(db.String(50), nullable=False)
-    last_name = db.Column(db.String(50), nullable=False)
-    dni = db.Column(db.String(20))
-    sector_id = db.Column(db.Integer, db.ForeignKey('sectors.sector_id'))
+    first_name = db.Column(db.String(100), nullable=False)
+    last_name = db.Column(db.String(100), nullable=False)
+    dni = db.Column(db.String(20), nullable=False, unique=True)
+    sector_id = db.Column(db.Integer, db.ForeignKey('sectors.sector_id'), nullable=False)
     is_active = db.Column(db.Boolean, default=True)
     status = db.Column(db.String(50), default='Activo')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), onupdate=db.func.now())
 
+    # Listado de delegados activos por sector (índice parcial, ver migración 0010)
+    __table_args__ = (
+        db.Index('ix_delegates_active_sector', 'sector_id', 'id',
+                 postgresql_where=db.text('is_active'), sqlite_where=db.text('is_active = 1')),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -93,7 +135,7 @@ class Delegate(db.Model):
 
 class User(db.Model):
     __tablename__ = 'users'
-    
+
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
@@ -111,19 +153,28 @@ class User(db.Model):
             'last_login': self.last_login.isoformat() if self.last_login else None
         }
 
+# Definición del modelo Benefit; stock_rest lo descuentan las asignaciones
+# (ver stock.py)
 class Benefit(db.Model):
     __tablename__ = 'benefits'
-    
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     type = db.Column(db.String(50), nullable=False)
     age_range = db.Column(db.String(50))
     stock = db.Column(db.Integer, default=0)
+    stock_rest = db.Column(db.Integer, default=0)
     status = db.Column(db.String(50), default='Disponible')
     is_available = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Beneficios vigentes: pocos frente al histórico de beneficios ya cerrados
+    __table_args__ = (
+        db.Index('ix_benefits_available', 'id',
+                 postgresql_where=db.text('is_available'), sqlite_where=db.text('is_available = 1')),
+    )
+
     def __repr__(self):
         return f'<Benefit {self.name}>'
 
@@ -134,6 +185,7 @@ class Benefit(db.Model):
             'type': self.type,
             'age_range': self.age_range,
             'stock': self.stock,
+            'stock_rest': self.stock_rest,
             'status': self.status,
             'is_available': self.is_available,
             'created_at': self.created_at.isoformat() if self.created_at else None,
@@ -142,7 +194,7 @@ class Benefit(db.Model):
 
 class Event(db.Model):
     __tablename__ = 'events'
-    
+
     id = db.Column(db.Integer, primary_key=True)
     event_type = db.Column(db.String(50), nullable=False)
     category = db.Column(db.String(50))
@@ -152,6 +204,13 @@ class Event(db.Model):
     entity_id = db.Column(db.Integer)
     path = db.Column(db.String(255))
 
+    # Filtros de GET /events; el listado se ordena por id descendente
+    __table_args__ = (
+        db.Index('ix_events_category_id', 'category', 'id'),
+        db.Index('ix_events_category_entity_id', 'category', 'entity_id', 'id'),
+        db.Index('ix_events_date', 'date'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -173,6 +232,13 @@ class DelegateAssignment(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
     assignment_date = db.Column(db.DateTime, default=db.func.current_timestamp())
 
+    # Filtros de GET /delegate-assignments y chequeos de FK al borrar
+    __table_args__ = (
+        db.Index('ix_delegate_assignments_delegate_id', 'delegate_id', 'id'),
+        db.Index('ix_delegate_assignments_benefit_id', 'benefit_id', 'id'),
+        db.CheckConstraint('quantity > 0', name='ck_delegate_assignments_quantity_positive'),
+    )
+
     # Relaciones
     benefit = db.relationship('Benefit', backref='assignments')
     delegate = db.relationship('Delegate', backref='assignments')
@@ -197,11 +263,25 @@ class BenefitDelivery(db.Model):
     benefit_id = db.Column(db.Integer, db.ForeignKey('benefits.id'))
     child_id = db.Column(db.Integer, db.ForeignKey('children.child_id'))
     quantity = db.Column(db.Integer, default=1, nullable=False)
-    delivery_date = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
+    # En PostgreSQL la tabla está particionada por mes de delivery_date
+    # (migración 0012, partitions.py): la clave primaria real es
+    # (delivery_id, delivery_date) y filtrar por fecha lee sólo esos meses
+    delivery_date = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
     notes = db.Column(db.Text)
     status = db.Column(db.String(50), default='Entregado')
     recipient_type = db.Column(db.String(50))
 
+    # Búsqueda de elegibles: quién ya recibió un beneficio (NOT EXISTS); los
+    # otros índices sirven a los filtros de GET /benefit-deliveries y a las FK
+    __table_args__ = (
+        db.Index('ix_benefit_deliveries_benefit_child', 'benefit_id', 'child_id'),
+        db.Index('ix_benefit_deliveries_benefit_affiliate', 'benefit_id', 'affiliate_id'),
+        db.Index('ix_benefit_deliveries_delegate_id', 'delegate_id', 'delivery_id'),
+        db.Index('ix_benefit_deliveries_affiliate_id', 'affiliate_id', 'delivery_id'),
+        db.Index('ix_benefit_deliveries_child_id', 'child_id'),
+        db.CheckConstraint('quantity > 0', name='ck_benefit_deliveries_quantity_positive'),
+    )
+
     def to_dict(self):
         return {
             'delivery_id': self.delivery_id,
@@ -215,3 +295,144 @@ class BenefitDelivery(db.Model):
             'status': self.status,
             'recipient_type': self.recipient_type
         }
+
+# Registro de cambios por colección (lo escriben triggers, ver la migración 0005)
+class CollectionChange(db.Model):
+    __tablename__ = 'collection_changes'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    collection = db.Column(db.String(50), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)
+    changed_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_collection_changes_collection_id', 'collection', 'id'),
+    )
+
+# Hasta dónde se podó collection_changes en cada colección (ver ChangeLog.prune)
+class CollectionChangeFloor(db.Model):
+    __tablename__ = 'collection_change_floors'
+
+    collection = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), nullable=False)
+    pruned_before = db.Column(db.DateTime(timezone=True), nullable=False)
+
+# Tablas resumen del tablero (ver stats.py y la migración 0007); sector_id y
+# benefit_id valen 0 cuando la entrega no tiene sector o beneficio
+class DeliveryStat(db.Model):
+    __tablename__ = 'delivery_stats'
+
+    month = db.Column(db.Date, primary_key=True)
+    sector_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    benefit_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    deliveries = db.Column(db.Integer, nullable=False, default=0)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+
+class AssignmentStat(db.Model):
+    __tablename__ = 'assignment_stats'
+
+    benefit_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    assignments = db.Column(db.Integer, nullable=False, default=0)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+
+class ChildAgeStat(db.Model):
+    __tablename__ = 'child_age_stats'
+
+    age_range = db.Column(db.String(50), primary_key=True)
+    children = db.Column(db.Integer, nullable=False, default=0)
+    refreshed_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+# Saldo de cada delegado por beneficio (ver balances.py y la migración 0011):
+# unidades asignadas y entregadas, actualizadas con cada asignación y entrega
+class DelegateBalance(db.Model):
+    __tablename__ = 'delegate_balances'
+
+    delegate_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    benefit_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    assigned = db.Column(db.Integer, nullable=False, default=0)
+    delivered = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
+
+    __table_args__ = (
+        db.Index('ix_delegate_balances_benefit_id', 'benefit_id'),
+    )
+
+# Meses de entregas archivados (ver partitions.py): el archivo comprimido de
+# cada partición y lo entregado por cada delegado en esos meses
+class DeliveryArchive(db.Model):
+    __tablename__ = 'delivery_archives'
+
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Date, nullable=False, unique=True)
+    partition_name = db.Column(db.String(63), nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    file = db.Column(db.String(255), nullable=False)
+    archived_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
+
+class DeliveryArchiveTotal(db.Model):
+    __tablename__ = 'delivery_archive_totals'
+
+    delegate_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    benefit_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    delivered = db.Column(db.Integer, nullable=False, default=0)
+
+# Quién recibió cada beneficio en los meses archivados (elegibilidad y fichas)
+class DeliveryArchiveRecipient(db.Model):
+    __tablename__ = 'delivery_archive_recipients'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    month = db.Column(db.Date, nullable=False)
+    benefit_id = db.Column(db.Integer, nullable=False)
+    affiliate_id = db.Column(db.Integer)
+    child_id = db.Column(db.Integer)
+
+    __table_args__ = (
+        db.Index('ix_delivery_archive_recipients_benefit_child', 'benefit_id', 'child_id'),
+        db.Index('ix_delivery_archive_recipients_benefit_affiliate', 'benefit_id', 'affiliate_id'),
+        db.Index('ix_delivery_archive_recipients_affiliate_id', 'affiliate_id'),
+        db.Index('ix_delivery_archive_recipients_child_id', 'child_id'),
+    )
+
+# Trabajos en segundo plano (ver jobs.py): la tabla jobs es la cola y los
+# procesos de `flask jobs-worker` la consumen
+class Job(db.Model):
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    payload = db.Column(db.JSON)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    progress = db.Column(db.Integer)
+    progress_message = db.Column(db.String(255))
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime(timezone=True))
+    locked_by = db.Column(db.String(100))
+    heartbeat_at = db.Column(db.DateTime(timezone=True))
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    started_at = db.Column(db.DateTime(timezone=True))
+    finished_at = db.Column(db.DateTime(timezone=True))
+
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_after', 'status', 'run_after', 'id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'progress_message': self.progress_message,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
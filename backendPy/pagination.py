@@ -0,0 +1,126 @@
+import base64
+import json
+from datetime import datetime, date
+
+from sqlalchemy import func, tuple_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+TRUE_VALUES = ('1', 'true', 'si', 'yes', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def parse_bool(value):
+    if value is None:
+        return None
+    value = value.strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise PaginationError(f'Valor booleano inválido: {value}')
+
+
+def parse_datetime(value):
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise PaginationError(f'Fecha inválida: {value}')
+
+
+def parse_limit(value, default=DEFAULT_LIMIT, maximum=MAX_LIMIT):
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise PaginationError(f'Límite inválido: {value}')
+    if limit < 1:
+        raise PaginationError('El límite debe ser mayor a cero')
+    return min(limit, maximum)
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return {'t': 'dt', 'v': value.isoformat()}
+    return {'t': 'raw', 'v': value}
+
+
+def _decode_value(data):
+    if data['t'] == 'dt':
+        return datetime.fromisoformat(data['v'])
+    return data['v']
+
+
+def encode_cursor(sort, sort_value, pk_value):
+    payload = json.dumps({
+        's': sort,
+        'k': _encode_value(sort_value),
+        'id': pk_value
+    }, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data['s'] != sort:
+            raise PaginationError('El cursor no corresponde al orden solicitado')
+        return _decode_value(data['k']), data['id']
+    except PaginationError:
+        raise
+    except Exception:
+        raise PaginationError('Cursor inválido')
+
+
+def keyset_paginate(query, sort, sort_column, pk_column, cursor=None, limit=DEFAULT_LIMIT,
+                    descending=False, with_total=True):
+    """Pagina por clave (sort_column, pk_column) sin OFFSET.
+
+    El costo de cada página depende sólo del límite: la base de datos entra
+    por el índice compuesto en la posición del cursor. Cuando el orden es por
+    la clave primaria, sort_column y pk_column son la misma columna.
+    """
+    total = None
+    if with_total:
+        total = query.order_by(None).with_entities(func.count(pk_column)).scalar()
+
+    same_key = sort_column is pk_column
+    if cursor:
+        sort_value, pk_value = decode_cursor(cursor, sort)
+        if same_key:
+            condition = pk_column < pk_value if descending else pk_column > pk_value
+        else:
+            key = tuple_(sort_column, pk_column)
+            condition = key < (sort_value, pk_value) if descending else key > (sort_value, pk_value)
+        query = query.filter(condition)
+
+    if same_key:
+        ordering = [pk_column.desc() if descending else pk_column.asc()]
+    elif descending:
+        ordering = [sort_column.desc(), pk_column.desc()]
+    else:
+        ordering = [sort_column.asc(), pk_column.asc()]
+
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            sort,
+            getattr(last, sort_column.key),
+            getattr(last, pk_column.key)
+        )
+
+    return rows, next_cursor, total
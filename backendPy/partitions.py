@@ -0,0 +1,189 @@
+import gzip
+import os
+import re
+from datetime import date, datetime, timezone
+
+from sqlalchemy import Date, column, func, insert, literal, select, table, text
+
+from export import export_rows
+
+PARENT = 'benefit_deliveries'
+DEFAULT_PARTITION = f'{PARENT}_default'
+PARTITION_NAME = re.compile(rf'^{PARENT}_(\d{{4}})_(\d{{2}})$')
+
+# Particiones creadas por adelantado: las entregas del mes que viene nunca
+# caen en la partición default
+DEFAULT_MONTHS_AHEAD = 3
+
+# Lo máximo que el DETACH espera su lock exclusivo sobre benefit_deliveries:
+# mientras espera, las lecturas y escrituras nuevas de la tabla hacen fila
+DETACH_LOCK_TIMEOUT = '5s'
+
+# Serializa la creación y el archivado de particiones entre procesos
+LOCK = text(f"SELECT pg_advisory_xact_lock(hashtext('{PARENT}_partitions'))")
+
+IS_PARTITIONED = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name))"
+)
+PARTITIONS = text(
+    "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+    "WHERE i.inhparent = to_regclass(:name)"
+)
+
+
+class PartitionError(ValueError):
+    pass
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def partition_name(month):
+    return f'{PARENT}_{month:%Y_%m}'
+
+
+class DeliveryPartitions:
+    """Particiones mensuales de benefit_deliveries por delivery_date (PostgreSQL).
+
+    La tabla está particionada por rango (migración 0012): una consulta con
+    delivery_date en el WHERE sólo lee las particiones de esos meses. ensure()
+    crea las de los próximos meses (y las de meses que hayan caído en la
+    partición default); archive() guarda comprimidas en un archivo las de
+    meses cerrados y después las desprende y las borra. Lo archivado se anota
+    en delivery_archives, lo entregado por cada delegado en
+    delivery_archive_totals (la conciliación de saldos lo sigue contando) y
+    quién recibió cada beneficio en delivery_archive_recipients (la
+    elegibilidad y las fichas no lo vuelven a ofrecer); delivery_stats
+    conserva los meses archivados.
+    """
+
+    def __init__(self, deliveries, archives, archive_totals, archive_recipients,
+                 months_ahead=DEFAULT_MONTHS_AHEAD):
+        self.deliveries = deliveries
+        self.archives = archives
+        self.archive_totals = archive_totals
+        self.archive_recipients = archive_recipients
+        self.months_ahead = months_ahead
+
+    def is_partitioned(self, conn):
+        if conn.dialect.name != 'postgresql':
+            return False
+        return conn.execute(IS_PARTITIONED, {'name': PARENT}).scalar()
+
+    def months(self, conn):
+        """Meses con partición propia, en orden."""
+        months = []
+        for (name,) in conn.execute(PARTITIONS, {'name': PARENT}):
+            match = PARTITION_NAME.match(name)
+            if match:
+                months.append(date(int(match.group(1)), int(match.group(2)), 1))
+        return sorted(months)
+
+    def _create(self, conn, month):
+        name, upper = partition_name(month), add_months(month, 1)
+        bounds = f"FOR VALUES FROM ('{month}') TO ('{upper}')"
+        stray = conn.execute(text(
+            f"SELECT count(*) FROM {DEFAULT_PARTITION} "
+            f"WHERE delivery_date >= '{month}' AND delivery_date < '{upper}'"
+        )).scalar()
+        if not stray:
+            conn.execute(text(f'CREATE TABLE {name} PARTITION OF {PARENT} {bounds}'))
+            return
+        # Las filas del mes que están en la partición default se mudan a la nueva
+        conn.execute(text(f'CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+        conn.execute(text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE delivery_date >= '{month}' AND delivery_date < '{upper}' RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ))
+        conn.execute(text(f'ALTER TABLE {PARENT} ATTACH PARTITION {name} {bounds}'))
+
+    def ensure(self, engine, today=None, months_ahead=None):
+        """Crea las particiones que falten; devuelve los meses creados."""
+        months_ahead = self.months_ahead if months_ahead is None else months_ahead
+        current = month_start(today or date.today())
+        with engine.begin() as conn:
+            if not self.is_partitioned(conn):
+                return []
+            conn.execute(LOCK)
+            existing = set(self.months(conn))
+            wanted = {add_months(current, offset) for offset in range(months_ahead + 1)}
+            wanted |= {month_start(row[0]) for row in conn.execute(text(
+                f"SELECT DISTINCT date_trunc('month', delivery_date)::date FROM {DEFAULT_PARTITION}"
+            ))}
+            created = sorted(wanted - existing)
+            for month in created:
+                self._create(conn, month)
+        return created
+
+    def _archive_one(self, conn, month, directory):
+        name = partition_name(month)
+        # La partición sigue adjunta mientras se exporta: SHARE sólo frena las
+        # escrituras en este mes (ya cerrado) y el resto de la tabla sigue
+        # recibiendo entregas
+        conn.execute(text(f'LOCK TABLE {name} IN SHARE MODE'))
+        partition = table(name, *[column(c.name) for c in self.deliveries.columns])
+
+        path = os.path.join(directory, f'{name}.csv.gz')
+        with gzip.open(path + '.tmp', 'wt', encoding='utf-8', newline='') as output:
+            for chunk in export_rows(conn, select(*partition.c).order_by(partition.c.delivery_id), 'csv'):
+                output.write(chunk)
+
+        row_count, quantity = conn.execute(
+            select(func.count(), func.coalesce(func.sum(partition.c.quantity), 0))
+        ).one()
+        totals = self.archive_totals
+        conn.execute(text(
+            f"INSERT INTO {totals.name} (delegate_id, benefit_id, delivered) "
+            f"SELECT delegate_id, benefit_id, sum(quantity) FROM {name} "
+            f"WHERE delegate_id IS NOT NULL AND benefit_id IS NOT NULL "
+            f"GROUP BY delegate_id, benefit_id "
+            f"ON CONFLICT (delegate_id, benefit_id) DO UPDATE "
+            f"SET delivered = {totals.name}.delivered + EXCLUDED.delivered"
+        ))
+        conn.execute(insert(self.archive_recipients).from_select(
+            ['month', 'benefit_id', 'affiliate_id', 'child_id'],
+            select(literal(month, Date), partition.c.benefit_id, partition.c.affiliate_id,
+                   partition.c.child_id).distinct()
+            .where(partition.c.benefit_id.is_not(None))
+        ))
+        record = {'month': month, 'partition_name': name, 'row_count': row_count, 'quantity': quantity,
+                  'file': os.path.basename(path), 'archived_at': datetime.now(timezone.utc)}
+        conn.execute(insert(self.archives).values(**record))
+
+        # Paso final, breve: el DETACH bloquea benefit_deliveries hasta el commit
+        conn.execute(text(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'"))
+        conn.execute(text(f'ALTER TABLE {PARENT} DETACH PARTITION {name}'))
+        conn.execute(text(f'DROP TABLE {name}'))
+        # El archivo queda en su lugar justo antes del commit del borrado
+        os.replace(path + '.tmp', path)
+        return record
+
+    def archive(self, engine, before, directory, today=None):
+        """Archiva las particiones de los meses anteriores a before.
+
+        Cada partición se procesa en su propia transacción: si algo falla
+        (disco lleno, error al exportar, el DETACH no consigue su lock a
+        tiempo) la partición sigue adjunta y nada queda anotado.
+        """
+        before = month_start(before)
+        if before > month_start(today or date.today()):
+            raise PartitionError('Sólo se pueden archivar meses ya cerrados')
+        with engine.connect() as conn:
+            if not self.is_partitioned(conn):
+                raise PartitionError(f'{PARENT} no está particionada: el archivado requiere '
+                                     f'PostgreSQL con la migración 0012 aplicada')
+            months = [month for month in self.months(conn) if month < before]
+        os.makedirs(directory, exist_ok=True)
+        archived = []
+        for month in months:
+            with engine.begin() as conn:
+                conn.execute(LOCK)
+                archived.append(self._archive_one(conn, month, directory))
+        return archived
@@ -0,0 +1,188 @@
+from collections import defaultdict
+
+from sqlalchemy import or_, select
+
+from eligibility import EligibilityError, parse_age_range
+
+MAX_PROFILE_IDS = 200
+
+
+class ProfileError(ValueError):
+    pass
+
+
+def parse_ids(value):
+    """Lista de ids separados por comas (?ids=1,2,3), sin repetidos y en orden."""
+    try:
+        ids = [int(part) for part in (value or '').split(',') if part.strip()]
+    except ValueError:
+        raise ProfileError(f'Lista de ids inválida: {value}')
+    if not ids:
+        raise ProfileError('El parámetro ids es requerido')
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_PROFILE_IDS:
+        raise ProfileError(f'Se aceptan hasta {MAX_PROFILE_IDS} afiliados por pedido')
+    return ids
+
+
+def eligible_benefits(benefits, children, delivered, as_of):
+    """Beneficios vigentes que le corresponden al afiliado y a cada hijo.
+
+    Misma regla que EligibilityEngine, evaluada sobre filas ya cargadas: con
+    rango de edad el beneficio es para los hijos cuya fecha de nacimiento cae
+    en la ventana de esa edad; sin rango, para el afiliado. delivered tiene
+    los pares (benefit_id, child_id) ya entregados, con child_id None para
+    las entregas al afiliado. Devuelve (beneficios del afiliado, {child_id: beneficios}).
+    """
+    for_affiliate, for_children = [], defaultdict(list)
+    for benefit in benefits:
+        try:
+            bounds = parse_age_range(benefit['age_range'])
+        except EligibilityError:
+            # Un rango mal cargado no se puede evaluar: no se ofrece a nadie
+            continue
+        if bounds is None:
+            if (benefit['id'], None) not in delivered:
+                for_affiliate.append(benefit)
+            continue
+        after, until = bounds.birth_window(as_of)
+        for child in children:
+            birth_date = child['birth_date']
+            if birth_date is None or birth_date > until or (after is not None and birth_date <= after):
+                continue
+            if (benefit['id'], child['child_id']) not in delivered:
+                for_children[child['child_id']].append(benefit)
+    return for_affiliate, for_children
+
+
+class ProfileLoader:
+    """Ficha completa de uno o varios afiliados en una cantidad fija de consultas.
+
+    Afiliados (con su sector), hijos, entregas (a los afiliados o a sus hijos)
+    y beneficios vigentes se leen con una consulta cada uno, con IN sobre los
+    ids pedidos, y se arman en memoria: da igual si se piden 1 o 200. Con
+    archived, una consulta más trae lo recibido en meses archivados (ya no
+    está en las entregas) para no volver a ofrecerlo.
+    """
+
+    def __init__(self, affiliates, children, deliveries, benefits, delegates, sectors, archived=None):
+        self.affiliates = affiliates
+        self.children = children
+        self.deliveries = deliveries
+        self.benefits = benefits
+        self.delegates = delegates
+        self.sectors = sectors
+        self.archived = archived
+
+    def _affiliates(self, session, ids):
+        affiliates, sectors = self.affiliates, self.sectors
+        rows = session.execute(
+            select(affiliates.id_associate, affiliates.affiliate_code, affiliates.affiliate_name,
+                   affiliates.dni, affiliates.gender, affiliates.contact, affiliates.sector_id,
+                   sectors.sector_name, affiliates.has_children, affiliates.has_disability,
+                   affiliates.created_at)
+            .outerjoin(sectors, sectors.sector_id == affiliates.sector_id)
+            .where(affiliates.id_associate.in_(ids))
+        )
+        return {row.id_associate: row._asdict() for row in rows}
+
+    def _children(self, session, ids):
+        children = self.children
+        rows = session.execute(
+            select(children.child_id, children.affiliate_id, children.first_name, children.last_name,
+                   children.birth_date, children.dni, children.gender, children.has_disability,
+                   children.notes)
+            .where(children.affiliate_id.in_(ids))
+            .order_by(children.affiliate_id, children.birth_date, children.child_id)
+        )
+        return [row._asdict() for row in rows]
+
+    def _deliveries(self, session, ids):
+        deliveries, children, benefits, delegates = (self.deliveries, self.children,
+                                                     self.benefits, self.delegates)
+        # Las entregas a un hijo pueden no tener affiliate_id: se buscan también por child_id
+        child_ids = select(children.child_id).where(children.affiliate_id.in_(ids))
+        rows = session.execute(
+            select(deliveries.delivery_id, deliveries.affiliate_id, deliveries.child_id,
+                   deliveries.benefit_id, benefits.name.label('benefit_name'),
+                   deliveries.delegate_id,
+                   (delegates.first_name + ' ' + delegates.last_name).label('delegate_name'),
+                   deliveries.quantity, deliveries.delivery_date, deliveries.status,
+                   deliveries.notes, deliveries.recipient_type)
+            .outerjoin(benefits, benefits.id == deliveries.benefit_id)
+            .outerjoin(delegates, delegates.id == deliveries.delegate_id)
+            .where(or_(deliveries.affiliate_id.in_(ids), deliveries.child_id.in_(child_ids)))
+            .order_by(deliveries.delivery_date.desc(), deliveries.delivery_id.desc())
+        )
+        return [row._asdict() for row in rows]
+
+    def _archived_recipients(self, session, ids):
+        if self.archived is None:
+            return []
+        archived, children = self.archived, self.children
+        child_ids = select(children.child_id).where(children.affiliate_id.in_(ids))
+        rows = session.execute(
+            select(archived.benefit_id, archived.affiliate_id, archived.child_id).distinct()
+            .where(or_(archived.affiliate_id.in_(ids), archived.child_id.in_(child_ids)))
+        )
+        return [row._asdict() for row in rows]
+
+    def _available_benefits(self, session):
+        benefits = self.benefits
+        rows = session.execute(
+            select(benefits.id, benefits.name, benefits.type, benefits.age_range, benefits.stock_rest)
+            .where(benefits.is_available)
+            .order_by(benefits.id)
+        )
+        return [row._asdict() for row in rows]
+
+    def load(self, session, ids, as_of):
+        """Fichas en el orden de ids; los afiliados inexistentes se omiten."""
+        affiliates = self._affiliates(session, ids)
+        if not affiliates:
+            return []
+        children = self._children(session, list(affiliates))
+        deliveries = self._deliveries(session, list(affiliates))
+        benefits = self._available_benefits(session)
+
+        children_by_affiliate = defaultdict(list)
+        owner = {}
+        for child in children:
+            child['deliveries'] = []
+            children_by_affiliate[child['affiliate_id']].append(child)
+            owner[child['child_id']] = child['affiliate_id']
+
+        deliveries_by_affiliate = defaultdict(list)
+        delivered = defaultdict(set)
+        for delivery in deliveries:
+            affiliate_id = owner.get(delivery['child_id'], delivery['affiliate_id'])
+            delivered[affiliate_id].add((delivery['benefit_id'], delivery['child_id']))
+            deliveries_by_affiliate[affiliate_id].append(delivery)
+        for recipient in self._archived_recipients(session, list(affiliates)):
+            affiliate_id = owner.get(recipient['child_id'], recipient['affiliate_id'])
+            delivered[affiliate_id].add((recipient['benefit_id'], recipient['child_id']))
+
+        profiles = []
+        for affiliate_id in ids:
+            affiliate = affiliates.get(affiliate_id)
+            if affiliate is None:
+                continue
+            own_children = children_by_affiliate[affiliate_id]
+            by_child = {child['child_id']: child for child in own_children}
+            own_deliveries = []
+            for delivery in deliveries_by_affiliate[affiliate_id]:
+                if delivery['child_id'] in by_child:
+                    by_child[delivery['child_id']]['deliveries'].append(delivery)
+                else:
+                    own_deliveries.append(delivery)
+            for_affiliate, for_children = eligible_benefits(
+                benefits, own_children, delivered[affiliate_id], as_of)
+            for child in own_children:
+                child['eligible_benefits'] = for_children.get(child['child_id'], [])
+            profiles.append({
+                'affiliate': affiliate,
+                'children': own_children,
+                'deliveries': own_deliveries,
+                'eligible_benefits': for_affiliate,
+            })
+        return profiles
@@ -0,0 +1,38 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine):
+    """Cuenta las sentencias SQL ejecutadas sobre engine dentro del bloque."""
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
+
+
+@contextmanager
+def assert_max_queries(engine, maximum):
+    """Falla si el bloque ejecuta más de maximum consultas (regresiones N+1)."""
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > maximum:
+        listing = '\n'.join(counter.statements)
+        raise AssertionError(
+            f'Se esperaban como máximo {maximum} consultas y se ejecutaron {counter.count}:\n{listing}'
+        )
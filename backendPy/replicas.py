@@ -0,0 +1,149 @@
+import logging
+import random
+import threading
+import time
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, event, text
+
+log = logging.getLogger('ate.replicas')
+
+READ_METHODS = ('GET', 'HEAD')
+# El frontend está en otro origen y no manda cookies: el plazo viaja en un
+# encabezado que la respuesta de una escritura devuelve y el cliente reenvía
+PIN_HEADER = 'X-Primary-Until'
+
+DEFAULT_PIN_SECONDS = 5
+DEFAULT_MAX_LAG_SECONDS = 2
+DEFAULT_CHECK_SECONDS = 5
+
+# Con la réplica al día (todo lo recibido ya aplicado) el retraso es 0 aunque
+# el primario no haya escrito nada en un rato
+PG_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def replication_lag(engine):
+    """Segundos de retraso de la réplica; otros motores no replican (0)."""
+    if engine.dialect.name != 'postgresql':
+        return 0.0
+    with engine.connect() as conn:
+        return float(conn.execute(PG_LAG_QUERY).scalar() or 0)
+
+
+def replica_binds(urls):
+    """SQLALCHEMY_BINDS para las réplicas de DATABASE_REPLICA_URLS."""
+    return {f'replica_{index}': url for index, url in enumerate(urls)}
+
+
+class RoutingSession(Session):
+    """Sesión que manda los SELECT de un request de lectura a una réplica.
+
+    La réplica la elige ReplicaRouter al empezar el request (g.read_bind).
+    Todo lo demás va al primario: escrituras, SELECT ... FOR UPDATE, SQL de
+    texto y, una vez que la sesión escribió, también sus lecturas, para que
+    vea sus propios cambios.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get('wrote') \
+                and isinstance(clause, Select) and clause._for_update_arg is None \
+                and has_request_context() and g.get('read_bind'):
+            return self._db.engines[g.read_bind]
+        if self._flushing or getattr(clause, 'is_dml', False):
+            self.info['wrote'] = True
+        return super().get_bind(mapper, clause, bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    if session.info.get('wrote') and has_request_context():
+        g.db_wrote = True
+
+
+class ReplicaRouter:
+    """Reparte los requests de lectura entre las réplicas sanas.
+
+    Un cliente que acaba de escribir queda fijado al primario durante
+    REPLICA_PIN_SECONDS, así lee lo que escribió: la respuesta de la
+    escritura trae X-Primary-Until y el cliente lo reenvía en sus requests.
+    El retraso de cada réplica se mide cada REPLICA_CHECK_SECONDS; si supera
+    REPLICA_MAX_LAG_SECONDS, o no responde, se lee del primario hasta la
+    próxima medición.
+    """
+
+    def __init__(self, db, lag_probe=replication_lag):
+        self.db = db
+        self.lag_probe = lag_probe
+        self.keys = []
+        self._lags = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Registra las réplicas como binds; debe llamarse antes de db.init_app()."""
+        binds = replica_binds(app.config.get('DATABASE_REPLICA_URLS') or [])
+        app.config['SQLALCHEMY_BINDS'] = {**app.config.get('SQLALCHEMY_BINDS', {}), **binds}
+        self.keys = list(binds)
+        self.pin_seconds = float(app.config.get('REPLICA_PIN_SECONDS', DEFAULT_PIN_SECONDS))
+        self.max_lag = float(app.config.get('REPLICA_MAX_LAG_SECONDS', DEFAULT_MAX_LAG_SECONDS))
+        self.check_seconds = float(app.config.get('REPLICA_CHECK_SECONDS', DEFAULT_CHECK_SECONDS))
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+
+    def lag(self, key):
+        """Último retraso medido (None si la réplica falló), renovado cada check_seconds."""
+        now = time.monotonic()
+        with self._lock:
+            measured_at, lag = self._lags.get(key, (None, None))
+            if measured_at is not None and now - measured_at < self.check_seconds:
+                return lag
+            # Mientras un hilo mide, los demás usan el valor anterior
+            self._lags[key] = (now, lag)
+        try:
+            lag = self.lag_probe(self.db.engines[key])
+        except Exception as e:
+            log.warning('Réplica %s sin respuesta: %s', key, e)
+            lag = None
+        with self._lock:
+            self._lags[key] = (time.monotonic(), lag)
+        return lag
+
+    def healthy(self):
+        return [key for key in self.keys
+                if (lag := self.lag(key)) is not None and lag <= self.max_lag]
+
+    def pinned(self):
+        try:
+            return float(request.headers.get(PIN_HEADER, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def before_request(self):
+        g.read_bind = None
+        if not self.keys or request.method not in READ_METHODS or self.pinned():
+            return
+        candidates = self.healthy()
+        if candidates:
+            g.read_bind = random.choice(candidates)
+
+    def after_request(self, response):
+        if self.keys:
+            response.headers['X-DB-Route'] = g.get('read_bind') or 'primary'
+            wrote = request.method not in READ_METHODS + ('OPTIONS',) and response.status_code < 400
+            if g.get('db_wrote') or wrote:
+                until = time.time() + self.pin_seconds
+                response.headers[PIN_HEADER] = f'{until:.3f}'
+        return response
+
+    def stats(self):
+        return {key: self.lag(key) for key in self.keys}
+
+
+def read_from_primary():
+    """Lo que resta del request lee del primario (p. ej. para llenar un cache compartido)."""
+    if has_request_context():
+        g.read_bind = None
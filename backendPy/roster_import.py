@@ -0,0 +1,330 @@
+import csv
+import io
+from datetime import date, datetime
+from itertools import islice
+
+from sqlalchemy import select, update
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+
+GENDERS = ('M', 'F', 'O')
+TRUE_VALUES = ('1', 'true', 'si', 'sí', 's', 'x', 'yes')
+FALSE_VALUES = ('', '0', 'false', 'no', 'n')
+
+
+class ImportFileError(ValueError):
+    pass
+
+
+class RowError(ValueError):
+    pass
+
+
+class ImportReport:
+    """Cuenta filas y acumula errores por fila.
+
+    Si se indica un archivo de reporte, cada error se escribe apenas se
+    detecta; en memoria sólo se guardan los primeros MAX_REPORTED_ERRORS.
+    on_progress, si se indica, se llama con el reporte después de cada lote.
+    """
+
+    def __init__(self, report_file=None, on_progress=None):
+        self.on_progress = on_progress
+        self.processed = 0
+        self.upserted = 0
+        self.error_count = 0
+        self.errors = []
+        self._writer = None
+        if report_file is not None:
+            self._writer = csv.writer(report_file)
+            self._writer.writerow(['fila', 'error'])
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': line, 'error': message})
+        if self._writer:
+            self._writer.writerow([line, message])
+
+    def chunk_done(self):
+        if self.on_progress:
+            self.on_progress(self)
+
+    def to_dict(self):
+        return {
+            'processed': self.processed,
+            'upserted': self.upserted,
+            'failed': self.error_count,
+            'errors': self.errors,
+            'errors_truncated': self.error_count > len(self.errors)
+        }
+
+
+# Lectura incremental de archivos
+
+def _normalize_header(header):
+    return [str(name or '').strip().lower().replace(' ', '_') for name in header]
+
+
+def _read_csv(stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(text, dialect)
+    header = _normalize_header(next(reader, []))
+    for line, values in enumerate(reader, start=2):
+        if any(value.strip() for value in values):
+            yield line, dict(zip(header, values))
+
+
+def _read_xlsx(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError('Para importar archivos XLSX se requiere el paquete openpyxl')
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _normalize_header(next(rows, []))
+        for line, values in enumerate(rows, start=2):
+            if any(value not in (None, '') for value in values):
+                yield line, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def read_rows(stream, filename):
+    """Devuelve un generador de (número de fila, dict) según la extensión."""
+    name = (filename or '').lower()
+    if name.endswith('.xlsx'):
+        return _read_xlsx(stream)
+    if name.endswith('.csv') or name.endswith('.txt'):
+        return _read_csv(stream)
+    raise ImportFileError('Formato no soportado: se aceptan archivos .csv o .xlsx')
+
+
+def chunked(rows, size=CHUNK_SIZE):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Conversión y validación de celdas
+
+def _text(row, field, required=False, max_length=None):
+    value = row.get(field)
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise RowError(f'El campo {field} es requerido')
+    if max_length and len(value) > max_length:
+        raise RowError(f'El campo {field} supera los {max_length} caracteres')
+    return value
+
+
+def _int(row, field):
+    value = row.get(field)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    text = _text(row, field, required=True)
+    try:
+        return int(text)
+    except ValueError:
+        raise RowError(f'El campo {field} debe ser un número entero')
+
+
+def _bool(row, field):
+    value = row.get(field)
+    if isinstance(value, bool):
+        return value
+    text = _text(row, field).lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise RowError(f'Valor inválido en {field}: {text}')
+
+
+def _gender(row, field='gender', required=True):
+    value = _text(row, field, required=required).upper()[:1]
+    if value and value not in GENDERS:
+        raise RowError(f'Género inválido: {value}')
+    return value or None
+
+
+def _date(row, field):
+    value = row.get(field)
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = _text(row, field, required=True)
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise RowError(f'Fecha inválida en {field}: {text}')
+
+
+def _upsert(session, table, key_columns, update_columns):
+    """INSERT ... ON CONFLICT DO UPDATE armado una vez y ejecutado como executemany."""
+    if session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c[column] for column in key_columns],
+        set_={column: statement.excluded[column] for column in update_columns}
+    )
+
+
+# Importación de afiliados
+
+def parse_affiliate(row, sector_ids):
+    affiliate = {
+        'affiliate_code': _int(row, 'affiliate_code'),
+        'affiliate_name': _text(row, 'affiliate_name', required=True, max_length=200),
+        'dni': _text(row, 'dni', required=True, max_length=20),
+        'gender': _gender(row),
+        'contact': _text(row, 'contact', max_length=100),
+        'sector_id': _int(row, 'sector_id'),
+        'has_children': _bool(row, 'has_children'),
+        'has_disability': _bool(row, 'has_disability'),
+    }
+    if affiliate['sector_id'] not in sector_ids:
+        raise RowError(f"El sector {affiliate['sector_id']} no existe")
+    return affiliate
+
+
+def import_affiliates(session, affiliates, sectors, rows, report, chunk_size=CHUNK_SIZE):
+    """Inserta o actualiza afiliados por affiliate_code, en lotes.
+
+    Cada lote valida DNI contra la base con una sola consulta y se guarda con
+    INSERT ... ON CONFLICT (affiliate_code) DO UPDATE y su propio commit.
+    """
+    sector_ids = set(session.execute(select(sectors.c.sector_id)).scalars())
+    upsert = _upsert(session, affiliates, ['affiliate_code'],
+                     ['affiliate_name', 'dni', 'gender', 'contact', 'sector_id',
+                      'has_children', 'has_disability'])
+    seen_codes, seen_dnis = set(), set()
+
+    for chunk in chunked(rows, chunk_size):
+        parsed = []
+        for line, row in chunk:
+            report.processed += 1
+            try:
+                affiliate = parse_affiliate(row, sector_ids)
+            except RowError as e:
+                report.add_error(line, str(e))
+                continue
+            if affiliate['affiliate_code'] in seen_codes:
+                report.add_error(line, f"Código de afiliado repetido en el archivo: {affiliate['affiliate_code']}")
+                continue
+            if affiliate['dni'] in seen_dnis:
+                report.add_error(line, f"DNI repetido en el archivo: {affiliate['dni']}")
+                continue
+            seen_codes.add(affiliate['affiliate_code'])
+            seen_dnis.add(affiliate['dni'])
+            parsed.append((line, affiliate))
+
+        if not parsed:
+            report.chunk_done()
+            continue
+
+        # Un DNI ya registrado con otro código violaría la unicidad de dni
+        owners = dict(session.execute(
+            select(affiliates.c.dni, affiliates.c.affiliate_code)
+            .where(affiliates.c.dni.in_([a['dni'] for _, a in parsed]))
+        ).all())
+        values = []
+        for line, affiliate in parsed:
+            owner = owners.get(affiliate['dni'])
+            if owner is not None and owner != affiliate['affiliate_code']:
+                report.add_error(line, f"El DNI {affiliate['dni']} ya está registrado para el afiliado {owner}")
+                continue
+            values.append(affiliate)
+
+        if values:
+            session.execute(upsert, values)
+            session.commit()
+            report.upserted += len(values)
+        report.chunk_done()
+
+    return report
+
+
+# Importación de hijos
+
+def parse_child(row):
+    return {
+        'affiliate_code': _int(row, 'affiliate_code'),
+        'first_name': _text(row, 'first_name', required=True, max_length=100),
+        'last_name': _text(row, 'last_name', required=True, max_length=100),
+        'birth_date': _date(row, 'birth_date'),
+        'dni': _text(row, 'dni', max_length=20),
+        'gender': _gender(row, required=False),
+        'has_disability': _bool(row, 'has_disability'),
+        'notes': _text(row, 'notes'),
+    }
+
+
+def import_children(session, children, affiliates, rows, report, chunk_size=CHUNK_SIZE):
+    """Inserta o actualiza hijos por (afiliado, nombre, apellido, nacimiento), en lotes.
+
+    El afiliado se identifica por affiliate_code; los códigos de cada lote se
+    resuelven con una sola consulta y se marca has_children en los afiliados.
+    """
+    key_columns = ('affiliate_id', 'first_name', 'last_name', 'birth_date')
+    upsert = _upsert(session, children, key_columns, ['dni', 'gender', 'has_disability', 'notes'])
+
+    for chunk in chunked(rows, chunk_size):
+        parsed = []
+        for line, row in chunk:
+            report.processed += 1
+            try:
+                parsed.append((line, parse_child(row)))
+            except RowError as e:
+                report.add_error(line, str(e))
+
+        if not parsed:
+            report.chunk_done()
+            continue
+
+        ids = dict(session.execute(
+            select(affiliates.c.affiliate_code, affiliates.c.id_associate)
+            .where(affiliates.c.affiliate_code.in_({c['affiliate_code'] for _, c in parsed}))
+        ).all())
+        values = {}
+        for line, child in parsed:
+            code = child.pop('affiliate_code')
+            if code not in ids:
+                report.add_error(line, f'No existe el afiliado con código {code}')
+                continue
+            child['affiliate_id'] = ids[code]
+            # Dentro de un mismo lote la última fila con la misma clave gana
+            values[tuple(child[column] for column in key_columns)] = child
+
+        if values:
+            values = list(values.values())
+            session.execute(upsert, values)
+            session.execute(
+                update(affiliates)
+                .where(affiliates.c.id_associate.in_({c['affiliate_id'] for c in values}))
+                .values(has_children=True)
+            )
+            session.commit()
+            report.upserted += len(values)
+        report.chunk_done()
+
+    return report
@@ -0,0 +1,23 @@
+import importlib
+
+# Módulos de routes/ con un blueprint `bp`. Se importan recién dentro de
+# create_app(), así que importar app.py (gunicorn.conf.py, scripts, la CLI
+# antes de elegir comando) no arrastra todas las rutas y sus dependencias
+BLUEPRINTS = (
+    'affiliates',
+    'children',
+    'delegates',
+    'catalog',
+    'deliveries',
+    'roster',
+    'reports',
+    'jobs',
+    'live',
+    'system',
+)
+
+
+def register_blueprints(app, names=BLUEPRINTS):
+    for name in names:
+        module = importlib.import_module(f'routes.{name}')
+        app.register_blueprint(module.bp)
@@ -0,0 +1,248 @@
+from flask import Blueprint, jsonify, request
+
+from eligibility import EligibilityError, parse_as_of
+from extensions import profiles
+from models import Afiliado, Child, db
+from pagination import PaginationError, keyset_paginate, parse_bool, parse_datetime, parse_limit
+from profiles import ProfileError, parse_ids
+from routes.common import versioned_collection
+from serialization import FieldsError, Projection
+
+bp = Blueprint('affiliates', __name__)
+
+# Columnas de cada listado (mismos nombres que to_dict()); se leen como
+# tuplas y admiten ?fields= para pedir sólo algunos campos
+AFFILIATE_FIELDS = Projection(
+    Afiliado.id_associate, Afiliado.affiliate_code, Afiliado.affiliate_name, Afiliado.dni,
+    Afiliado.gender, Afiliado.contact, Afiliado.sector_id, Afiliado.has_children,
+    Afiliado.has_disability, Afiliado.created_at
+)
+
+# Columnas permitidas para ordenar el listado de afiliados
+AFFILIATE_SORTS = {
+    'id': Afiliado.id_associate,
+    'name': Afiliado.affiliate_name,
+    'created_at': Afiliado.created_at,
+}
+
+AFFILIATE_PAGE_PARAMS = ('cursor', 'limit', 'sort', 'order', 'count', 'sector_id', 'gender',
+                         'has_children', 'has_disability', 'created_from', 'created_to')
+
+def list_affiliates_page(args):
+    sort = args.get('sort', 'id')
+    if sort not in AFFILIATE_SORTS:
+        raise PaginationError(f'Orden inválido: {sort}')
+    # El cursor se arma con la columna de orden y el id, así que van siempre
+    fields = AFFILIATE_FIELDS.parse_fields(
+        args.get('fields'), required=('id_associate', AFFILIATE_SORTS[sort].key)
+    )
+    query = db.session.query(*AFFILIATE_FIELDS.entities(fields))
+
+    # Filtros del lado del servidor
+    if args.get('sector_id'):
+        query = query.filter(Afiliado.sector_id == args.get('sector_id', type=int))
+    if args.get('gender'):
+        query = query.filter(Afiliado.gender == args['gender'])
+    has_children = parse_bool(args.get('has_children'))
+    if has_children is not None:
+        query = query.filter(Afiliado.has_children.is_(has_children))
+    has_disability = parse_bool(args.get('has_disability'))
+    if has_disability is not None:
+        query = query.filter(Afiliado.has_disability.is_(has_disability))
+    created_from = parse_datetime(args.get('created_from'))
+    if created_from:
+        query = query.filter(Afiliado.created_at >= created_from)
+    created_to = parse_datetime(args.get('created_to'))
+    if created_to:
+        query = query.filter(Afiliado.created_at < created_to)
+
+    order = args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        raise PaginationError(f'Dirección de orden inválida: {order}')
+    with_total = parse_bool(args.get('count'))
+
+    affiliates, next_cursor, total = keyset_paginate(
+        query,
+        sort,
+        AFFILIATE_SORTS[sort],
+        Afiliado.id_associate,
+        cursor=args.get('cursor'),
+        limit=parse_limit(args.get('limit')),
+        descending=order == 'desc',
+        with_total=with_total is not False
+    )
+    return {
+        'items': AFFILIATE_FIELDS.rows(affiliates, fields),
+        'next_cursor': next_cursor,
+        'total': total
+    }
+
+# Rutas para afiliados
+@bp.route('/afiliados', methods=['GET', 'POST', 'OPTIONS'])
+def affiliate_operations():
+    if request.method == 'OPTIONS':
+        return '', 200
+        
+    if request.method == 'GET':
+        try:
+            # Con parámetros de paginación o filtros se responde por páginas;
+            # sin ellos se mantiene la lista completa que usa el frontend actual
+            def full_response(version):
+                if any(param in request.args for param in AFFILIATE_PAGE_PARAMS):
+                    return jsonify(list_affiliates_page(request.args))
+                fields = AFFILIATE_FIELDS.parse_fields(request.args.get('fields'))
+                return jsonify(AFFILIATE_FIELDS.fetch(db.session, fields))
+
+            return versioned_collection('affiliates', AFFILIATE_FIELDS, Afiliado.id_associate, full_response)
+        except (PaginationError, FieldsError) as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+            
+    if request.method == 'POST':
+        try:
+            data = request.json
+            print("Datos recibidos del afiliado:", data)  # Debug
+
+            # Validar datos requeridos
+            required_fields = ['affiliate_code', 'affiliate_name', 'dni', 'gender', 'sector_id']
+            for field in required_fields:
+                if field not in data:
+                    return jsonify({'error': f'El campo {field} es requerido'}), 400
+
+            # Crear nuevo afiliado
+            new_affiliate = Afiliado(
+                affiliate_code=data['affiliate_code'],
+                affiliate_name=data['affiliate_name'],
+                dni=data['dni'],
+                gender=data['gender'],
+                contact=data.get('contact', ''),
+                sector_id=data['sector_id'],
+                has_children=data.get('has_children', False),
+                has_disability=data.get('has_disability', False)
+            )
+
+            db.session.add(new_affiliate)
+            db.session.commit()
+            
+            print("Afiliado creado:", new_affiliate.to_dict())  # Debug
+            return jsonify(new_affiliate.to_dict()), 201
+
+        except Exception as e:
+            db.session.rollback()
+            print("Error al crear afiliado:", str(e))  # Debug
+            return jsonify({'error': str(e)}), 500
+
+@bp.route('/afiliados/<int:id>', methods=['GET', 'PUT', 'DELETE', 'OPTIONS'])
+def affiliate_detail(id):
+    if request.method == 'OPTIONS':
+        return '', 200
+
+    try:
+        afiliado = Afiliado.query.get_or_404(id)
+        
+        if request.method == 'GET':
+            return jsonify(afiliado.to_dict())
+            
+        elif request.method == 'PUT':
+            data = request.json
+            
+            # Actualizar campos
+            afiliado.affiliate_code = data.get('affiliate_code', afiliado.affiliate_code)
+            afiliado.affiliate_name = data.get('affiliate_name', afiliado.affiliate_name)
+            afiliado.dni = data.get('dni', afiliado.dni)
+            afiliado.gender = data.get('gender', afiliado.gender)
+            afiliado.contact = data.get('contact', afiliado.contact)
+            afiliado.sector_id = data.get('sector_id', afiliado.sector_id)
+            afiliado.has_children = data.get('has_children', afiliado.has_children)
+            afiliado.has_disability = data.get('has_disability', afiliado.has_disability)
+            
+            db.session.commit()
+            return jsonify(afiliado.to_dict())
+            
+        elif request.method == 'DELETE':
+            db.session.delete(afiliado)
+            db.session.commit()
+            return jsonify({'message': 'Afiliado eliminado correctamente'})
+            
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/afiliados/<int:id>', methods=['DELETE'])
+def delete_affiliate(id):
+    try:
+        print(f"Intentando eliminar afiliado con ID: {id}")
+        
+        # Buscar y eliminar el afiliado
+        affiliate = Afiliado.query.get(id)
+        
+        if not affiliate:
+            return jsonify({'error': 'Afiliado no encontrado'}), 404
+            
+        print(f"Afiliado encontrado: {affiliate.affiliate_name}")
+        
+        # Eliminar directamente
+        db.session.delete(affiliate)
+        db.session.commit()
+        
+        print("Afiliado eliminado exitosamente")
+        
+        return jsonify({
+            'success': True,
+            'message': 'Afiliado eliminado correctamente',
+            'deleted_id': id
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al eliminar afiliado: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@bp.route('/afiliados/<int:affiliate_id>/children', methods=['GET'])
+def get_affiliate_children(affiliate_id):
+    try:
+        children = Child.query.filter_by(affiliate_id=affiliate_id).all()
+        return jsonify([{
+            'child_id': child.child_id,
+            'first_name': child.first_name,
+            'last_name': child.last_name,
+            'birth_date': child.birth_date.isoformat() if child.birth_date else None,
+            'gender': child.gender,
+            'has_disability': child.has_disability
+        } for child in children]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Ficha del afiliado en un solo pedido: datos, hijos, entregas por
+# destinatario y beneficios vigentes que todavía le corresponden
+@bp.route('/afiliados/<int:affiliate_id>/profile', methods=['GET'])
+def get_affiliate_profile(affiliate_id):
+    try:
+        found = profiles.load(db.session, [affiliate_id], parse_as_of(request.args.get('as_of')))
+        if not found:
+            return jsonify({'error': 'Afiliado no encontrado'}), 404
+        return jsonify(found[0])
+    except EligibilityError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Variante en bloque para las pantallas por sector: ?ids=1,2,3
+@bp.route('/afiliados/profiles', methods=['GET'])
+def get_affiliate_profiles():
+    try:
+        ids = parse_ids(request.args.get('ids'))
+        items = profiles.load(db.session, ids, parse_as_of(request.args.get('as_of')))
+        found = {item['affiliate']['id_associate'] for item in items}
+        return jsonify({
+            'items': items,
+            'missing': [affiliate_id for affiliate_id in ids if affiliate_id not in found]
+        })
+    except (ProfileError, EligibilityError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
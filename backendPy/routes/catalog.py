@@ -0,0 +1,201 @@
+from flask import Blueprint, jsonify, request
+
+from eligibility import EligibilityError, parse_age_range, parse_as_of
+from extensions import eligibility, live_feed
+from models import Benefit, Sector, db
+from pagination import PaginationError, keyset_paginate, parse_bool, parse_limit
+from routes.common import cached_listing, versioned_collection
+from serialization import Projection
+
+# Datos de referencia: sectores y beneficios (listados cacheados) y la
+# búsqueda de destinatarios elegibles de cada beneficio
+bp = Blueprint('catalog', __name__)
+
+# Columnas de cada listado (mismos nombres que to_dict())
+SECTOR_FIELDS = Projection(Sector.sector_id, Sector.sector_name)
+
+BENEFIT_FIELDS = Projection(
+    Benefit.id, Benefit.name, Benefit.type, Benefit.age_range, Benefit.stock, Benefit.stock_rest,
+    Benefit.status, Benefit.is_available, Benefit.created_at, Benefit.updated_at
+)
+
+# Rutas de la API para el historial de sectores
+@bp.route('/sectors', methods=['GET'])
+def get_sectors():
+    try:
+        return versioned_collection('sectors', SECTOR_FIELDS, Sector.sector_id,
+                                    lambda version: cached_listing('sectors', SECTOR_FIELDS, version))
+    except Exception as e:
+        print("Error al obtener sectores:", str(e))  # Debug
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/benefits', methods=['POST'])
+def create_benefit():
+    try:
+        data = request.json
+        print("Datos recibidos del beneficio:", data)  # Debug
+
+        # Validar datos requeridos
+        required_fields = ['name', 'type']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'El campo {field} es requerido'}), 400
+
+        # Un rango de edad con topes invertidos no se puede evaluar
+        parse_age_range(data.get('age_range'))
+
+        # Crear nuevo beneficio
+        new_benefit = Benefit(
+            name=data['name'],
+            type=data['type'],
+            age_range=data.get('age_range'),
+            stock=data.get('stock', 0),
+            stock_rest=data.get('stock', 0),  # Inicialmente igual al stock
+            status=data.get('status', 'Disponible'),
+            is_available=data.get('is_available', True)
+        )
+
+        db.session.add(new_benefit)
+        db.session.commit()
+        
+        print("Beneficio creado:", new_benefit.to_dict())  # Debug
+        
+        return jsonify(new_benefit.to_dict()), 201
+
+    except EligibilityError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        print("Error al crear beneficio:", str(e))  # Debug
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/benefits/<int:id>', methods=['PUT'])
+def update_benefit(id):
+    try:
+        print(f"Intentando actualizar beneficio con ID: {id}")  # Debug
+        
+        benefit = Benefit.query.get_or_404(id)
+        if not benefit:
+            return jsonify({'error': 'Beneficio no encontrado'}), 404
+            
+        data = request.json
+        print("Datos recibidos:", data)  # Debug
+
+        parse_age_range(data.get('age_range'))
+
+        # Actualizar campos
+        benefit.name = data.get('name', benefit.name)
+        benefit.type = data.get('type', benefit.type)
+        benefit.age_range = data.get('age_range', benefit.age_range)
+        benefit.stock = data.get('stock', benefit.stock)
+        benefit.stock_rest = data.get('stock_rest', benefit.stock_rest)
+        benefit.status = data.get('status', benefit.status)
+        benefit.is_available = data.get('is_available', benefit.is_available)
+        live_feed.stock_changed(db.session, [benefit.id])
+
+        db.session.commit()
+        
+        print("Beneficio actualizado:", benefit.to_dict())  # Debug
+        
+        return jsonify(benefit.to_dict()), 200
+
+    except EligibilityError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al actualizar beneficio: {str(e)}")  # Debug
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/benefits/<int:id>', methods=['DELETE', 'OPTIONS'])
+def delete_benefit(id):
+    if request.method == 'OPTIONS':
+        return '', 200
+        
+    try:
+        print(f"Intentando eliminar beneficio con ID: {id}")  # Debug
+        
+        benefit = Benefit.query.get_or_404(id)
+        if not benefit:
+            return jsonify({'error': 'Beneficio no encontrado'}), 404
+            
+        db.session.delete(benefit)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Beneficio eliminado correctamente',
+            'id': id
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al eliminar beneficio: {str(e)}")  # Debug
+        return jsonify({'error': str(e)}), 500
+
+# Destinatarios elegibles de un beneficio: hijos dentro del rango de edad (o
+# afiliados si el beneficio no tiene rango) que todavía no lo recibieron
+@bp.route('/benefits/<int:id>/eligible', methods=['GET'])
+def get_eligible_recipients(id):
+    try:
+        benefit = db.session.get(Benefit, id)
+        if not benefit:
+            return jsonify({'error': 'Beneficio no encontrado'}), 404
+
+        bounds = parse_age_range(benefit.age_range)
+        filters = {
+            'sector_id': request.args.get('sector_id', type=int),
+            'gender': request.args.get('gender'),
+            'has_disability': parse_bool(request.args.get('has_disability')),
+            'include_delivered': parse_bool(request.args.get('include_delivered')) is True
+        }
+        if bounds is not None:
+            query, key = eligibility.children_query(
+                db.session, id, bounds, parse_as_of(request.args.get('as_of')), **filters)
+        else:
+            query, key = eligibility.affiliates_query(db.session, id, **filters)
+
+        rows, next_cursor, total = keyset_paginate(
+            query,
+            'id',
+            key,
+            key,
+            cursor=request.args.get('cursor'),
+            limit=parse_limit(request.args.get('limit')),
+            with_total=parse_bool(request.args.get('count')) is not False
+        )
+        return jsonify({
+            'benefit_id': id,
+            'recipient_type': 'child' if bounds is not None else 'affiliate',
+            'age_bounds': bounds.to_dict() if bounds is not None else None,
+            'items': [row._asdict() for row in rows],
+            'next_cursor': next_cursor,
+            'total': total
+        })
+    except (EligibilityError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/benefits', methods=['GET'])
+def get_benefits():
+    try:
+        def full_response(version):
+            # ?is_available=true lee sólo los vigentes (índice parcial
+            # ix_benefits_available); la lista completa sale del cache
+            is_available = parse_bool(request.args.get('is_available'))
+            if is_available is None:
+                return cached_listing('benefits', BENEFIT_FIELDS, version)
+            return jsonify(BENEFIT_FIELDS.fetch(
+                db.session, BENEFIT_FIELDS.parse_fields(request.args.get('fields')),
+                where=Benefit.is_available if is_available else ~Benefit.is_available,
+                order_by=Benefit.id
+            ))
+
+        return versioned_collection('benefits', BENEFIT_FIELDS, Benefit.id, full_response)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print("Error al obtener beneficios:", str(e))  # Debug
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,123 @@
+from flask import Blueprint, current_app, jsonify, request
+
+from models import Child, db
+from routes.common import versioned_collection
+from serialization import Projection
+
+bp = Blueprint('children', __name__)
+
+# Columnas del listado (mismos nombres que to_dict())
+CHILD_FIELDS = Projection(
+    Child.child_id, Child.affiliate_id, Child.first_name, Child.last_name, Child.birth_date,
+    Child.dni, Child.gender, Child.has_disability, Child.notes, Child.created_at
+)
+
+@bp.route('/children', methods=['GET'])
+def get_children():
+    try:
+        def full_response(version):
+            children = CHILD_FIELDS.fetch(db.session, CHILD_FIELDS.parse_fields(request.args.get('fields')))
+            if not children:
+                return jsonify({'message': 'No children found'}), 404
+            return jsonify(children)
+
+        return versioned_collection('children', CHILD_FIELDS, Child.child_id, full_response)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/hijos', methods=['POST'])
+def create_child():
+    try:
+        data = request.json
+        print("Datos recibidos:", data)  # Debug
+
+        # Validar datos requeridos
+        required_fields = ['affiliate_id', 'first_name', 'last_name', 'birth_date', 'gender']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'El campo {field} es requerido'}), 400
+
+        # Crear nuevo hijo
+        new_child = Child(
+            affiliate_id=data['affiliate_id'],
+            first_name=data['first_name'],
+            last_name=data['last_name'],
+            birth_date=data['birth_date'],
+            dni=data.get('dni', ''),
+            gender=data['gender'],
+            has_disability=data.get('has_disability', False),
+            notes=data.get('notes', '')
+        )
+
+        db.session.add(new_child)
+        db.session.commit()
+        
+        print("Hijo creado:", new_child.to_dict())  # Debug
+        
+        return jsonify(new_child.to_dict()), 201
+
+    except Exception as e:
+        db.session.rollback()
+        print("Error al crear hijo:", str(e))  # Debug
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/hijos/<int:child_id>', methods=['PUT'])
+def update_child(child_id):
+    try:
+        child = Child.query.get_or_404(child_id)
+        data = request.json
+
+        # Actualizar campos
+        child.affiliate_id = data.get('affiliate_id', child.affiliate_id)
+        child.first_name = data.get('first_name', child.first_name)
+        child.last_name = data.get('last_name', child.last_name)
+        child.birth_date = data.get('birth_date', child.birth_date)
+        child.dni = data.get('dni', child.dni)
+        child.gender = data.get('gender', child.gender)
+        child.has_disability = data.get('has_disability', child.has_disability)
+        child.notes = data.get('notes', child.notes)
+
+        db.session.commit()
+        return jsonify(child.to_dict()), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/hijos/<int:child_id>', methods=['DELETE', 'OPTIONS'])
+def delete_child(child_id):
+    if request.method == 'OPTIONS':
+        # Manejar la solicitud preflight CORS
+        response = current_app.make_default_options_response()
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        response.headers.add('Access-Control-Allow-Methods', 'DELETE')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
+        return response
+
+    try:
+        print(f"Intentando eliminar hijo con ID: {child_id}")  # Debug
+        
+        child = Child.query.get_or_404(child_id)
+        if not child:
+            return jsonify({'error': f'No se encontró el hijo con ID {child_id}'}), 404
+            
+        print(f"Hijo encontrado: {child.first_name} {child.last_name}")  # Debug
+        
+        # Guardar información para el mensaje de respuesta
+        child_info = f"{child.first_name} {child.last_name}"
+        
+        # Eliminar el hijo
+        db.session.delete(child)
+        db.session.commit()
+        
+        print(f"Hijo eliminado exitosamente: {child_info}")  # Debug
+        
+        return jsonify({
+            'message': f'Hijo {child_info} eliminado correctamente',
+            'child_id': child_id
+        }), 200
+        
+    except Exception as e:
+        print(f"Error al eliminar hijo: {str(e)}")  # Debug
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
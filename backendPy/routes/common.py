@@ -0,0 +1,74 @@
+from flask import current_app, jsonify, make_response, request
+
+from extensions import change_log, response_cache
+from models import db
+from replicas import read_from_primary
+from serialization import FieldsError
+from sync import SyncError, make_etag, parse_since
+
+# Respuestas compartidas por varios blueprints
+
+def versioned_collection(collection, projection, key_column, full_response):
+    """Responde un listado con ETag, 304 si no cambió y ?since= para deltas.
+
+    full_response(version) arma la lista completa. version es la del ETag:
+    si la respuesta sale de un cache, tiene que cubrir al menos esa versión,
+    porque el cliente guarda X-Collection-Version y después pide ?since=
+    desde ahí (ver cached_listing).
+    """
+    try:
+        latest, settled = change_log.versions(db.session, collection)
+        etag = make_etag(collection, latest, request.query_string)
+        # Comparación débil: con compresión el ETag se envía como W/"..."
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+
+        since = request.args.get('since')
+        if since is not None:
+            since = parse_since(since, latest, change_log.floor(db.session, collection))
+            upserted_ids, deleted = change_log.changes_since(db.session, collection, since, latest)
+            fields = projection.parse_fields(request.args.get('fields'), required=(key_column.key,))
+            rows = projection.fetch(db.session, fields, where=key_column.in_(upserted_ids)) \
+                if upserted_ids else []
+            found = {row[key_column.key] for row in rows}
+            deleted += [entity_id for entity_id in upserted_ids if entity_id not in found]
+            version = max(settled, since) if isinstance(since, int) else settled
+            response = jsonify({
+                'version': version,
+                'upserted': rows,
+                'deleted': deleted
+            })
+        else:
+            response = make_response(full_response(latest))
+            version = settled
+
+        if response.status_code == 200:
+            response.set_etag(etag)
+            response.headers['X-Collection-Version'] = str(version)
+        return response
+    except SyncError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except FieldsError as e:
+        return jsonify({'error': str(e)}), 400
+
+def cached_listing(key, projection, version):
+    # Sólo la lista completa pasa por el cache; con ?fields= se consulta directo.
+    # Una copia guardada antes de version (otro worker, TTL sin vencer) se descarta
+    fields = projection.parse_fields(request.args.get('fields'))
+    if request.args.get('fields'):
+        return jsonify(projection.fetch(db.session, fields))
+
+    def produce():
+        # El cache lo comparten todos los clientes: se llena con datos del primario
+        read_from_primary()
+        return projection.fetch(db.session)
+
+    return response_cache.json_response(current_app, key, produce, version=version)
+
+def job_accepted(job_id):
+    response = jsonify({'id': job_id, 'status': 'queued', 'status_url': f'/jobs/{job_id}'})
+    response.status_code = 202
+    response.headers['Location'] = f'/jobs/{job_id}'
+    return response
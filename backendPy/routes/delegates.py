@@ -0,0 +1,150 @@
+from flask import Blueprint, jsonify, request
+from sqlalchemy import and_
+
+from extensions import delegate_balances
+from models import Delegate, db
+from pagination import PaginationError, parse_bool
+from routes.common import versioned_collection
+from serialization import Projection
+
+bp = Blueprint('delegates', __name__)
+
+# Columnas del listado (mismos nombres que to_dict())
+DELEGATE_FIELDS = Projection(
+    Delegate.id, Delegate.first_name, Delegate.last_name, Delegate.dni, Delegate.sector_id,
+    Delegate.is_active, Delegate.status, Delegate.created_at, Delegate.updated_at
+)
+
+# Rutas de la API para obtener el historial de delegados
+@bp.route('/delegates', methods=['GET'])
+def get_delegate():
+    try:
+        def full_response(version):
+            # ?sector_id= y ?is_active= filtran en la base (activos por sector
+            # usan el índice parcial ix_delegates_active_sector)
+            conditions = []
+            if request.args.get('sector_id'):
+                conditions.append(Delegate.sector_id == request.args.get('sector_id', type=int))
+            is_active = parse_bool(request.args.get('is_active'))
+            if is_active is not None:
+                conditions.append(Delegate.is_active if is_active else ~Delegate.is_active)
+            delegates = DELEGATE_FIELDS.fetch(
+                db.session, DELEGATE_FIELDS.parse_fields(request.args.get('fields')),
+                where=and_(*conditions) if conditions else None,
+                order_by=Delegate.id if conditions else None
+            )
+            if not delegates:
+                return jsonify({'message': 'No delegates found'}), 404
+            return jsonify(delegates)
+
+        return versioned_collection('delegates', DELEGATE_FIELDS, Delegate.id, full_response)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Lo que cada delegado todavía tiene en mano, por beneficio (una fila de
+# delegate_balances por beneficio, sin sumar asignaciones y entregas)
+@bp.route('/delegates/<int:delegate_id>/balances', methods=['GET'])
+def get_delegate_balances(delegate_id):
+    try:
+        if not db.session.get(Delegate, delegate_id):
+            return jsonify({'error': 'Delegado no encontrado'}), 404
+        return jsonify(delegate_balances.for_delegate(db.session, delegate_id)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Rutas de la API para crear un delegado
+@bp.route('/delegados', methods=['POST'])
+def create_delegate():
+    try:
+        data = request.json
+        print("Datos recibidos:", data)  # Debug
+
+        # Validar datos requeridos
+        required_fields = ['first_name', 'last_name', 'dni', 'sector_id']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'El campo {field} es requerido'}), 400
+
+        # Crear nuevo delegado
+        new_delegate = Delegate(
+            first_name=data['first_name'],
+            last_name=data['last_name'],
+            dni=data['dni'],
+            sector_id=data['sector_id'],
+            is_active=data.get('is_active', True)
+        )
+
+        db.session.add(new_delegate)
+        db.session.commit()
+        
+        print("Delegado creado:", new_delegate.to_dict())  # Debug
+        
+        return jsonify(new_delegate.to_dict()), 201
+
+    except Exception as e:
+        db.session.rollback()
+        print("Error al crear delegado:", str(e))  # Debug
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/delegados/<int:id>', methods=['PUT'])
+def update_delegate(id):
+    try:
+        delegate = Delegate.query.get_or_404(id)
+        data = request.json
+
+        # Verificar si el DNI ya existe, excluyendo el delegado actual
+        existing_delegate = Delegate.query.filter(
+            Delegate.dni == data['dni'],
+            Delegate.id != id
+        ).first()
+        
+        if existing_delegate:
+            return jsonify({'error': 'El DNI ya está registrado para otro delegado'}), 400
+
+        # Actualizar los datos del delegado
+        delegate.first_name = data.get('first_name', delegate.first_name)
+        delegate.last_name = data.get('last_name', delegate.last_name)
+        delegate.dni = data.get('dni', delegate.dni)
+        delegate.sector_id = data.get('sector_id', delegate.sector_id)
+        delegate.is_active = data.get('is_active', delegate.is_active)
+
+        db.session.commit()
+        
+        return jsonify(delegate.to_dict()), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/delegados/<int:id>', methods=['DELETE'])
+def delete_delegate(id):
+    try:
+        print(f"Intentando eliminar delegado con ID: {id}")  # Debug
+        
+        delegate = Delegate.query.get_or_404(id)
+        if not delegate:
+            return jsonify({'error': 'Delegado no encontrado'}), 404
+            
+        print(f"Delegado encontrado: {delegate.first_name} {delegate.last_name}")  # Debug
+        
+        # Eliminar el delegado
+        db.session.delete(delegate)
+        db.session.commit()
+        
+        print("Delegado eliminado exitosamente")  # Debug
+        
+        return jsonify({
+            'success': True,
+            'message': 'Delegado eliminado correctamente',
+            'deleted_id': id
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al eliminar delegado: {str(e)}")  # Debug
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
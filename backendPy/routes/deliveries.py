@@ -0,0 +1,338 @@
+import logging
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload
+
+from balances import InsufficientBalance
+from extensions import auditor, delegate_balances, live_feed
+from models import Afiliado, Benefit, BenefitDelivery, Child, Delegate, DelegateAssignment, db
+from pagination import PaginationError, parse_datetime
+from serialization import FieldsError, Projection
+import stock
+
+# Asignaciones de stock a delegados y entregas de beneficios
+bp = Blueprint('deliveries', __name__)
+log = logging.getLogger('ate.deliveries')
+
+def stock_error_response(error):
+    body = {'error': str(error)}
+    if isinstance(error, stock.InsufficientStock):
+        body.update({
+            'benefit_id': error.benefit_id,
+            'requested': error.requested,
+            'available': error.available
+        })
+    if isinstance(error, InsufficientBalance):
+        body['delegate_id'] = error.delegate_id
+    return jsonify(body), error.status_code
+
+@bp.route('/delegate-assignments', methods=['POST'])
+def create_delegate_assignment():
+    try:
+        data = request.json
+        print("Datos recibidos:", data)  # Debug
+        
+        # Validar datos requeridos
+        required_fields = ['delegate_id', 'benefit_id', 'quantity']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'El campo {field} es requerido'}), 400
+        quantity = stock.parse_quantity(data['quantity'])
+
+        # Descontar el stock restante en un solo UPDATE condicional
+        benefit = stock.reserve(db.session, Benefit, data['benefit_id'], quantity)
+
+        # Crear la asignación
+        new_assignment = DelegateAssignment(
+            delegate_id=data['delegate_id'],
+            benefit_id=data['benefit_id'],
+            quantity=quantity
+        )
+        
+        db.session.add(new_assignment)
+        db.session.flush()
+        delegate_balances.credit(db.session, new_assignment.delegate_id, new_assignment.benefit_id,
+                                 quantity)
+        live_feed.stock_changed(db.session, [benefit.id])
+
+        response = {
+            'assignment': new_assignment.to_dict(),
+            'benefit': benefit.to_dict()
+        }
+        db.session.commit()
+        
+        return jsonify(response), 201
+
+    except stock.StockError as e:
+        db.session.rollback()
+        return stock_error_response(e)
+    except Exception as e:
+        db.session.rollback()
+        print("Error en la asignación:", str(e))  # Debug
+        return jsonify({'error': str(e)}), 500
+
+# Entregas con los nombres relacionados resueltos en la misma fila
+DELIVERY_FIELDS = Projection(
+    BenefitDelivery.delivery_id, BenefitDelivery.delegate_id, BenefitDelivery.affiliate_id,
+    BenefitDelivery.benefit_id, BenefitDelivery.child_id, BenefitDelivery.quantity,
+    BenefitDelivery.delivery_date, BenefitDelivery.notes, BenefitDelivery.status,
+    BenefitDelivery.recipient_type,
+    benefit_name=Benefit.name,
+    delegate_name=Delegate.first_name + ' ' + Delegate.last_name,
+    affiliate_name=Afiliado.affiliate_name,
+    child_name=Child.first_name + ' ' + Child.last_name
+)
+
+def list_deliveries(args):
+    # Una sola consulta con JOIN: los nombres relacionados vienen en la misma fila
+    fields = DELIVERY_FIELDS.parse_fields(args.get('fields'))
+    query = (
+        db.session.query(*DELIVERY_FIELDS.entities(fields))
+        .select_from(BenefitDelivery)
+        .outerjoin(Benefit, BenefitDelivery.benefit_id == Benefit.id)
+        .outerjoin(Delegate, BenefitDelivery.delegate_id == Delegate.id)
+        .outerjoin(Afiliado, BenefitDelivery.affiliate_id == Afiliado.id_associate)
+        .outerjoin(Child, BenefitDelivery.child_id == Child.child_id)
+    )
+    for field in ('benefit_id', 'delegate_id', 'affiliate_id'):
+        if args.get(field):
+            query = query.filter(getattr(BenefitDelivery, field) == args.get(field, type=int))
+    # Con fechas, en PostgreSQL sólo se leen las particiones de esos meses
+    date_from = parse_datetime(args.get('date_from'))
+    date_to = parse_datetime(args.get('date_to'))
+    if date_from:
+        query = query.filter(BenefitDelivery.delivery_date >= date_from)
+    if date_to:
+        query = query.filter(BenefitDelivery.delivery_date < date_to)
+
+    return DELIVERY_FIELDS.rows(query.order_by(BenefitDelivery.delivery_id), fields)
+
+@bp.route('/delegate-assignments', methods=['GET'])
+def get_delegate_assignments():
+    try:
+        # delegate y benefit se cargan en el mismo SELECT que las asignaciones
+        query = db.session.query(DelegateAssignment).options(
+            joinedload(DelegateAssignment.delegate),
+            joinedload(DelegateAssignment.benefit)
+        )
+        for field in ('delegate_id', 'benefit_id'):
+            if request.args.get(field):
+                query = query.filter(
+                    getattr(DelegateAssignment, field) == request.args.get(field, type=int)
+                )
+        assignments = query.order_by(DelegateAssignment.id).all()
+        return jsonify([assignment.to_dict() for assignment in assignments]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/benefit-deliveries', methods=['GET', 'POST'])
+def benefit_delivery_operations():
+    if request.method == 'GET':
+        try:
+            return jsonify(list_deliveries(request.args))
+        except (FieldsError, PaginationError) as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    if request.method == 'POST':
+        try:
+            data = request.json
+            print("Datos recibidos de la entrega:", data)  # Debug
+
+            # Validar datos requeridos
+            required_fields = ['delegate_id', 'benefit_id', 'quantity', 'recipient_type']
+            for field in required_fields:
+                if field not in data:
+                    return jsonify({'error': f'El campo {field} es requerido'}), 400
+            quantity = stock.parse_quantity(data['quantity'])
+
+            # El delegado sólo entrega lo que tiene asignado y sin entregar. El
+            # stock del beneficio ya se descontó al asignárselo: acá no se toca
+            delegate_balances.debit(db.session, data['delegate_id'], data['benefit_id'], quantity)
+
+            # Crear nueva entrega
+            new_delivery = BenefitDelivery(
+                delegate_id=data['delegate_id'],
+                affiliate_id=data.get('affiliate_id'),
+                benefit_id=data['benefit_id'],
+                child_id=data.get('child_id'),
+                quantity=quantity,
+                notes=data.get('notes', ''),
+                recipient_type=data['recipient_type']
+            )
+
+            db.session.add(new_delivery)
+            db.session.flush()
+            live_feed.delivered(db.session, [new_delivery.delivery_id])
+            db.session.commit()
+
+            return jsonify(new_delivery.to_dict()), 201
+
+        except stock.StockError as e:
+            db.session.rollback()
+            return stock_error_response(e)
+        except Exception as e:
+            db.session.rollback()
+            print("Error al crear entrega:", str(e))  # Debug
+            return jsonify({'error': str(e)}), 500
+
+# Máximo de entregas aceptadas en un solo lote
+BULK_DELIVERY_LIMIT = 5000
+# Referencias de cada entrega del lote: tienen que ser enteros (o faltar, las opcionales)
+BULK_ID_FIELDS = ('delegate_id', 'benefit_id', 'affiliate_id', 'child_id')
+
+def _invalid_id_field(item):
+    for field in BULK_ID_FIELDS:
+        value = item.get(field)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+            return field
+    return None
+
+def _existing_ids(column, ids):
+    if not ids:
+        return set()
+    return {row[0] for row in db.session.query(column).filter(column.in_(ids))}
+
+@bp.route('/benefit-deliveries/bulk', methods=['POST'])
+def bulk_benefit_deliveries():
+    try:
+        data = request.json or {}
+        items = data.get('deliveries') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Se requiere una lista de entregas'}), 400
+        if len(items) > BULK_DELIVERY_LIMIT:
+            return jsonify({'error': f'Máximo {BULK_DELIVERY_LIMIT} entregas por lote'}), 400
+
+        errors = {}
+        valid = {}
+        required_fields = ['delegate_id', 'benefit_id', 'quantity', 'recipient_type']
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors[index] = 'Formato de entrega inválido'
+                continue
+            missing = [field for field in required_fields if field not in item]
+            if missing:
+                errors[index] = f'El campo {missing[0]} es requerido'
+                continue
+            invalid = _invalid_id_field(item)
+            if invalid:
+                errors[index] = f'El campo {invalid} debe ser un número entero'
+                continue
+            try:
+                valid[index] = dict(item, quantity=stock.parse_quantity(item['quantity']))
+            except stock.StockError as e:
+                errors[index] = str(e)
+
+        # Validar referencias con una consulta por tabla
+        delegate_ids = _existing_ids(Delegate.id, {i['delegate_id'] for i in valid.values()})
+        benefit_ids = _existing_ids(Benefit.id, {i['benefit_id'] for i in valid.values()})
+        affiliate_ids = _existing_ids(
+            Afiliado.id_associate,
+            {i['affiliate_id'] for i in valid.values() if i.get('affiliate_id') is not None}
+        )
+        child_ids = {i['child_id'] for i in valid.values() if i.get('child_id') is not None}
+        child_owners = dict(
+            db.session.query(Child.child_id, Child.affiliate_id).filter(Child.child_id.in_(child_ids))
+        ) if child_ids else {}
+
+        for index, item in list(valid.items()):
+            error = None
+            if item['delegate_id'] not in delegate_ids:
+                error = 'Delegado no encontrado'
+            elif item['benefit_id'] not in benefit_ids:
+                error = 'Beneficio no encontrado'
+            elif item.get('affiliate_id') is not None and item['affiliate_id'] not in affiliate_ids:
+                error = 'Afiliado no encontrado'
+            elif item.get('child_id') is not None:
+                if item['child_id'] not in child_owners:
+                    error = 'Hijo no encontrado'
+                elif (item.get('affiliate_id') is not None
+                      and child_owners[item['child_id']] != item['affiliate_id']):
+                    error = 'El hijo no pertenece al afiliado indicado'
+            if error:
+                errors[index] = error
+                del valid[index]
+
+        # Verificar el saldo de cada delegado en bloque; el stock del beneficio
+        # ya se descontó al asignárselo
+        accepted, rejected = delegate_balances.allocate(
+            db.session,
+            [(index, item['delegate_id'], item['benefit_id'], item['quantity'])
+             for index, item in valid.items()]
+        )
+        for index, error in rejected.items():
+            errors[index] = str(error)
+        delegate_balances.debit_many(
+            db.session,
+            [(valid[index]['delegate_id'], valid[index]['benefit_id'], valid[index]['quantity'])
+             for index in accepted]
+        )
+
+        rows = [{
+            'delegate_id': valid[index]['delegate_id'],
+            'affiliate_id': valid[index].get('affiliate_id'),
+            'benefit_id': valid[index]['benefit_id'],
+            'child_id': valid[index].get('child_id'),
+            'quantity': valid[index]['quantity'],
+            'notes': valid[index].get('notes', ''),
+            'status': 'Entregado',
+            'recipient_type': valid[index]['recipient_type']
+        } for index in accepted]
+
+        delivery_ids = {}
+        if rows:
+            table = BenefitDelivery.__table__
+            result = db.session.execute(
+                insert(table).returning(table.c.delivery_id, sort_by_parameter_order=True),
+                rows
+            )
+            delivery_ids = dict(zip(accepted, result.scalars()))
+            # El INSERT masivo no pasa por el unit of work: un evento resumen
+            auditor.record(db.session, 'create', 'delivery',
+                           f'Carga masiva de {len(delivery_ids)} entregas', path='/afiliados')
+            live_feed.delivered(db.session, delivery_ids.values())
+        db.session.commit()
+
+        results = []
+        for index in range(len(items)):
+            if index in delivery_ids:
+                results.append({'index': index, 'status': 'ok', 'delivery_id': delivery_ids[index]})
+            else:
+                results.append({'index': index, 'status': 'error', 'error': errors[index]})
+
+        return jsonify({
+            'created': len(delivery_ids),
+            'failed': len(errors),
+            'results': results
+        }), 201 if delivery_ids else 400
+
+    except Exception as e:
+        db.session.rollback()
+        log.exception('Error en la carga masiva de entregas')
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/benefit-deliveries/<int:delivery_id>', methods=['GET', 'DELETE'])
+def benefit_delivery_detail(delivery_id):
+    try:
+        delivery = db.session.get(BenefitDelivery, delivery_id)
+        if not delivery:
+            return jsonify({'error': 'Entrega no encontrada'}), 404
+        
+        if request.method == 'GET':
+            return jsonify(delivery.to_dict())
+            
+        if request.method == 'DELETE':
+            # Las unidades vuelven al saldo del delegado, no al stock del beneficio
+            delegate_balances.refund(db.session, delivery.delegate_id, delivery.benefit_id,
+                                     delivery.quantity)
+            
+            db.session.delete(delivery)
+            db.session.commit()
+            
+            return jsonify({'message': 'Entrega eliminada correctamente'})
+            
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,229 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import Blueprint, current_app, jsonify, request, send_from_directory
+
+from export import EXPORT_FORMATS, ExportError, stream_export
+from extensions import change_log, delegate_balances, delivery_partitions, job_queue, statistics
+from jobs import JobError, JobFailed, log, run_pool
+from models import Job, db
+from pagination import PaginationError, parse_datetime
+from partitions import PartitionError
+import roster_import
+from routes.common import job_accepted
+from routes.reports import EXPORTS
+from routes.roster import run_roster_import
+from stats import StatsError, parse_month
+
+# Trabajos en segundo plano (ver jobs.py): la tabla jobs es la cola y los
+# procesos de `flask jobs-worker` la consumen
+bp = Blueprint('jobs', __name__, cli_group=None)
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+@job_queue.handler('import_roster')
+def import_roster_job(job):
+    path = job.payload['path']
+
+    def on_progress(report):
+        job.progress(message=f'{report.processed} filas procesadas, {report.error_count} con errores')
+
+    try:
+        with open(path, 'rb') as stream:
+            rows = roster_import.read_rows(stream, job.payload['filename'])
+            # Las filas se guardan con upsert: reintentar el archivo completo es seguro
+            report = run_roster_import(job.payload['kind'], rows,
+                                       roster_import.ImportReport(on_progress=on_progress))
+    except (roster_import.ImportFileError, FileNotFoundError) as e:
+        _remove_file(path)
+        raise JobFailed(str(e))
+    _remove_file(path)
+    return report.to_dict()
+
+def export_statement(payload):
+    entity = payload.get('entity')
+    if entity not in EXPORTS:
+        raise ExportError(f'Exportación inválida: {entity}')
+    if payload.get('format', 'csv') not in EXPORT_FORMATS:
+        raise ExportError(f"Formato inválido: {payload.get('format')}")
+    return EXPORTS[entity](
+        payload.get('sector_id'),
+        parse_datetime(payload.get('date_from')),
+        parse_datetime(payload.get('date_to'))
+    )
+
+@job_queue.handler('export')
+def export_job(job):
+    try:
+        statement = export_statement(job.payload)
+    except (ExportError, PaginationError) as e:
+        raise JobFailed(str(e))
+    fmt = job.payload.get('format', 'csv')
+    filename = f"{job.payload['entity']}-{job.id}.{fmt}"
+    jobs_dir = current_app.config['JOBS_DIR']
+    os.makedirs(jobs_dir, exist_ok=True)
+    size = 0
+    with open(os.path.join(jobs_dir, filename), 'w', encoding='utf-8', newline='') as output:
+        for batch, chunk in enumerate(stream_export(db.engine, statement, fmt), start=1):
+            output.write(chunk)
+            size += len(chunk)
+            if batch % 50 == 0:
+                job.progress(message=f'{size} caracteres escritos')
+    return {'file': filename, 'format': fmt, 'size': size}
+
+@job_queue.handler('refresh_stats')
+def refresh_stats_job(job):
+    statistics.rebuild(db.session)
+    db.session.commit()
+    job.progress(50, 'Entregas y asignaciones recalculadas')
+    statistics.refresh_age_ranges(db.session)
+    db.session.commit()
+    return {'refreshed_at': datetime.utcnow().isoformat()}
+
+@job_queue.handler('reconcile_balances')
+def reconcile_balances_job(job):
+    # Recalcula delegate_balances desde asignaciones y entregas; con
+    # dry_run sólo informa las diferencias
+    report = delegate_balances.reconcile(db.session, dry_run=bool(job.payload.get('dry_run')))
+    db.session.commit()
+    if report['drift_count']:
+        log.warning('Saldos de delegados con diferencias: %s', report['drift_count'])
+    return report
+
+# Las particiones de los próximos meses se crean una vez por día; el
+# trabajo se vuelve a encolar a sí mismo (`flask deliveries-partitions` lo inicia)
+PARTITION_CHECK_INTERVAL = timedelta(days=1)
+
+def schedule_partition_maintenance(run_after=None):
+    return job_queue.schedule('maintain_partitions', run_after=run_after)
+
+@job_queue.handler('maintain_partitions')
+def maintain_partitions_job(job):
+    # El próximo chequeo se encola antes de crear las particiones: si ensure()
+    # falla en todos los intentos la cadena diaria no se corta
+    schedule_partition_maintenance(datetime.now(timezone.utc) + PARTITION_CHECK_INTERVAL)
+    created = delivery_partitions.ensure(
+        db.engine, months_ahead=current_app.config['PARTITION_MONTHS_AHEAD'])
+    return {'created': [f'{month:%Y-%m}' for month in created]}
+
+# collection_changes se poda una vez por día; como las particiones, el
+# trabajo se vuelve a encolar a sí mismo (`flask prune-changes` lo inicia)
+PRUNE_CHANGES_INTERVAL = timedelta(days=1)
+
+def schedule_change_pruning(run_after=None):
+    return job_queue.schedule('prune_changes', run_after=run_after)
+
+def prune_changes():
+    before = datetime.now(timezone.utc) - timedelta(days=current_app.config['CHANGE_LOG_RETENTION_DAYS'])
+    pruned = change_log.prune(db.session, before)
+    db.session.commit()
+    return pruned
+
+@job_queue.handler('prune_changes')
+def prune_changes_job(job):
+    schedule_change_pruning(datetime.now(timezone.utc) + PRUNE_CHANGES_INTERVAL)
+    return {'pruned': prune_changes()}
+
+# Tipos que se pueden encolar por POST /jobs (la importación entra por /import)
+PUBLIC_JOBS = {'export': export_statement, 'refresh_stats': None, 'reconcile_balances': None}
+
+@bp.route('/jobs', methods=['POST'])
+def create_job():
+    try:
+        data = request.json or {}
+        kind = data.get('kind')
+        if kind not in PUBLIC_JOBS:
+            return jsonify({'error': f'Tipo de trabajo inválido: {kind}'}), 400
+        payload = data.get('payload') or {}
+        # Validar antes de encolar para que el error llegue en este request
+        if PUBLIC_JOBS[kind]:
+            PUBLIC_JOBS[kind](payload)
+        return job_accepted(job_queue.enqueue(kind, payload))
+    except (JobError, ExportError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    try:
+        job = db.session.get(Job, job_id)
+        if not job:
+            return jsonify({'error': 'Trabajo no encontrado'}), 404
+        data = job.to_dict()
+        if job.status == 'succeeded' and job.kind == 'export':
+            data['result_url'] = f'/jobs/{job_id}/result'
+        return jsonify(data)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/jobs/<int:job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    job = db.session.get(Job, job_id)
+    if not job or job.status != 'succeeded' or not (job.result or {}).get('file'):
+        return jsonify({'error': 'El trabajo no tiene un archivo de resultado'}), 404
+    fmt = job.result.get('format', 'csv')
+    return send_from_directory(current_app.config['JOBS_DIR'], job.result['file'],
+                               as_attachment=True, mimetype=EXPORT_FORMATS.get(fmt))
+
+@bp.cli.command('jobs-worker')
+@click.option('--processes', type=int, default=None,
+              help='Cantidad de procesos worker (por defecto JOBS_WORKERS)')
+@click.option('--poll', 'poll_interval', type=float, default=1.0,
+              help='Segundos de espera cuando la cola está vacía')
+@click.option('--until-idle', is_flag=True, help='Terminar cuando no queden trabajos')
+def jobs_worker_command(processes, poll_interval, until_idle):
+    """Procesa la cola de trabajos en segundo plano."""
+    app = current_app._get_current_object()
+    processes = processes or app.config['JOBS_WORKERS']
+    click.echo(f'Procesando trabajos con {processes} proceso(s)')
+    # Cada proceso hereda el contexto de la app del comando pero no las
+    # conexiones: descarta las del pool heredado y abre las suyas
+    run_pool(job_queue, processes, on_start=lambda: db.engine.dispose(close=False),
+             wrap=app.app_context, poll_interval=poll_interval, stop_when_idle=until_idle)
+
+@bp.cli.command('deliveries-partitions')
+@click.option('--months-ahead', type=int, default=None,
+              help='Meses a crear por adelantado (por defecto PARTITION_MONTHS_AHEAD)')
+def deliveries_partitions_command(months_ahead):
+    """Crea las particiones de entregas que falten y programa el chequeo diario."""
+    app = current_app._get_current_object()
+    if months_ahead is None:
+        months_ahead = app.config['PARTITION_MONTHS_AHEAD']
+    created = delivery_partitions.ensure(db.engine, months_ahead=months_ahead)
+    for month in created:
+        click.echo(f'Partición creada: {month:%Y-%m}')
+    if not created:
+        click.echo('No faltaban particiones')
+    schedule_partition_maintenance(datetime.now(timezone.utc) + PARTITION_CHECK_INTERVAL)
+
+@bp.cli.command('prune-changes')
+def prune_changes_command():
+    """Borra los cambios viejos de collection_changes y programa la poda diaria."""
+    pruned = prune_changes()
+    for collection, count in pruned.items():
+        click.echo(f'{collection}: {count} cambios borrados')
+    if not pruned:
+        click.echo('No había cambios para borrar')
+    schedule_change_pruning(datetime.now(timezone.utc) + PRUNE_CHANGES_INTERVAL)
+
+@bp.cli.command('deliveries-archive')
+@click.option('--before', required=True, help='Archivar los meses anteriores a este (AAAA-MM)')
+@click.option('--dir', 'directory', default=None, help='Directorio de los archivos (por defecto ARCHIVE_DIR)')
+def deliveries_archive_command(before, directory):
+    """Desprende las particiones de meses cerrados y las guarda en .csv.gz."""
+    app = current_app._get_current_object()
+    try:
+        archived = delivery_partitions.archive(db.engine, parse_month(before),
+                                               directory or app.config['ARCHIVE_DIR'])
+    except (PartitionError, StatsError) as e:
+        raise click.ClickException(str(e))
+    for record in archived:
+        click.echo(f"{record['month']:%Y-%m}: {record['row_count']} entregas en {record['file']}")
+    if not archived:
+        click.echo('No hay meses para archivar')
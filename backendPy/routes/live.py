@@ -0,0 +1,37 @@
+import asyncio
+
+import click
+from flask import Blueprint, current_app
+
+from extensions import change_log, live_feed
+from live import build_server
+from models import db
+from sync import install_sqlite_change_log
+
+# Stock y entregas en vivo por Server-Sent Events. No tiene rutas en la app:
+# `flask live-server` levanta un proceso aparte con un solo event loop que
+# mantiene abiertas todas las conexiones, en vez de ocupar un hilo de
+# gunicorn por cliente
+bp = Blueprint('live', __name__, cli_group=None)
+
+@bp.cli.command('live-server')
+@click.option('--host', default='0.0.0.0', help='Dirección donde escuchar')
+@click.option('--port', type=int, default=None, help='Puerto (por defecto LIVE_PORT)')
+def live_server_command(host, port):
+    """Sirve GET /stream con los cambios de stock y las entregas nuevas."""
+    app = current_app._get_current_object()
+    engine = db.engine
+    port = port or app.config['LIVE_PORT']
+
+    def prepare():
+        # Sin LISTEN/NOTIFY los cambios de stock se leen de collection_changes
+        if engine.dialect.name == 'sqlite':
+            install_sqlite_change_log(engine, change_log.collections)
+
+    server = build_server(live_feed, engine, app.config, prepare=prepare)
+    source = 'LISTEN/NOTIFY' if engine.dialect.name == 'postgresql' else 'consultas periódicas'
+    click.echo(f'Eventos en vivo en http://{host}:{port}/stream ({source})')
+    try:
+        asyncio.run(server.serve(host, port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,199 @@
+import click
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from sqlalchemy import select
+
+from export import EXPORT_FORMATS, ExportError, stream_export
+from extensions import job_queue, statistics
+from models import (Afiliado, Benefit, BenefitDelivery, Delegate, DelegateAssignment, Event, Sector,
+                    db)
+from pagination import PaginationError, keyset_paginate, parse_bool, parse_datetime, parse_limit
+from search import SearchError, parse_types, search
+from stats import StatsError, parse_month
+
+# Tablero, historial, búsqueda y exportaciones
+bp = Blueprint('reports', __name__, cli_group=None)
+
+EVENT_FILTERS = ('category', 'event_type', 'entity_id', 'user')
+
+def list_events(args):
+    query = db.session.query(Event)
+    for field in EVENT_FILTERS:
+        if args.get(field):
+            value = args.get(field, type=int) if field == 'entity_id' else args[field]
+            query = query.filter(getattr(Event, field) == value)
+    date_from = parse_datetime(args.get('date_from'))
+    if date_from:
+        query = query.filter(Event.date >= date_from)
+    date_to = parse_datetime(args.get('date_to'))
+    if date_to:
+        query = query.filter(Event.date < date_to)
+
+    # Los ids crecen en el orden en que se escriben: más recientes primero
+    events, next_cursor, total = keyset_paginate(
+        query,
+        'id',
+        Event.id,
+        Event.id,
+        cursor=args.get('cursor'),
+        limit=parse_limit(args.get('limit')),
+        descending=True,
+        with_total=parse_bool(args.get('count')) is True
+    )
+    return {
+        'items': [event.to_dict() for event in events],
+        'next_cursor': next_cursor,
+        'total': total
+    }
+
+# Agregados del tablero: deliveries por sector, beneficio y mes, stock y
+# hijos por rango de edad. El GET sólo lee: si los rangos de edad están
+# vencidos los sirve igual (con su refreshed_at) y encola refresh_stats,
+# que los recalcula en un worker contra el primario
+@bp.route('/stats', methods=['GET'])
+def get_stats():
+    try:
+        month_from = parse_month(request.args.get('month_from'))
+        month_to = parse_month(request.args.get('month_to'))
+        if statistics.age_ranges_stale(db.session):
+            job_queue.schedule('refresh_stats')
+        return jsonify(statistics.summary(db.session, month_from, month_to))
+    except StatsError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Historial persistente para HistoryPage
+@bp.route('/events', methods=['GET'])
+def get_events():
+    try:
+        return jsonify(list_events(request.args))
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Búsqueda indexada de afiliados, delegados e hijos por nombre, DNI y código
+@bp.route('/search', methods=['GET'])
+def search_people():
+    try:
+        hits, has_more = search(
+            db.session,
+            request.args.get('q'),
+            types=parse_types(request.args.get('type')),
+            limit=request.args.get('limit', 10, type=int),
+            page=request.args.get('page', 1, type=int)
+        )
+        return jsonify({
+            'items': hits,
+            'page': request.args.get('page', 1, type=int),
+            'has_more': has_more
+        }), 200
+    except SearchError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.cli.command('refresh-stats')
+def refresh_stats_command():
+    """Recalcula las tablas resumen de /stats (carga inicial y cron diario)."""
+    statistics.rebuild(db.session)
+    statistics.refresh_age_ranges(db.session)
+    db.session.commit()
+    click.echo('Estadísticas recalculadas')
+
+# Consultas de exportación: columnas planas con los nombres ya resueltos por JOIN
+def export_affiliates_query(sector_id, date_from, date_to):
+    affiliates, sectors = Afiliado.__table__, Sector.__table__
+    statement = (
+        select(affiliates.c.id_associate, affiliates.c.affiliate_code, affiliates.c.affiliate_name,
+               affiliates.c.dni, affiliates.c.gender, affiliates.c.contact, affiliates.c.sector_id,
+               sectors.c.sector_name, affiliates.c.has_children, affiliates.c.has_disability,
+               affiliates.c.created_at)
+        .select_from(affiliates.outerjoin(sectors, affiliates.c.sector_id == sectors.c.sector_id))
+        .order_by(affiliates.c.id_associate)
+    )
+    if sector_id is not None:
+        statement = statement.where(affiliates.c.sector_id == sector_id)
+    if date_from:
+        statement = statement.where(affiliates.c.created_at >= date_from)
+    if date_to:
+        statement = statement.where(affiliates.c.created_at < date_to)
+    return statement
+
+def export_deliveries_query(sector_id, date_from, date_to):
+    deliveries = BenefitDelivery.__table__
+    benefits, delegates, affiliates = Benefit.__table__, Delegate.__table__, Afiliado.__table__
+    statement = (
+        select(deliveries.c.delivery_id, deliveries.c.delivery_date, deliveries.c.benefit_id,
+               benefits.c.name.label('benefit_name'), deliveries.c.delegate_id,
+               (delegates.c.first_name + ' ' + delegates.c.last_name).label('delegate_name'),
+               deliveries.c.affiliate_id, affiliates.c.affiliate_name, affiliates.c.sector_id,
+               deliveries.c.child_id, deliveries.c.recipient_type, deliveries.c.quantity,
+               deliveries.c.status, deliveries.c.notes)
+        .select_from(
+            deliveries
+            .outerjoin(benefits, deliveries.c.benefit_id == benefits.c.id)
+            .outerjoin(delegates, deliveries.c.delegate_id == delegates.c.id)
+            .outerjoin(affiliates, deliveries.c.affiliate_id == affiliates.c.id_associate)
+        )
+        .order_by(deliveries.c.delivery_id)
+    )
+    if sector_id is not None:
+        statement = statement.where(affiliates.c.sector_id == sector_id)
+    if date_from:
+        statement = statement.where(deliveries.c.delivery_date >= date_from)
+    if date_to:
+        statement = statement.where(deliveries.c.delivery_date < date_to)
+    return statement
+
+def export_assignments_query(sector_id, date_from, date_to):
+    assignments = DelegateAssignment.__table__
+    benefits, delegates = Benefit.__table__, Delegate.__table__
+    statement = (
+        select(assignments.c.id, assignments.c.assignment_date, assignments.c.delegate_id,
+               (delegates.c.first_name + ' ' + delegates.c.last_name).label('delegate_name'),
+               delegates.c.sector_id, assignments.c.benefit_id,
+               benefits.c.name.label('benefit_name'), assignments.c.quantity)
+        .select_from(
+            assignments
+            .outerjoin(benefits, assignments.c.benefit_id == benefits.c.id)
+            .outerjoin(delegates, assignments.c.delegate_id == delegates.c.id)
+        )
+        .order_by(assignments.c.id)
+    )
+    if sector_id is not None:
+        statement = statement.where(delegates.c.sector_id == sector_id)
+    if date_from:
+        statement = statement.where(assignments.c.assignment_date >= date_from)
+    if date_to:
+        statement = statement.where(assignments.c.assignment_date < date_to)
+    return statement
+
+EXPORTS = {
+    'affiliates': export_affiliates_query,
+    'deliveries': export_deliveries_query,
+    'assignments': export_assignments_query,
+}
+
+# Exportación en streaming (CSV / NDJSON) para reportes
+@bp.route('/export/<entity>', methods=['GET'])
+def export_entity(entity):
+    if entity not in EXPORTS:
+        return jsonify({'error': f'Exportación inválida: {entity}'}), 404
+    try:
+        fmt = request.args.get('format', 'csv')
+        statement = EXPORTS[entity](
+            request.args.get('sector_id', type=int),
+            parse_datetime(request.args.get('date_from')),
+            parse_datetime(request.args.get('date_to'))
+        )
+        chunks = stream_export(db.engine, statement, fmt)
+        return Response(
+            stream_with_context(chunks),
+            mimetype=EXPORT_FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename={entity}.{fmt}'}
+        )
+    except (ExportError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
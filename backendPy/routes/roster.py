@@ -0,0 +1,85 @@
+import logging
+import os
+import uuid
+
+import click
+from flask import Blueprint, current_app, jsonify, request
+
+from extensions import auditor, job_queue
+from models import Afiliado, Child, Sector, db
+from pagination import parse_bool
+import roster_import
+from routes.common import job_accepted
+
+bp = Blueprint('roster', __name__, cli_group=None)
+log = logging.getLogger('ate.roster')
+
+def run_roster_import(kind, rows, report):
+    if kind == 'affiliates':
+        report = roster_import.import_affiliates(
+            db.session, Afiliado.__table__, Sector.__table__, rows, report)
+        category, path = 'affiliate', '/afiliados'
+    else:
+        report = roster_import.import_children(
+            db.session, Child.__table__, Afiliado.__table__, rows, report)
+        category, path = 'child', '/hijos'
+    auditor.record(db.session, 'import', category,
+                   f'Importación del padrón: {report.upserted} filas cargadas, '
+                   f'{report.error_count} con errores', path=path)
+    db.session.commit()
+    return report
+
+# Importación masiva del padrón (CSV / XLSX)
+@bp.route('/import/<kind>', methods=['POST'])
+def import_roster(kind):
+    if kind not in ('affiliates', 'children'):
+        return jsonify({'error': f'Tipo de importación inválido: {kind}'}), 404
+    try:
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({'error': 'El campo file es requerido'}), 400
+
+        # Con ?async=1 el archivo se guarda y lo procesa un worker (ver /jobs)
+        if parse_bool(request.args.get('async')):
+            extension = os.path.splitext(upload.filename or '')[1].lower()
+            if extension not in ('.csv', '.xlsx'):
+                raise roster_import.ImportFileError('Formato de archivo no soportado (usar CSV o XLSX)')
+            jobs_dir = current_app.config['JOBS_DIR']
+            os.makedirs(jobs_dir, exist_ok=True)
+            path = os.path.join(jobs_dir, f'upload-{uuid.uuid4().hex}{extension}')
+            upload.save(path)
+            job_id = job_queue.enqueue('import_roster', {
+                'kind': kind, 'path': path, 'filename': upload.filename
+            })
+            return job_accepted(job_id)
+
+        rows = roster_import.read_rows(upload.stream, upload.filename)
+        report = run_roster_import(kind, rows, roster_import.ImportReport())
+        return jsonify(report.to_dict()), 200
+
+    except roster_import.ImportFileError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        log.exception('Error al importar el padrón')
+        return jsonify({'error': str(e)}), 500
+
+@bp.cli.command('import-roster')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--kind', type=click.Choice(['affiliates', 'children']), default='affiliates')
+@click.option('--report', 'report_path', type=click.Path(dir_okay=False),
+              help='Archivo CSV donde se escriben los errores por fila')
+def import_roster_command(path, kind, report_path):
+    """Importa afiliados o hijos desde un archivo CSV o XLSX."""
+    report_file = open(report_path, 'w', newline='', encoding='utf-8') if report_path else None
+    try:
+        with open(path, 'rb') as stream:
+            rows = roster_import.read_rows(stream, path)
+            report = run_roster_import(kind, rows, roster_import.ImportReport(report_file))
+    except roster_import.ImportFileError as e:
+        raise click.ClickException(str(e))
+    finally:
+        if report_file:
+            report_file.close()
+    click.echo(f'Filas procesadas: {report.processed}  guardadas: {report.upserted}  '
+               f'con error: {report.error_count}')
@@ -0,0 +1,27 @@
+from flask import Blueprint, jsonify
+
+from extensions import replica_router, response_cache
+from models import Delegate
+
+bp = Blueprint('system', __name__)
+
+@bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(response_cache.stats()), 200
+
+@bp.route('/health', methods=['GET'])
+def health_check():
+    try:
+        # Intentar hacer una consulta simple a la base de datos
+        Delegate.query.first()
+        return jsonify({
+            "status": "ok",
+            "message": "Server is running and database is connected",
+            # Retraso de cada réplica en segundos (null si no responde)
+            "replicas": replica_router.stats()
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
@@ -0,0 +1,112 @@
+"""Verifica que el stock de un beneficio se consuma en un solo lugar.
+
+Sobre un SQLite temporal creado con las migraciones asigna todo el stock de
+un beneficio a un delegado y después entrega, una por una y en lote:
+
+    python scripts/balance_check.py
+
+La asignación descuenta stock_rest; las entregas sólo descuentan el saldo
+del delegado y anular una entrega lo devuelve al saldo, no al stock.
+Termina con código 1 si algo falla.
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'balance.db')
+
+import migrate  # noqa: E402
+from app import create_app  # noqa: E402
+from extensions import delegate_balances  # noqa: E402
+from models import Afiliado, Benefit, Delegate, Sector, db  # noqa: E402
+
+STOCK = 10
+
+
+def seed():
+    db.session.add(Sector(sector_id=1, sector_name='Sector de prueba'))
+    db.session.add(Delegate(id=1, first_name='Delegado', last_name='Prueba', dni='1', sector_id=1))
+    db.session.add(Benefit(id=1, name='Kit escolar', type='Útiles', stock=STOCK, stock_rest=STOCK))
+    db.session.add(Afiliado(id_associate=1, affiliate_code=1, affiliate_name='Afiliado de prueba',
+                            dni='2', gender='F', sector_id=1))
+    db.session.commit()
+
+
+def stock_rest():
+    db.session.remove()
+    return db.session.get(Benefit, 1).stock_rest
+
+
+def balance(client):
+    rows = client.get('/delegates/1/balances').json
+    return rows[0]['balance'] if rows else None
+
+
+def delivery(quantity):
+    return {'delegate_id': 1, 'affiliate_id': 1, 'benefit_id': 1, 'quantity': quantity,
+            'recipient_type': 'affiliate'}
+
+
+def main():
+    app = create_app()
+    errors = []
+
+    def expect(name, condition):
+        print(f'{"OK   " if condition else "FALLA"} {name}')
+        if not condition:
+            errors.append(name)
+
+    with app.app_context():
+        migrate.upgrade(db.engine, echo=lambda message: None)
+        seed()
+        client = app.test_client()
+
+        response = client.post('/delegate-assignments',
+                               json={'delegate_id': 1, 'benefit_id': 1, 'quantity': STOCK})
+        expect('se asigna todo el stock', response.status_code == 201)
+        expect('la respuesta informa el stock que quedó en la base',
+               response.json['benefit']['stock_rest'] == stock_rest() == 0)
+        response = client.post('/delegate-assignments',
+                               json={'delegate_id': 1, 'benefit_id': 1, 'quantity': 1})
+        expect('sin stock no se asigna más', response.status_code == 409)
+
+        response = client.post('/benefit-deliveries', json=delivery(3))
+        expect('con todo el stock asignado la entrega se registra', response.status_code == 201)
+        delivery_id = response.json.get('delivery_id')
+        expect('la entrega descuenta el saldo', balance(client) == STOCK - 3)
+        expect('la entrega no vuelve a descontar el stock', stock_rest() == 0)
+
+        response = client.post('/benefit-deliveries/bulk',
+                               json={'deliveries': [delivery(4), delivery(3), delivery(1)]})
+        results = [result['status'] for result in response.json['results']]
+        expect('el lote entrega hasta agotar el saldo', results == ['ok', 'ok', 'error'])
+        expect('el saldo queda en cero', balance(client) == 0)
+        response = client.post('/benefit-deliveries/bulk', json={'deliveries': [
+            dict(delivery(1), benefit_id=999), dict(delivery(1), delegate_id=[1])]})
+        errors_by_item = [result.get('error') for result in response.json['results']]
+        expect('el lote rechaza por ítem beneficios inexistentes e ids inválidos',
+               response.status_code == 400 and errors_by_item == [
+                   'Beneficio no encontrado', 'El campo delegate_id debe ser un número entero'])
+        response = client.post('/benefit-deliveries', json=delivery(1))
+        expect('sin saldo la entrega se rechaza', response.status_code == 409
+               and response.json['error'] == 'Saldo insuficiente del delegado')
+
+        client.delete(f'/benefit-deliveries/{delivery_id}')
+        expect('anular una entrega la devuelve al saldo', balance(client) == 3)
+        expect('anular una entrega no toca el stock', stock_rest() == 0)
+
+        result = delegate_balances.reconcile(db.session, dry_run=True)
+        db.session.rollback()
+        expect('el saldo coincide con la historia', result['drift_count'] == 0)
+
+    if errors:
+        print(f'{len(errors)} comprobación(es) fallida(s)')
+        sys.exit(1)
+    print('OK: el stock se descuenta al asignar y las entregas sólo usan el saldo')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""Verifica los eventos en vivo (live.py) con muchos clientes conectados.
+
+Levanta el servidor de `flask live-server` sobre un SQLite temporal (con
+consultas periódicas en lugar de LISTEN/NOTIFY), conecta --clients clientes
+a /stream y registra una asignación y una entrega con el cliente de pruebas
+de Flask:
+
+    python scripts/live_check.py --clients 500
+
+Comprueba que todos reciban el stock nuevo (de la asignación) y la entrega, que conectar más
+clientes no agregue hilos, que Last-Event-ID reponga lo perdido y que un
+id desconocido pida resync. Termina con código 1 si algo falla.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'live.db')
+
+import migrate  # noqa: E402
+from app import create_app  # noqa: E402
+from extensions import change_log, live_feed  # noqa: E402
+from live import build_server  # noqa: E402
+from models import Afiliado, Benefit, Delegate, Sector, db  # noqa: E402
+from sync import install_sqlite_change_log  # noqa: E402
+
+TIMEOUT = 10
+
+
+def seed():
+    db.session.add(Sector(sector_id=1, sector_name='Sector de prueba'))
+    db.session.add(Delegate(id=1, first_name='Delegado', last_name='Prueba', dni='1', sector_id=1))
+    db.session.add(Benefit(id=1, name='Kit escolar', type='Útiles', stock=100, stock_rest=100))
+    db.session.add(Afiliado(id_associate=1, affiliate_code=1, affiliate_name='Afiliado de prueba',
+                            dni='2', gender='F', sector_id=1))
+    db.session.commit()
+
+
+def start_server(app):
+    """Corre el servidor en un hilo propio; devuelve (servidor, puerto)."""
+    started = threading.Event()
+    state = {}
+
+    with app.app_context():
+        engine = db.engine
+
+    def prepare():
+        install_sqlite_change_log(engine, change_log.collections)
+
+    server = build_server(live_feed, engine, {**app.config, 'LIVE_POLL_SECONDS': 0.1},
+                          prepare=prepare)
+
+    def ready(listener):
+        state['port'] = listener.sockets[0].getsockname()[1]
+        started.set()
+
+    thread = threading.Thread(target=lambda: asyncio.run(server.serve('127.0.0.1', 0, ready)),
+                              daemon=True)
+    thread.start()
+    started.wait(TIMEOUT)
+    return server, state['port']
+
+
+async def connect(port, last_event_id=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    headers = f'Last-Event-ID: {last_event_id}\r\n' if last_event_id else ''
+    writer.write(f'GET /stream HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n'.encode())
+    await writer.drain()
+    status = await reader.readline()
+    while (await reader.readline()) not in (b'\r\n', b''):
+        pass
+    return status, reader, writer
+
+
+async def read_events(reader, count):
+    """Los próximos count eventos como (id, tipo, datos); ignora retry y ping."""
+    events = []
+    event = {}
+    while len(events) < count:
+        line = (await reader.readline()).decode().rstrip('\n')
+        if not line:
+            if 'event' in event:
+                events.append((event.get('id'), event['event'], json.loads(event.get('data', '{}'))))
+            event = {}
+            continue
+        field, _, value = line.partition(': ')
+        if field in ('id', 'event', 'data'):
+            event[field] = value
+    return events
+
+
+async def main(clients):
+    app = create_app()
+    with app.app_context():
+        migrate.upgrade(db.engine, echo=lambda message: None)
+        seed()
+
+    errors = []
+
+    def expect(name, condition):
+        print(f'{"OK   " if condition else "FALLA"} {name}')
+        if not condition:
+            errors.append(name)
+
+    server, port = start_server(app)
+    # La primera consulta fija desde dónde se informan cambios
+    while server.source.last_change is None:
+        await asyncio.sleep(0.05)
+
+    threads = threading.active_count()
+    connections = await asyncio.gather(*(connect(port) for _ in range(clients)))
+    expect(f'{clients} clientes conectados',
+           all(status.startswith(b'HTTP/1.1 200') for status, _, _ in connections))
+    await asyncio.sleep(0.2)
+    expect('conectar clientes no agrega hilos', threading.active_count() == threads)
+
+    started = time.monotonic()
+    # La asignación descuenta el stock; la entrega sale del saldo del delegado
+    response = app.test_client().post('/delegate-assignments',
+                                      json={'delegate_id': 1, 'benefit_id': 1, 'quantity': 10})
+    expect('la asignación se registra', response.status_code == 201)
+    response = app.test_client().post('/benefit-deliveries', json={
+        'delegate_id': 1, 'affiliate_id': 1, 'benefit_id': 1, 'quantity': 3,
+        'recipient_type': 'affiliate'
+    })
+    expect('la entrega se registra', response.status_code == 201)
+
+    received = await asyncio.wait_for(
+        asyncio.gather(*(read_events(reader, 2) for _, reader, _ in connections)), TIMEOUT)
+    elapsed = (time.monotonic() - started) * 1000
+    by_type = [{kind: data for _, kind, data in events} for events in received]
+    expect('todos reciben el stock nuevo',
+           all(events.get('stock', {}).get('stock_rest') == 90 for events in by_type))
+    expect('todos reciben la entrega',
+           all(events.get('delivery', {}).get('quantity') == 3 for events in by_type))
+    print(f'      {clients} clientes notificados en {elapsed:.0f} ms')
+
+    first_id = received[0][0][0]
+    _, reader, writer = await connect(port, last_event_id=first_id)
+    replayed = await asyncio.wait_for(read_events(reader, 1), TIMEOUT)
+    expect('Last-Event-ID repone los eventos posteriores', replayed[0][0] == received[0][1][0])
+    writer.close()
+
+    _, reader, writer = await connect(port, last_event_id='otro-1')
+    replayed = await asyncio.wait_for(read_events(reader, 1), TIMEOUT)
+    expect('un id desconocido pide resync', replayed[0][1] == 'resync')
+    writer.close()
+
+    for _, _, writer in connections:
+        writer.close()
+
+    if errors:
+        print(f'{len(errors)} comprobación(es) fallida(s)')
+        sys.exit(1)
+    print('OK: los eventos en vivo llegan a todos los clientes')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=500, help='Clientes conectados a la vez')
+    asyncio.run(main(parser.parse_args().clients))
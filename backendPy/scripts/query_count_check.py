@@ -0,0 +1,144 @@
+"""Verifica que los listados no vuelvan a tener consultas N+1.
+
+Carga --rows asignaciones y entregas (y afiliados, hijos, delegados y
+beneficios en proporción) en un SQLite temporal, llama a cada endpoint de
+CHECKS con el cliente de pruebas de Flask dentro de assert_max_queries y
+falla si alguno ejecuta más consultas que su máximo. Los máximos no
+dependen de la cantidad de filas: un listado que consulta una relación por
+fila los supera con cualquier volumen.
+
+    python scripts/query_count_check.py --rows 500
+
+Termina con código 1 si algo falla.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'queries.db')
+
+from sqlalchemy import select  # noqa: E402
+
+import migrate  # noqa: E402
+from app import create_app  # noqa: E402
+from extensions import change_log  # noqa: E402
+from models import (Afiliado, Benefit, BenefitDelivery, Child, Delegate, DelegateAssignment,  # noqa: E402
+                    Sector, db)
+from query_count import assert_max_queries  # noqa: E402
+from sync import install_sqlite_change_log  # noqa: E402
+
+# Endpoint y máximo de consultas (incluye la de versión de la colección en
+# los listados con ETag). Los {valores} se completan con filas reales
+CHECKS = (
+    ('asignaciones', '/delegate-assignments', 1),
+    ('asignaciones de un delegado', '/delegate-assignments?delegate_id={delegate_id}', 1),
+    ('entregas', '/benefit-deliveries', 1),
+    ('entregas de un beneficio', '/benefit-deliveries?benefit_id={benefit_id}', 1),
+    ('afiliados', '/afiliados?limit=100', 3),
+    ('hijos', '/children', 2),
+    ('delegados', '/delegates', 2),
+    ('sectores', '/sectors', 2),
+    ('beneficios', '/benefits', 2),
+    ('saldo de un delegado', '/delegates/{delegate_id}/balances', 2),
+    ('fichas de afiliados', '/afiliados/profiles?ids={affiliate_ids}', 5),
+)
+
+
+def insert_rows(table, rows):
+    db.session.execute(table.insert(), rows)
+    db.session.commit()
+
+
+def ids(column):
+    return [row[0] for row in db.session.execute(select(column).order_by(column))]
+
+
+def seed(rows, rng):
+    now = datetime(2026, 1, 1)
+    insert_rows(Sector.__table__, [{'sector_name': f'Sector {i}'} for i in range(10)])
+    sector_ids = ids(Sector.sector_id)
+    insert_rows(Afiliado.__table__, [{
+        'affiliate_code': i + 1, 'affiliate_name': f'Afiliado {i}', 'dni': str(20000000 + i),
+        'gender': rng.choice('MF'), 'sector_id': rng.choice(sector_ids), 'has_children': True,
+        'created_at': now,
+    } for i in range(rows)])
+    affiliate_ids = ids(Afiliado.id_associate)
+    insert_rows(Child.__table__, [{
+        'affiliate_id': affiliate_id, 'first_name': 'Hijo', 'last_name': f'Afiliado {index}',
+        'birth_date': date(2012, 1, 1) + timedelta(days=rng.randrange(3650)),
+        'gender': rng.choice('MF'), 'created_at': now,
+    } for index, affiliate_id in enumerate(affiliate_ids)])
+    child_rows = db.session.execute(select(Child.child_id, Child.affiliate_id)).all()
+    insert_rows(Delegate.__table__, [{
+        'first_name': f'Delegado {i}', 'last_name': 'Prueba', 'dni': str(30000000 + i),
+        'sector_id': rng.choice(sector_ids), 'is_active': True, 'status': 'Activo', 'created_at': now,
+    } for i in range(max(rows // 10, 1))])
+    delegate_ids = ids(Delegate.id)
+    insert_rows(Benefit.__table__, [{
+        'name': f'Beneficio {i}', 'type': 'escolar', 'age_range': rng.choice(('0-5', '6-12', None)),
+        'stock': 1000, 'stock_rest': 1000, 'status': 'Disponible', 'is_available': True,
+        'created_at': now, 'updated_at': now,
+    } for i in range(max(rows // 10, 1))])
+    benefit_ids = ids(Benefit.id)
+    insert_rows(DelegateAssignment.__table__, [{
+        'benefit_id': rng.choice(benefit_ids), 'delegate_id': rng.choice(delegate_ids),
+        'quantity': 5, 'assignment_date': now,
+    } for _ in range(rows)])
+    deliveries = []
+    for _ in range(rows):
+        child_id, affiliate_id = rng.choice(child_rows)
+        deliveries.append({
+            'delegate_id': rng.choice(delegate_ids), 'affiliate_id': affiliate_id,
+            'benefit_id': rng.choice(benefit_ids), 'child_id': child_id, 'quantity': 1,
+            'delivery_date': now, 'status': 'Entregado', 'recipient_type': 'child',
+        })
+    insert_rows(BenefitDelivery.__table__, deliveries)
+    return {
+        'delegate_id': delegate_ids[0],
+        'benefit_id': benefit_ids[0],
+        'affiliate_ids': ','.join(str(affiliate_id) for affiliate_id in affiliate_ids[:20]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500, help='Asignaciones y entregas a cargar')
+    args = parser.parse_args()
+
+    app = create_app()
+    failures = []
+    with app.app_context():
+        migrate.upgrade(db.engine, echo=lambda message: None)
+        values = seed(args.rows, random.Random(7))
+        # Los triggers de SQLite se instalan en el primer uso: no se cuentan
+        install_sqlite_change_log(db.engine, change_log.collections)
+        client = app.test_client()
+        for name, path, maximum in CHECKS:
+            path = path.format(**values)
+            try:
+                with assert_max_queries(db.engine, maximum) as counter:
+                    response = client.get(path)
+            except AssertionError as e:
+                print(f'FALLA {name} ({path})\n{e}')
+                failures.append(name)
+                continue
+            if response.status_code != 200:
+                print(f'FALLA {name} ({path}): respuesta {response.status_code}')
+                failures.append(name)
+                continue
+            print(f'OK    {name}: {counter.count} consultas (máximo {maximum})')
+
+    if failures:
+        print(f'{len(failures)} endpoint(s) superan el máximo de consultas')
+        sys.exit(1)
+    print('OK: ningún listado consulta una relación por fila')
+
+
+if __name__ == '__main__':
+    main()
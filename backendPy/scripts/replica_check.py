@@ -0,0 +1,98 @@
+"""Verifica el ruteo de lecturas a réplicas con dos bases SQLite locales.
+
+La "réplica" es otra base con el mismo esquema que no recibe las escrituras,
+así que se nota de dónde lee cada request (además de X-DB-Route):
+
+    python scripts/replica_check.py
+
+Comprueba que un GET lea de la réplica, que quien escribe lea del primario
+durante REPLICA_PIN_SECONDS, que se vuelva a la réplica al vencer ese plazo
+y que una réplica atrasada o caída se saltee. Termina con código 1 si algo falla.
+"""
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+workdir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'primary.db')
+REPLICA_URL = 'sqlite:///' + os.path.join(workdir, 'replica.db')
+
+import migrate  # noqa: E402
+from app import create_app  # noqa: E402
+from extensions import replica_router  # noqa: E402
+from models import db  # noqa: E402
+from replicas import PIN_HEADER  # noqa: E402
+
+PIN_SECONDS = 1
+
+
+def affiliate_codes(client, pin=None):
+    # Como el frontend: el plazo se reenvía en un encabezado, no en una cookie
+    response = client.get('/afiliados', headers={PIN_HEADER: pin} if pin else {})
+    return response.headers.get('X-DB-Route'), {row['affiliate_code'] for row in response.json}
+
+
+def main():
+    app = create_app({
+        'DATABASE_REPLICA_URLS': [REPLICA_URL],
+        'REPLICA_PIN_SECONDS': PIN_SECONDS,
+        'REPLICA_CHECK_SECONDS': 0,
+    })
+    with app.app_context():
+        for engine in db.engines.values():
+            migrate.upgrade(engine, echo=lambda message: None)
+
+    errors = []
+
+    def expect(name, condition):
+        print(f'{"OK   " if condition else "FALLA"} {name}')
+        if not condition:
+            errors.append(name)
+
+    writer = app.test_client()
+    response = writer.post('/afiliados', json={
+        'affiliate_code': 1, 'affiliate_name': 'Afiliado de prueba', 'dni': '1',
+        'gender': 'F', 'sector_id': 1
+    })
+    expect('el alta va al primario', response.status_code == 201
+           and response.headers.get('X-DB-Route') == 'primary')
+    pin = response.headers.get(PIN_HEADER)
+    expect('la escritura devuelve el plazo en un encabezado visible para CORS',
+           pin is not None and PIN_HEADER in response.headers.get('Access-Control-Expose-Headers', ''))
+
+    route, codes = affiliate_codes(writer, pin)
+    expect('quien reenvía el plazo lee del primario y ve su alta', route == 'primary' and codes == {1})
+
+    route, _ = affiliate_codes(writer)
+    expect('sin el encabezado no queda fijado (no depende de cookies)', route == 'replica_0')
+
+    route, codes = affiliate_codes(app.test_client())
+    expect('otro cliente lee de la réplica', route == 'replica_0' and codes == set())
+
+    time.sleep(PIN_SECONDS + 0.1)
+    route, _ = affiliate_codes(writer, pin)
+    expect('al vencer el plazo vuelve a la réplica', route == 'replica_0')
+
+    replica_router.lag_probe = lambda engine: 30.0
+    route, codes = affiliate_codes(app.test_client())
+    expect('réplica atrasada: lee del primario', route == 'primary' and codes == {1})
+
+    def unreachable(engine):
+        raise ConnectionError('réplica caída')
+
+    replica_router.lag_probe = unreachable
+    route, _ = affiliate_codes(app.test_client())
+    expect('réplica caída: lee del primario', route == 'primary')
+
+    if errors:
+        print(f'{len(errors)} comprobación(es) fallida(s)')
+        sys.exit(1)
+    print('OK: el ruteo a réplicas respeta las escrituras recientes y el retraso')
+
+
+if __name__ == '__main__':
+    main()
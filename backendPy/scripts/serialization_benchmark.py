@@ -0,0 +1,109 @@
+"""Compara la serialización de listados: to_dict() + jsonify contra columnas + orjson.
+
+Carga N afiliados en la base de DATABASE_URL (por defecto un SQLite temporal)
+y mide, para cada tamaño, la consulta y la serialización por separado:
+
+    python scripts/serialization_benchmark.py --rows 1000 10000 100000
+
+Con una base real no se borra nada: las filas de prueba se insertan con
+affiliate_code a partir de --code-offset y se eliminan al terminar.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+import migrate  # noqa: E402
+from app import create_app  # noqa: E402
+from models import Afiliado, db  # noqa: E402
+from routes.affiliates import AFFILIATE_FIELDS  # noqa: E402
+from serialization import orjson  # noqa: E402
+
+app = create_app()
+
+
+def seed(count, code_offset):
+    db.session.execute(Afiliado.__table__.insert(), [{
+        'affiliate_code': code_offset + i,
+        'affiliate_name': f'Afiliado de prueba {i}',
+        'dni': f'B{code_offset + i}',
+        'gender': 'MF'[i % 2],
+        'contact': f'afiliado{i}@example.com',
+        'sector_id': None,
+        'has_children': i % 3 == 0,
+        'has_disability': i % 7 == 0,
+    } for i in range(count)])
+    db.session.commit()
+
+
+def cleanup(code_offset):
+    db.session.query(Afiliado).filter(Afiliado.affiliate_code >= code_offset).delete()
+    db.session.commit()
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(count, repeat, code_offset):
+    fields = AFFILIATE_FIELDS
+    legacy_json = DefaultJSONProvider(app)
+    fast_json = app.json
+    where = Afiliado.affiliate_code >= code_offset
+
+    legacy_query, rows = timed(lambda: Afiliado.query.filter(where).all(), repeat)
+    legacy_dump, legacy_body = timed(
+        lambda: legacy_json.dumps([row.to_dict() for row in rows]).encode('utf-8'), repeat
+    )
+    fast_query, tuples = timed(lambda: fields.fetch(db.session, where=where), repeat)
+    fast_dump, fast_body = timed(lambda: fast_json.dumps_bytes(tuples), repeat)
+    sparse = ['dni', 'affiliate_name']
+    sparse_query, sparse_rows = timed(lambda: fields.fetch(db.session, sparse, where=where), repeat)
+    sparse_dump, sparse_body = timed(lambda: fast_json.dumps_bytes(sparse_rows), repeat)
+
+    assert json.loads(legacy_body) == json.loads(fast_body), 'las dos salidas no coinciden'
+    return [
+        ('to_dict + jsonify', legacy_query, legacy_dump, len(legacy_body)),
+        ('columnas + ' + ('orjson' if orjson else 'json'), fast_query, fast_dump, len(fast_body)),
+        ('?fields=dni,affiliate_name', sparse_query, sparse_dump, len(sparse_body)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--code-offset', type=int, default=900000000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        migrate.upgrade(db.engine)
+        print(f'{"filas":>7}  {"camino":<28} {"consulta ms":>11} {"serializa ms":>12} {"total ms":>9} {"bytes":>11}')
+        for count in args.rows:
+            cleanup(args.code_offset)
+            seed(count, args.code_offset)
+            for name, query_time, dump_time, size in run(count, args.repeat, args.code_offset):
+                print(f'{count:>7}  {name:<28} {query_time * 1000:>11.1f} {dump_time * 1000:>12.1f} '
+                      f'{(query_time + dump_time) * 1000:>9.1f} {size:>11}')
+        cleanup(args.code_offset)
+
+
+if __name__ == '__main__':
+    main()
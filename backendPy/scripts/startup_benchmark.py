@@ -0,0 +1,83 @@
+"""Mide el arranque en frío: import de app, create_app() y el primer request.
+
+Cada corrida es un proceso nuevo (sin módulos ya importados), así que el
+número incluye todo lo que paga un worker de gunicorn sin preload o un
+`flask <comando>`. Muestra mediana, mínimo y máximo de cada etapa:
+
+    python scripts/startup_benchmark.py --runs 10 --path /health
+
+Con --max-ms el script termina con código 1 si la mediana del total supera
+el presupuesto, para poder usarlo en CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Se ejecuta en el proceso hijo; imprime los tiempos en ms como JSON
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app()
+created = time.perf_counter()
+response = flask_app.test_client().get(sys.argv[1])
+served = time.perf_counter()
+print(json.dumps({
+    'import': (imported - start) * 1000,
+    'create_app': (created - imported) * 1000,
+    'first_request': (served - created) * 1000,
+    'total': (served - start) * 1000,
+    'status': response.status_code,
+}))
+"""
+
+STAGES = ('import', 'create_app', 'first_request', 'total')
+
+
+def probe(path, env):
+    result = subprocess.run([sys.executable, '-c', PROBE, path], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--path', default='/health')
+    parser.add_argument('--max-ms', type=float, help='presupuesto para la mediana del total')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    # Sin DATABASE_URL se usa un SQLite temporal con el esquema ya migrado
+    if 'DATABASE_URL' not in env:
+        env['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'startup.db')
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app:create_app', 'db', 'upgrade'],
+                       cwd=BACKEND_DIR, env=env, capture_output=True, check=True)
+
+    # La primera corrida compila los .pyc y no se cuenta
+    probe(args.path, env)
+    samples = [probe(args.path, env) for _ in range(args.runs)]
+    statuses = {sample['status'] for sample in samples}
+    if statuses != {200}:
+        print(f'Advertencia: {args.path} respondió {sorted(statuses)}')
+
+    print(f'{"etapa":<14} {"mediana ms":>10} {"mín ms":>8} {"máx ms":>8}')
+    for stage in STAGES:
+        values = [sample[stage] for sample in samples]
+        print(f'{stage:<14} {statistics.median(values):>10.1f} {min(values):>8.1f} {max(values):>8.1f}')
+
+    total = statistics.median(sample['total'] for sample in samples)
+    if args.max_ms is not None and total > args.max_ms:
+        print(f'El arranque ({total:.1f} ms) supera el presupuesto de {args.max_ms:.1f} ms')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
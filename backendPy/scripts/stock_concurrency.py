@@ -0,0 +1,80 @@
+"""Dispara entregas concurrentes de un delegado y verifica su saldo.
+
+Las entregas salen del saldo del delegado (lo asignado y sin entregar), no
+del stock del beneficio. Uso (con el servidor corriendo y unidades ya
+asignadas al delegado):
+    python scripts/stock_concurrency.py --benefit-id 1 --delegate-id 1 --requests 300
+"""
+import argparse
+import json
+import sys
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+def get_balance(base_url, delegate_id, benefit_id):
+    with urllib.request.urlopen(f'{base_url}/delegates/{delegate_id}/balances') as response:
+        for balance in json.load(response):
+            if balance['benefit_id'] == benefit_id:
+                return balance['balance']
+    raise SystemExit(f'El delegado {delegate_id} no tiene asignado el beneficio {benefit_id}')
+
+
+def deliver(base_url, benefit_id, delegate_id):
+    body = json.dumps({
+        'delegate_id': delegate_id,
+        'benefit_id': benefit_id,
+        'quantity': 1,
+        'recipient_type': 'affiliate',
+        'notes': 'prueba de concurrencia'
+    }).encode()
+    request = urllib.request.Request(
+        f'{base_url}/benefit-deliveries', data=body, method='POST',
+        headers={'Content-Type': 'application/json'}
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--benefit-id', type=int, required=True)
+    parser.add_argument('--delegate-id', type=int, required=True)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=64)
+    args = parser.parse_args()
+
+    initial = get_balance(args.base_url, args.delegate_id, args.benefit_id)
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        statuses = Counter(pool.map(
+            lambda _: deliver(args.base_url, args.benefit_id, args.delegate_id),
+            range(args.requests)
+        ))
+    final = get_balance(args.base_url, args.delegate_id, args.benefit_id)
+
+    delivered = statuses.get(201, 0)
+    print(f'Saldo inicial: {initial}  final: {final}  respuestas: {dict(statuses)}')
+    errors = []
+    if final < 0:
+        errors.append('el saldo quedó negativo')
+    if initial - delivered != final:
+        errors.append(f'se registraron {delivered} entregas pero el saldo bajó {initial - final}')
+    if delivered > initial:
+        errors.append('se entregó más de lo disponible')
+    unexpected = set(statuses) - {201, 409}
+    if unexpected:
+        errors.append(f'respuestas inesperadas: {sorted(unexpected)}')
+    if errors:
+        print('FALLA: ' + '; '.join(errors))
+        sys.exit(1)
+    print('OK: el saldo nunca quedó negativo')
+
+
+if __name__ == '__main__':
+    main()
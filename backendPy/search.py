@@ -0,0 +1,148 @@
+import re
+
+from sqlalchemy import text
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+SEARCH_TYPES = ('affiliate', 'delegate', 'child')
+
+
+class SearchError(ValueError):
+    pass
+
+
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+# Consultas para PostgreSQL (pg_trgm + unaccent, ver migrations/0003_search_indexes.py).
+# Cada rama usa las mismas expresiones que los índices para que el planner los tome.
+PG_BRANCHES = {
+    'affiliate': """
+        SELECT 'affiliate' AS type, id_associate AS id, affiliate_name AS label,
+               dni, CAST(affiliate_code AS TEXT) AS code,
+               CASE
+                   WHEN dni = :term OR CAST(affiliate_code AS TEXT) = :term THEN 3
+                   WHEN ate_unaccent(lower(affiliate_name)) LIKE :prefix ESCAPE '\\' THEN 2
+                   WHEN ate_unaccent(lower(affiliate_name)) LIKE :word_prefix ESCAPE '\\' THEN 1.5
+                   ELSE 1
+               END + similarity(ate_unaccent(lower(affiliate_name)), ate_unaccent(lower(:term))) AS score
+        FROM affiliates
+        WHERE ate_unaccent(lower(affiliate_name)) LIKE :contains ESCAPE '\\'
+           OR dni LIKE :raw_prefix ESCAPE '\\'
+           OR CAST(affiliate_code AS TEXT) LIKE :raw_prefix ESCAPE '\\'
+    """,
+    'delegate': """
+        SELECT 'delegate' AS type, id, first_name || ' ' || last_name AS label,
+               dni, NULL AS code,
+               CASE
+                   WHEN dni = :term THEN 3
+                   WHEN ate_unaccent(lower(first_name || ' ' || last_name)) LIKE :prefix ESCAPE '\\' THEN 2
+                   WHEN ate_unaccent(lower(first_name || ' ' || last_name)) LIKE :word_prefix ESCAPE '\\' THEN 1.5
+                   ELSE 1
+               END + similarity(ate_unaccent(lower(first_name || ' ' || last_name)),
+                                ate_unaccent(lower(:term))) AS score
+        FROM delegates
+        WHERE ate_unaccent(lower(first_name || ' ' || last_name)) LIKE :contains ESCAPE '\\'
+           OR dni LIKE :raw_prefix ESCAPE '\\'
+    """,
+    'child': """
+        SELECT 'child' AS type, child_id AS id, first_name || ' ' || last_name AS label,
+               dni, NULL AS code,
+               CASE
+                   WHEN dni = :term THEN 3
+                   WHEN ate_unaccent(lower(first_name || ' ' || last_name)) LIKE :prefix ESCAPE '\\' THEN 2
+                   WHEN ate_unaccent(lower(first_name || ' ' || last_name)) LIKE :word_prefix ESCAPE '\\' THEN 1.5
+                   ELSE 1
+               END + similarity(ate_unaccent(lower(first_name || ' ' || last_name)),
+                                ate_unaccent(lower(:term))) AS score
+        FROM children
+        WHERE ate_unaccent(lower(first_name || ' ' || last_name)) LIKE :contains ESCAPE '\\'
+           OR dni LIKE :raw_prefix ESCAPE '\\'
+    """,
+}
+
+
+def _search_postgres(session, term, types, limit, offset):
+    branches = ' UNION ALL '.join(PG_BRANCHES[t] for t in types)
+    # El término se normaliza con la misma función que usan los índices
+    normalized = session.execute(
+        text('SELECT ate_unaccent(lower(:term))'), {'term': term}
+    ).scalar()
+    escaped = _escape_like(normalized)
+    params = {
+        'term': term,
+        'prefix': f'{escaped}%',
+        'word_prefix': f'% {escaped}%',
+        'contains': f'%{escaped}%',
+        'raw_prefix': f'{_escape_like(term)}%',
+        'limit': limit + 1,
+        'offset': offset,
+    }
+    sql = f"""
+        SELECT type, id, label, dni, code, score
+        FROM ({branches}) AS hits
+        ORDER BY score DESC, type, id
+        LIMIT :limit OFFSET :offset
+    """
+    return session.execute(text(sql), params).mappings().all()
+
+
+# Respaldo con FTS5 para correr las pruebas locales sobre SQLite: la tabla
+# search_fts y sus triggers los crea migrations/0003_search_indexes.py
+
+
+def _search_sqlite(session, term, types, limit, offset):
+    tokens = re.findall(r'\w+', term)
+    if not tokens:
+        return []
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    placeholders = ', '.join(f':type_{i}' for i in range(len(types)))
+    params = {f'type_{i}': t for i, t in enumerate(types)}
+    params.update({'match': match, 'limit': limit + 1, 'offset': offset})
+    sql = f"""
+        SELECT type, CAST(entity_id AS INTEGER) AS id, label, dni, code, -rank AS score
+        FROM search_fts
+        WHERE search_fts MATCH :match AND type IN ({placeholders})
+        ORDER BY rank, type, entity_id
+        LIMIT :limit OFFSET :offset
+    """
+    return session.execute(text(sql), params).mappings().all()
+
+
+def parse_types(value):
+    if not value:
+        return list(SEARCH_TYPES)
+    types = [t.strip() for t in value.split(',') if t.strip()]
+    for t in types:
+        if t not in SEARCH_TYPES:
+            raise SearchError(f'Tipo de búsqueda inválido: {t}')
+    return types
+
+
+def search(session, term, types=SEARCH_TYPES, limit=DEFAULT_LIMIT, page=1):
+    """Busca por prefijo, sin distinguir acentos, en afiliados, delegados e hijos.
+
+    Devuelve (resultados, hay_más_páginas), ordenados por relevancia.
+    """
+    term = (term or '').strip()
+    if not term:
+        raise SearchError('El parámetro q es requerido')
+    limit = max(1, min(limit, MAX_LIMIT))
+    offset = (max(page, 1) - 1) * limit
+
+    if session.get_bind().dialect.name == 'postgresql':
+        rows = _search_postgres(session, term, types, limit, offset)
+    else:
+        rows = _search_sqlite(session, term, types, limit, offset)
+
+    hits = [{
+        'type': row['type'],
+        'id': row['id'],
+        'label': row['label'],
+        'dni': row['dni'],
+        'code': row['code'],
+        'score': round(float(row['score']), 4)
+    } for row in rows[:limit]]
+    return hits, len(rows) > limit
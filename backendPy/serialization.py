@@ -0,0 +1,87 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def _default(value):
+    # Mismo formato que los to_dict(): fechas en ISO 8601
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return DefaultJSONProvider.default(value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Proveedor JSON de Flask que codifica con orjson si está instalado.
+
+    orjson escribe bytes directamente y serializa datetime/date en ISO 8601,
+    así que las filas pueden pasar como vienen de la base sin to_dict(). Sin
+    orjson se usa el encoder estándar con el mismo formato de fechas.
+    """
+
+    default = staticmethod(_default)
+    # El frontend no depende del orden de las claves y ordenarlas cuesta
+    sort_keys = False
+
+    def dumps_bytes(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs).encode('utf-8')
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, **kwargs).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
+
+
+class Projection:
+    """Columnas de un listado con los mismos nombres que devuelve to_dict().
+
+    Permite pedir sólo algunos campos (?fields=dni,affiliate_name) y leer las
+    filas como tuplas, sin instanciar los modelos del ORM.
+    """
+
+    def __init__(self, *columns, **expressions):
+        self.columns = {column.key: column for column in columns}
+        self.columns.update({name: expression.label(name) for name, expression in expressions.items()})
+
+    def parse_fields(self, value, required=()):
+        if not value:
+            return list(self.columns)
+        fields = [field.strip() for field in value.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in self.columns]
+        if unknown:
+            raise FieldsError(f'Campos inválidos: {", ".join(unknown)}')
+        # Campos que el endpoint necesita igual (por ejemplo para el cursor)
+        return fields + [field for field in required if field not in fields]
+
+    def entities(self, fields=None):
+        return [self.columns[field] for field in (fields or self.columns)]
+
+    def rows(self, result, fields=None):
+        keys = list(fields or self.columns)
+        return [dict(zip(keys, row)) for row in result]
+
+    def fetch(self, session, fields=None, where=None, order_by=None):
+        query = session.query(*self.entities(fields))
+        if where is not None:
+            query = query.filter(where)
+        if order_by is not None:
+            query = query.order_by(order_by)
+        return self.rows(query, fields)
@@ -0,0 +1,256 @@
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import cast, delete, func, insert, select, text
+
+from eligibility import EligibilityError, parse_age_range
+
+# Las edades cambian con el calendario: el conteo de hijos por rango se
+# recalcula cuando tiene más de un día
+AGE_STATS_MAX_AGE = timedelta(days=1)
+
+
+class StatsError(ValueError):
+    pass
+
+
+def parse_month(value):
+    """'2024-05' -> date(2024, 5, 1)."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value.strip(), '%Y-%m').date()
+    except ValueError:
+        raise StatsError(f'Mes inválido (se espera AAAA-MM): {value}')
+
+
+def _age_bounds(age_range):
+    try:
+        return parse_age_range(age_range)
+    except EligibilityError:
+        return None
+
+
+# Triggers equivalentes a migrations/0007_stats.py para SQLite
+_SQLITE_DELIVERY_BUMP = """
+    INSERT INTO delivery_stats (month, sector_id, benefit_id, deliveries, quantity)
+    VALUES (
+        strftime('%Y-%m-01', coalesce({row}.delivery_date, CURRENT_TIMESTAMP)),
+        coalesce((SELECT sector_id FROM affiliates WHERE id_associate = coalesce(
+            {row}.affiliate_id,
+            (SELECT affiliate_id FROM children WHERE child_id = {row}.child_id))), 0),
+        coalesce({row}.benefit_id, 0), {sign}1, {sign}{row}.quantity)
+    ON CONFLICT (month, sector_id, benefit_id) DO UPDATE
+    SET deliveries = deliveries + excluded.deliveries, quantity = quantity + excluded.quantity;
+"""
+
+_SQLITE_ASSIGNMENT_BUMP = """
+    INSERT INTO assignment_stats (benefit_id, assignments, quantity)
+    VALUES (coalesce({row}.benefit_id, 0), {sign}1, {sign}{row}.quantity)
+    ON CONFLICT (benefit_id) DO UPDATE
+    SET assignments = assignments + excluded.assignments, quantity = quantity + excluded.quantity;
+"""
+
+_sqlite_ready = set()
+
+
+def install_sqlite_stats(engine):
+    if engine in _sqlite_ready:
+        return
+    with engine.begin() as conn:
+        for table, bump in (('benefit_deliveries', _SQLITE_DELIVERY_BUMP),
+                            ('delegate_assignments', _SQLITE_ASSIGNMENT_BUMP)):
+            add = bump.format(row='NEW', sign='')
+            remove = bump.format(row='OLD', sign='-')
+            for event, body in (('INSERT', add), ('DELETE', remove), ('UPDATE', remove + add)):
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_stats_{event.lower()} "
+                    f"AFTER {event} ON {table} BEGIN {body} END"
+                ))
+    _sqlite_ready.add(engine)
+
+
+class Statistics:
+    """Agregados del tablero servidos desde tablas resumen.
+
+    delivery_stats (mes, sector, beneficio) y assignment_stats (beneficio)
+    se mantienen con triggers en cada alta, baja o cambio de entregas y
+    asignaciones, así que /stats lee unas pocas filas sin importar cuántas
+    entregas haya en la historia. rebuild() las recalcula desde cero (carga
+    inicial y conciliación programada; también corrige entregas cuyo
+    afiliado cambió de sector). Los hijos por rango de edad se recalculan
+    con refresh_age_ranges() porque dependen de la fecha.
+    """
+
+    def __init__(self, delivery_stats, assignment_stats, age_stats, deliveries, assignments,
+                 affiliates, children, benefits, sectors, archives=None):
+        self.delivery_stats = delivery_stats
+        self.assignment_stats = assignment_stats
+        self.age_stats = age_stats
+        self.deliveries = deliveries
+        self.assignments = assignments
+        self.affiliates = affiliates
+        self.children = children
+        self.benefits = benefits
+        self.sectors = sectors
+        # Meses cuyas entregas se archivaron (ver partitions.py): sus filas de
+        # delivery_stats ya no se pueden recalcular y rebuild() las conserva
+        self.archives = archives
+
+    def prepare(self, session):
+        bind = session.get_bind()
+        if bind.dialect.name == 'sqlite':
+            install_sqlite_stats(bind)
+
+    def _month(self, session, column):
+        if session.get_bind().dialect.name == 'sqlite':
+            return func.strftime('%Y-%m-01', column)
+        return cast(func.date_trunc('month', column), self.delivery_stats.c.month.type)
+
+    def rebuild(self, session):
+        """Recalcula delivery_stats y assignment_stats desde las tablas de origen."""
+        self.prepare(session)
+        stats, assignment_stats = self.delivery_stats, self.assignment_stats
+        deliveries, assignments = self.deliveries.c, self.assignments.c
+        affiliates, children = self.affiliates.c, self.children.c
+
+        if session.get_bind().dialect.name == 'postgresql':
+            # Los triggers de las escrituras concurrentes esperan a este commit
+            session.execute(text('LOCK TABLE delivery_stats, assignment_stats IN EXCLUSIVE MODE'))
+
+        owner = func.coalesce(
+            deliveries.affiliate_id,
+            select(children.affiliate_id).where(children.child_id == deliveries.child_id).scalar_subquery()
+        )
+        sector = func.coalesce(
+            select(affiliates.sector_id).where(affiliates.id_associate == owner).scalar_subquery(), 0
+        )
+        month = self._month(session, func.coalesce(deliveries.delivery_date, func.now()))
+        benefit = func.coalesce(deliveries.benefit_id, 0)
+        grouped = (
+            select(month.label('month'), sector.label('sector_id'), benefit.label('benefit_id'),
+                   func.count().label('deliveries'), func.sum(deliveries.quantity).label('quantity'))
+            .group_by(month, sector, benefit)
+        )
+        if self.archives is not None:
+            archived = select(self.archives.c.month)
+            grouped = grouped.where(month.not_in(archived))
+            session.execute(delete(stats).where(stats.c.month.not_in(archived)))
+        else:
+            session.execute(delete(stats))
+        session.execute(insert(stats).from_select(
+            ['month', 'sector_id', 'benefit_id', 'deliveries', 'quantity'], grouped
+        ))
+
+        benefit = func.coalesce(assignments.benefit_id, 0)
+        session.execute(delete(assignment_stats))
+        session.execute(insert(assignment_stats).from_select(
+            ['benefit_id', 'assignments', 'quantity'],
+            select(benefit, func.count(), func.sum(assignments.quantity)).group_by(benefit)
+        ))
+
+    def refresh_age_ranges(self, session, today=None):
+        """Cuenta los hijos que entran en cada age_range de los beneficios."""
+        today = today or date.today()
+        age_stats, children = self.age_stats, self.children.c
+        ranges = {
+            age_range for (age_range,) in
+            session.execute(select(self.benefits.c.age_range).distinct())
+            if _age_bounds(age_range)
+        }
+
+        rows = []
+        now = datetime.now(timezone.utc)
+        for age_range in sorted(ranges):
+            # Edad dentro del rango: por ventana de birth_date (usa el índice)
+            after, until = _age_bounds(age_range).birth_window(today)
+            query = select(func.count()).select_from(self.children).where(children.birth_date <= until)
+            if after is not None:
+                query = query.where(children.birth_date > after)
+            count = session.execute(query).scalar()
+            rows.append({'age_range': age_range, 'children': count, 'refreshed_at': now})
+
+        session.execute(delete(age_stats))
+        if rows:
+            session.execute(insert(age_stats), rows)
+
+    def age_ranges_stale(self, session):
+        refreshed = session.execute(select(func.min(self.age_stats.c.refreshed_at))).scalar()
+        if refreshed is None:
+            # Sin filas: vencido sólo si hay beneficios con rango de edad
+            # (si no, cada /stats volvería a encolar refresh_stats)
+            return session.execute(
+                select(self.benefits.c.id).where(self.benefits.c.age_range.is_not(None)).limit(1)
+            ).first() is not None
+        if refreshed.tzinfo is None:
+            refreshed = refreshed.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - refreshed > AGE_STATS_MAX_AGE
+
+    def summary(self, session, month_from=None, month_to=None):
+        self.prepare(session)
+        stats, benefits, sectors = self.delivery_stats.c, self.benefits.c, self.sectors.c
+        conditions = []
+        if month_from:
+            conditions.append(stats.month >= month_from)
+        if month_to:
+            conditions.append(stats.month <= month_to)
+
+        by_sector = session.execute(
+            select(stats.sector_id, sectors.sector_name,
+                   func.sum(stats.deliveries), func.sum(stats.quantity))
+            .outerjoin(self.sectors, sectors.sector_id == stats.sector_id)
+            .where(*conditions)
+            .group_by(stats.sector_id, sectors.sector_name)
+            .order_by(stats.sector_id)
+        )
+        by_benefit = session.execute(
+            select(stats.benefit_id, benefits.name,
+                   func.sum(stats.deliveries), func.sum(stats.quantity))
+            .outerjoin(self.benefits, benefits.id == stats.benefit_id)
+            .where(*conditions)
+            .group_by(stats.benefit_id, benefits.name)
+            .order_by(stats.benefit_id)
+        )
+        by_month = session.execute(
+            select(stats.month, func.sum(stats.deliveries), func.sum(stats.quantity))
+            .where(*conditions)
+            .group_by(stats.month)
+            .order_by(stats.month)
+        )
+        assigned = self.assignment_stats.c
+        stock = session.execute(
+            select(benefits.id, benefits.name, benefits.stock, benefits.stock_rest,
+                   func.coalesce(assigned.quantity, 0))
+            .outerjoin(self.assignment_stats, assigned.benefit_id == benefits.id)
+            .order_by(benefits.id)
+        )
+        ages = session.execute(
+            select(self.age_stats.c.age_range, self.age_stats.c.children, self.age_stats.c.refreshed_at)
+            .order_by(self.age_stats.c.age_range)
+        ).all()
+
+        return {
+            'deliveries_by_sector': [
+                {'sector_id': sector_id or None, 'sector_name': name,
+                 'deliveries': deliveries, 'quantity': quantity}
+                for sector_id, name, deliveries, quantity in by_sector
+            ],
+            'deliveries_by_benefit': [
+                {'benefit_id': benefit_id or None, 'name': name,
+                 'deliveries': deliveries, 'quantity': quantity}
+                for benefit_id, name, deliveries, quantity in by_benefit
+            ],
+            'deliveries_by_month': [
+                {'month': month.isoformat()[:7] if isinstance(month, date) else str(month)[:7],
+                 'deliveries': deliveries, 'quantity': quantity}
+                for month, deliveries, quantity in by_month
+            ],
+            'stock_by_benefit': [
+                {'benefit_id': benefit_id, 'name': name, 'stock': total, 'stock_rest': rest,
+                 'used': (total or 0) - (rest or 0), 'assigned': quantity}
+                for benefit_id, name, total, rest, quantity in stock
+            ],
+            'children_by_age_range': [
+                {'age_range': age_range, 'children': count} for age_range, count, _ in ages
+            ],
+            'age_ranges_refreshed_at': min((row[2] for row in ages), default=None)
+        }
@@ -0,0 +1,66 @@
+from sqlalchemy import update
+
+
+class StockError(Exception):
+    status_code = 400
+
+
+class BenefitNotFound(StockError):
+    status_code = 404
+
+    def __init__(self, benefit_id):
+        super().__init__('Beneficio no encontrado')
+        self.benefit_id = benefit_id
+
+
+class InsufficientStock(StockError):
+    status_code = 409
+    message = 'Stock insuficiente'
+
+    def __init__(self, benefit_id, requested, available):
+        super().__init__(self.message)
+        self.benefit_id = benefit_id
+        self.requested = requested
+        self.available = available
+
+
+def parse_quantity(value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise StockError('La cantidad debe ser un número entero')
+    try:
+        quantity = int(value)
+    except ValueError:
+        raise StockError('La cantidad debe ser un número entero')
+    if quantity < 1:
+        raise StockError('La cantidad debe ser mayor a cero')
+    return quantity
+
+
+def _raise_for_missing(session, benefit_model, benefit_id, quantity):
+    row = session.query(benefit_model.stock_rest).filter(
+        benefit_model.id == benefit_id
+    ).first()
+    if row is None:
+        raise BenefitNotFound(benefit_id)
+    raise InsufficientStock(benefit_id, quantity, row.stock_rest or 0)
+
+
+def reserve(session, benefit_model, benefit_id, quantity):
+    """Descuenta stock_rest en un único UPDATE condicional.
+
+    La condición stock_rest >= cantidad se evalúa sobre la fila bloqueada por
+    el propio UPDATE, así que dos pedidos concurrentes nunca dejan el stock
+    negativo: el que pierde no actualiza ninguna fila y se informa con
+    InsufficientStock. Devuelve el beneficio con el stock_rest que quedó en
+    la base (RETURNING), sin suponer lo que hizo otro.
+    """
+    benefit = session.execute(
+        update(benefit_model)
+        .where(benefit_model.id == benefit_id, benefit_model.stock_rest >= quantity)
+        .values(stock_rest=benefit_model.stock_rest - quantity)
+        .returning(benefit_model),
+        execution_options={'synchronize_session': False, 'populate_existing': True}
+    ).scalar_one_or_none()
+    if benefit is None:
+        _raise_for_missing(session, benefit_model, benefit_id, quantity)
+    return benefit
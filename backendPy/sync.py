@@ -0,0 +1,162 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select, text
+
+# Los cambios más nuevos que esto pueden pertenecer a transacciones que todavía
+# no confirmaron ids menores; la versión informada al cliente se queda atrás
+# de esta ventana y esos cambios se reenvían (son idempotentes) en el próximo delta.
+SETTLE_SECONDS = 5
+# Un delta con más filas que esto se responde con 410 y el cliente recarga la
+# colección completa: evita un IN con decenas de miles de parámetros
+MAX_DELTA_ROWS = 500
+
+
+class SyncError(ValueError):
+    status_code = 400
+
+
+class VersionGone(SyncError):
+    status_code = 410
+
+    def __init__(self):
+        super().__init__('La versión indicada ya no es válida: recargar la colección completa')
+
+
+# Triggers equivalentes a migrations/0005_collection_changes.py para SQLite
+_sqlite_ready = set()
+
+
+def install_sqlite_change_log(engine, collections):
+    if engine in _sqlite_ready:
+        return
+    with engine.begin() as conn:
+        for table, key in collections.items():
+            for event, row, op in (('INSERT', 'NEW', 'upsert'), ('UPDATE', 'NEW', 'upsert'),
+                                   ('DELETE', 'OLD', 'delete')):
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_log_{event.lower()} "
+                    f"AFTER {event} ON {table} BEGIN "
+                    f"INSERT INTO collection_changes (collection, entity_id, op, changed_at) "
+                    f"VALUES ('{table}', {row}.{key}, '{op}', CURRENT_TIMESTAMP); END"
+                ))
+    _sqlite_ready.add(engine)
+
+
+class ChangeLog:
+    """Versiones por colección a partir de la tabla collection_changes.
+
+    Cada alta, modificación o baja de una fila la registra un trigger de la
+    base (también las hechas con UPDATE masivos o por otros triggers), así que
+    la versión de una colección es el mayor id de sus cambios. prune() borra
+    los cambios viejos y guarda en floors hasta qué versión llegó: los
+    ?since= anteriores reciben VersionGone.
+    """
+
+    def __init__(self, model, collections, floors=None):
+        self.model = model
+        self.collections = collections
+        self.floors = floors
+
+    def _prepare(self, session):
+        bind = session.get_bind()
+        if bind.dialect.name == 'sqlite':
+            install_sqlite_change_log(bind, self.collections)
+
+    def versions(self, session, collection):
+        """Devuelve (última versión, versión asentada) de la colección."""
+        self._prepare(session)
+        changes = self.model
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=SETTLE_SECONDS)
+        latest = (select(func.max(changes.id))
+                  .where(changes.collection == collection)
+                  .scalar_subquery())
+        settled = (select(func.max(changes.id))
+                   .where(changes.collection == collection, changes.changed_at < cutoff)
+                   .scalar_subquery())
+        if self.floors is None:
+            latest, settled = session.execute(select(latest, settled)).one()
+            return latest or 0, settled or 0
+        # Si se podaron todos sus cambios la versión no vuelve atrás
+        floor = (select(self.floors.version)
+                 .where(self.floors.collection == collection)
+                 .scalar_subquery())
+        latest, settled, floor = session.execute(select(latest, settled, floor)).one()
+        return max(latest or 0, floor or 0), max(settled or 0, floor or 0)
+
+    def floor(self, session, collection):
+        """(versión, fecha) hasta donde se podó la colección, o None."""
+        if self.floors is None:
+            return None
+        floor = session.get(self.floors, collection)
+        return (floor.version, floor.pruned_before) if floor else None
+
+    def changes_since(self, session, collection, since, latest):
+        """Ids modificados y eliminados desde since (versión o fecha ISO)."""
+        changes = self.model
+        query = select(changes.entity_id, changes.op).where(
+            changes.collection == collection, changes.id <= latest
+        )
+        if isinstance(since, int):
+            query = query.where(changes.id > since)
+        else:
+            query = query.where(changes.changed_at >= since)
+
+        # La última operación de cada fila define si se envía o se borra
+        last_op = {}
+        for entity_id, op in session.execute(query.order_by(changes.id)):
+            last_op[entity_id] = op
+        if len(last_op) > MAX_DELTA_ROWS:
+            raise VersionGone()
+        upserted = [entity_id for entity_id, op in last_op.items() if op == 'upsert']
+        deleted = [entity_id for entity_id, op in last_op.items() if op == 'delete']
+        return upserted, deleted
+
+    def prune(self, session, before):
+        """Borra los cambios anteriores a before; devuelve las filas borradas por colección."""
+        changes = self.model
+        pruned = {}
+        for collection in self.collections:
+            bound = session.execute(
+                select(func.max(changes.id))
+                .where(changes.collection == collection, changes.changed_at < before)
+            ).scalar()
+            if bound is None:
+                continue
+            pruned[collection] = session.execute(
+                delete(changes).where(changes.collection == collection, changes.id <= bound)
+            ).rowcount
+            floor = session.get(self.floors, collection)
+            if floor is None:
+                session.add(self.floors(collection=collection, version=bound, pruned_before=before))
+            else:
+                floor.version = max(floor.version, bound)
+                floor.pruned_before = max(_aware(floor.pruned_before), before)
+        return pruned
+
+
+def _aware(value):
+    # SQLite devuelve las fechas sin zona; se guardan en UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def parse_since(value, latest, floor=None):
+    """floor es el (versión, fecha) de ChangeLog.floor: lo anterior ya se podó."""
+    value = value.strip()
+    if value.isdigit():
+        since = int(value)
+        if since > latest or (floor and since < floor[0]):
+            raise VersionGone()
+        return since
+    try:
+        since = datetime.fromisoformat(value)
+    except ValueError:
+        raise SyncError(f'Valor de since inválido: {value}')
+    if floor and _aware(since) < _aware(floor[1]):
+        raise VersionGone()
+    return since
+
+
+def make_etag(collection, version, query_string):
+    digest = hashlib.sha1(query_string).hexdigest()[:12] if query_string else 'all'
+    return f'{collection}-{version}-{digest}'
@@ -115,6 +115,53 @@ export const STORAGE_KEYS = {
   SECTORS: 'sectors'
 };
 
+// Trae sólo lo que cambió desde la última versión guardada (?since=);
+// si el servidor ya no tiene esa versión (410) o falla, recarga todo.
+async function syncCollection<T>(
+  url: string,
+  storageKey: string,
+  idField: string,
+  setItems: (items: T[]) => void
+) {
+  const versionKey = `${storageKey}_version`;
+  const storedVersion = localStorage.getItem(versionKey);
+  const stored = localStorage.getItem(storageKey);
+  const cached: T[] = stored ? JSON.parse(stored) : [];
+
+  if (storedVersion && cached.length > 0) {
+    try {
+      const response = await axios.get(url, { params: { since: storedVersion } });
+      const { version, upserted, deleted } = response.data;
+      const changed = new Map(upserted.map((item: any) => [item[idField], item]));
+      const removed = new Set(deleted);
+      const merged = cached
+        .filter((item: any) => !removed.has(item[idField]) && !changed.has(item[idField]))
+        .concat(upserted);
+      setItems(merged);
+      localStorage.setItem(storageKey, JSON.stringify(merged));
+      localStorage.setItem(versionKey, String(version));
+      return;
+    } catch (error) {
+      console.error(`Error sincronizando ${url}, se recarga completo:`, error);
+    }
+  }
+
+  try {
+    const response = await axios.get(url);
+    setItems(response.data);
+    localStorage.setItem(storageKey, JSON.stringify(response.data));
+    const version = response.headers['x-collection-version'];
+    if (version) {
+      localStorage.setItem(versionKey, version);
+    }
+  } catch (error) {
+    console.error(`Error fetching ${url}:`, error);
+    if (stored) {
+      setItems(cached);
+    }
+  }
+}
+
 export function StorageProvider({ children: content }: { children: ReactNode }) {
   const [affiliates, setAffiliates] = useState<Affiliate[]>([]);
   const [children, setChildren] = useState<Child[]>(() => {
@@ -142,95 +189,27 @@ export function StorageProvider({ children: content }: { children: ReactNode })
   const [delegateAssignments, setDelegateAssignments] = useState<DelegateAssignment[]>([]);
 
   useEffect(() => {
-    const fetchAffiliates = async () => {
-      try {
-        const response = await axios.get('http://localhost:5000/afiliados');
-        const afiliatesData = response.data;
-        setAffiliates(afiliatesData);
-        localStorage.setItem(STORAGE_KEYS.AFFILIATES, JSON.stringify(afiliatesData));
-      } catch (error) {
-        console.error('Error fetching affiliates:', error);
-        const stored = localStorage.getItem(STORAGE_KEYS.AFFILIATES);
-        if (stored) {
-          setAffiliates(JSON.parse(stored));
-        }
-      }
-    };
-
-    fetchAffiliates();
-  }, []);
-
-  useEffect(() => {
-    const fetchChildren = async () => {
-      try {
-        const response = await axios.get('http://localhost:5000/children');
-        const childrenData = response.data;
-        setChildren(childrenData);
-        localStorage.setItem(STORAGE_KEYS.CHILDREN, JSON.stringify(childrenData));
-      } catch (error) {
-        console.error('Error fetching children:', error);
-        const stored = localStorage.getItem(STORAGE_KEYS.CHILDREN);
-        if (stored) {
-          setChildren(JSON.parse(stored));
-        }
-      }
-    };
-  
-    fetchChildren();
-  }, []);
-
-  useEffect(() => {
-    const fetchDelegates = async () => {
-      try {
-        const response = await axios.get('http://localhost:5000/delegates');
-        setDelegates(response.data);
-      } catch (error) {
-        console.error('Error fetching delegates:', error);
-        const storedDelegates = localStorage.getItem(STORAGE_KEYS.DELEGATES);
-        if (storedDelegates) {
-          setDelegates(JSON.parse(storedDelegates));
-        }
-      }
-    };
-
-    fetchDelegates();
-  }, []);
-
-  useEffect(() => {
-    const fetchSectors = async () => {
-      try {
-        const response = await axios.get('http://localhost:5000/sectors');
-        setSectors(response.data);
-      } catch (error) {
-        console.error('Error fetching sectors:', error);
-        const storedSectors = localStorage.getItem(STORAGE_KEYS.SECTORS);
-        if (storedSectors) {
-          setSectors(JSON.parse(storedSectors));
-        }
-      }
-    };
-
-    fetchSectors();
+    syncCollection<Affiliate>('http://localhost:5000/afiliados', STORAGE_KEYS.AFFILIATES, 'id_associate', setAffiliates);
+    syncCollection<Child>('http://localhost:5000/children', STORAGE_KEYS.CHILDREN, 'child_id', setChildren);
+    syncCollection<Delegate>('http://localhost:5000/delegates', STORAGE_KEYS.DELEGATES, 'id', setDelegates);
+    syncCollection<Sector>('http://localhost:5000/sectors', STORAGE_KEYS.SECTORS, 'sector_id', setSectors);
+    syncCollection<Benefit>('http://localhost:5000/benefits', STORAGE_KEYS.BENEFITS, 'id', setBenefits);
   }, []);
 
+  // Stock en vivo (servidor de `flask live-server`): cada asignación actualiza
+  // el stock sin recargar; 'resync' avisa que se perdieron eventos
   useEffect(() => {
-    const fetchBenefits = async () => {
-      try {
-        const response = await axios.get('http://localhost:5000/benefits');
-        const benefitsData = response.data;
-        console.log('Beneficios recibidos:', benefitsData); // Debug
-        setBenefits(benefitsData);
-        localStorage.setItem(STORAGE_KEYS.BENEFITS, JSON.stringify(benefitsData));
-      } catch (error) {
-        console.error('Error fetching benefits:', error);
-        const stored = localStorage.getItem(STORAGE_KEYS.BENEFITS);
-        if (stored) {
-          setBenefits(JSON.parse(stored));
-        }
-      }
-    };
-
-    fetchBenefits();
+    const source = new EventSource('http://localhost:5001/stream');
+    source.addEventListener('stock', (event) => {
+      const { benefit_id, stock, stock_rest, is_available } = JSON.parse((event as MessageEvent).data);
+      setBenefits(current => current.map(benefit =>
+        benefit.id === benefit_id ? { ...benefit, stock, stock_rest, is_available } : benefit
+      ));
+    });
+    source.addEventListener('resync', () => {
+      syncCollection<Benefit>('http://localhost:5000/benefits', STORAGE_KEYS.BENEFITS, 'id', setBenefits);
+    });
+    return () => source.close();
   }, []);
 
   useEffect(() => {
@@ -1,8 +1,11 @@
 import { StrictMode } from 'react';
 import { createRoot } from 'react-dom/client';
 import App from './App.tsx';
+import { installPrimaryPin } from './primaryPin';
 import './index.css';
 
+installPrimaryPin();
+
 createRoot(document.getElementById('root')!).render(
   <StrictMode>
     <App />
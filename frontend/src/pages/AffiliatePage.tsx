@@ -29,6 +29,19 @@ interface Affiliate {
   children?: Child[];
 }
 
+// Respuesta de GET /afiliados/<id>/profile: beneficios vigentes que todavía
+// le corresponden al afiliado y a cada hijo
+interface EligibleBenefit {
+  id: number;
+  name: string;
+  stock_rest: number;
+}
+
+interface AffiliateProfile {
+  eligible_benefits: EligibleBenefit[];
+  children: (Child & { eligible_benefits: EligibleBenefit[] })[];
+}
+
 interface Sector {
   sector_id: number;
   sector_name: string;
@@ -315,29 +328,27 @@ function AffiliatePage() {
   const [searchTerm, setSearchTerm] = useState("");
 
   const BenefitDeliveryForm = ({ affiliate, onClose }: { affiliate: Affiliate; onClose: () => void }) => {
-    const { benefits } = useStorage();
+    const { benefits, children: storedChildren } = useStorage();
     const [selectedRecipientType, setSelectedRecipientType] = useState<'affiliate' | 'child'>('affiliate');
-    const [children, setChildren] = useState<Child[]>([]);
+    const [selectedChildId, setSelectedChildId] = useState('');
+    const [profile, setProfile] = useState<AffiliateProfile | null>(null);
+    // Los hijos ya están cargados en el StorageContext: no hace falta pedirlos por afiliado
+    const children = storedChildren.filter(child => child.affiliate_id === affiliate.id_associate);
 
+    // La ficha trae en un solo pedido lo que ya recibió cada destinatario
     useEffect(() => {
-      const fetchChildren = async () => {
-        try {
-          const response = await fetch(`http://localhost:5000/afiliados/${affiliate.id_associate}/children`);
-          if (!response.ok) {
-            throw new Error('Error al cargar los hijos');
-          }
-          const data = await response.json();
-          setChildren(data);
-        } catch (error) {
-          console.error('Error al cargar los hijos:', error);
-          toast.error('Error al cargar la lista de hijos');
-        }
-      };
-
-      if (affiliate.has_children) {
-        fetchChildren();
-      }
-    }, [affiliate.id_associate, affiliate.has_children]);
+      fetch(`http://localhost:5000/afiliados/${affiliate.id_associate}/profile`)
+        .then(response => (response.ok ? response.json() : null))
+        .then(setProfile)
+        .catch(() => setProfile(null));
+    }, [affiliate.id_associate]);
+
+    // Sin la ficha se ofrecen todos los beneficios disponibles, como antes
+    const eligibleIds = !profile ? null : selectedRecipientType === 'affiliate'
+      ? profile.eligible_benefits.map(benefit => benefit.id)
+      : profile.children
+          .find(child => child.child_id === parseInt(selectedChildId))
+          ?.eligible_benefits.map(benefit => benefit.id) ?? null;
 
     return (
       <form onSubmit={handleDeliverBenefit} className="space-y-4">
@@ -350,6 +361,7 @@ function AffiliatePage() {
           >
             <option value="">Seleccione un beneficio</option>
             {benefits.filter(benefit => benefit.is_available && benefit.stock > 0)
+              .filter(benefit => !eligibleIds || eligibleIds.includes(benefit.id))
               .map(benefit => (
                 <option key={benefit.id} value={benefit.id}>
                   {benefit.name} - Stock: {benefit.stock}
@@ -378,6 +390,8 @@ function AffiliatePage() {
             <select
               name="childId"
               className="mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-emerald-500 focus:ring-emerald-500"
+              value={selectedChildId}
+              onChange={(e) => setSelectedChildId(e.target.value)}
               required
             >
               <option value="">Seleccione un hijo/a</option>
@@ -1,17 +1,47 @@
 import React, { useState, useEffect } from 'react';
 import { Search, Calendar, ExternalLink } from 'lucide-react';
 import { useNavigate } from 'react-router-dom';
-import { useHistory } from '../context/HistoryContext';
+import axios from 'axios';
+
+interface HistoryEvent {
+  id: number;
+  event_type: string;
+  category: string;
+  description: string;
+  date: string;
+  user: string;
+  entity_id: number | null;
+  path: string | null;
+}
 
 function HistoryPage() {
   const navigate = useNavigate();
-  const { events } = useHistory();
+  const [events, setEvents] = useState<HistoryEvent[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loading, setLoading] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
   const [filterType, setFilterType] = useState('');
 
+  // El historial se guarda en el servidor (GET /events), paginado por cursor
+  const loadEvents = async (cursor: string | null) => {
+    setLoading(true);
+    try {
+      const params: Record<string, string> = { limit: '100' };
+      if (filterType) params.event_type = filterType;
+      if (cursor) params.cursor = cursor;
+      const response = await axios.get('http://localhost:5000/events', { params });
+      setEvents(prev => (cursor ? [...prev, ...response.data.items] : response.data.items));
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error cargando el historial:', error);
+    } finally {
+      setLoading(false);
+    }
+  };
+
   useEffect(() => {
-    console.log('Eventos actuales:', events);
-  }, [events]);
+    loadEvents(null);
+  }, [filterType]);
 
   const formatDate = (dateString: string) => {
     const date = new Date(dateString);
@@ -50,18 +80,16 @@ function HistoryPage() {
     }
   };
 
-  const handleViewDetails = (event: any) => {
-    navigate(event.path);
+  const handleViewDetails = (event: HistoryEvent) => {
+    if (event.path) navigate(event.path);
   };
 
   const filteredEvents = events.filter(event => {
     const matchesSearch = searchTerm === '' || 
-      event.description.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      event.user.toLowerCase().includes(searchTerm.toLowerCase());
-    
-    const matchesFilter = filterType === '' || event.event_type === filterType;
-    
-    return matchesSearch && matchesFilter;
+      (event.description || '').toLowerCase().includes(searchTerm.toLowerCase()) ||
+      (event.user || '').toLowerCase().includes(searchTerm.toLowerCase());
+
+    return matchesSearch;
   });
 
   return (
@@ -147,6 +175,17 @@ function HistoryPage() {
                   ))}
                 </tbody>
               </table>
+              {nextCursor && (
+                <div className="text-center py-4">
+                  <button
+                    onClick={() => loadEvents(nextCursor)}
+                    disabled={loading}
+                    className="px-4 py-2 text-emerald-600 border border-emerald-600 rounded-md hover:bg-emerald-50 disabled:opacity-50"
+                  >
+                    {loading ? 'Cargando...' : 'Cargar más'}
+                  </button>
+                </div>
+              )}
             </div>
           ) : (
             <div className="text-center py-8">
@@ -0,0 +1,59 @@
+import axios from 'axios';
+
+// Después de una escritura el backend responde X-Primary-Until: hasta ese
+// momento las lecturas tienen que ir a la base principal y no a una réplica
+// atrasada. El frontend está en otro origen y no manda cookies, así que el
+// valor se guarda acá y se reenvía en cada request a la API.
+const PIN_HEADER = 'X-Primary-Until';
+const PIN_KEY = 'ate_primary_until';
+const API_URL = 'http://localhost:5000';
+
+function currentPin(): string | null {
+  const pin = localStorage.getItem(PIN_KEY);
+  if (pin && Number(pin) * 1000 <= Date.now()) {
+    localStorage.removeItem(PIN_KEY);
+    return null;
+  }
+  return pin;
+}
+
+function rememberPin(pin: string | null | undefined) {
+  if (pin) {
+    localStorage.setItem(PIN_KEY, pin);
+  }
+}
+
+function isApiRequest(input: RequestInfo | URL): boolean {
+  const url = input instanceof Request ? input.url : String(input);
+  return url.startsWith(API_URL);
+}
+
+export function installPrimaryPin() {
+  axios.interceptors.request.use(config => {
+    const pin = currentPin();
+    if (pin && config.url?.startsWith(API_URL)) {
+      config.headers.set(PIN_HEADER, pin);
+    }
+    return config;
+  });
+  axios.interceptors.response.use(response => {
+    rememberPin(response.headers[PIN_HEADER.toLowerCase()]);
+    return response;
+  });
+
+  const fetchWithoutPin = window.fetch.bind(window);
+  window.fetch = async (input: RequestInfo | URL, init?: RequestInit) => {
+    if (!isApiRequest(input)) {
+      return fetchWithoutPin(input, init);
+    }
+    const pin = currentPin();
+    if (pin) {
+      const headers = new Headers(init?.headers ?? (input instanceof Request ? input.headers : undefined));
+      headers.set(PIN_HEADER, pin);
+      init = { ...init, headers };
+    }
+    const response = await fetchWithoutPin(input, init);
+    rememberPin(response.headers.get(PIN_HEADER));
+    return response;
+  };
+}